@@ -0,0 +1,44 @@
+"""
+Benchmark: webhook decoding.
+
+Compares `json.loads` + `MaxReceiver.parse_webhook` with compiled `MaxWebhookDecoder` backends.
+
+Usage:
+```
+python benchmarks/bench_decoder.py
+```
+"""
+
+import json
+import timeit
+from messenger_utils.max import MaxReceiver, MaxWebhookDecoder
+from samples import ALL
+
+NUMBER = 20_000
+
+
+def current_path(raw: bytes):
+    """Two-pass parsing: json.loads + structural match."""
+    return MaxReceiver(json.loads(raw)).parse_webhook()
+
+
+def main():
+    decoders = {"pydantic": MaxWebhookDecoder(backend="pydantic")}
+    decoders["pydantic, no full_body"] = MaxWebhookDecoder(backend="pydantic", keep_full_body=False)
+    try:
+        decoders["msgspec"] = MaxWebhookDecoder(backend="msgspec")
+        decoders["msgspec, no full_body"] = MaxWebhookDecoder(backend="msgspec", keep_full_body=False)
+    except ValueError:
+        print("msgspec is not installed - skipped")
+    for name, body in ALL.items():
+        raw = json.dumps(body).encode()
+        base = timeit.timeit(lambda: current_path(raw), number=NUMBER)
+        print(f"\n{name} ({len(raw)} bytes)")
+        print(f"  {'json.loads + parse_webhook':<28} {base / NUMBER * 1e6:8.2f} us")
+        for title, decoder in decoders.items():
+            t = timeit.timeit(lambda: decoder.decode(raw), number=NUMBER)
+            print(f"  {title:<28} {t / NUMBER * 1e6:8.2f} us  (x{base / t:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: events serialization for inter-process queues.
+
+Compares size and speed of `to_bytes` / `from_bytes` with pickle and JSON.
+
+Usage:
+```
+python benchmarks/bench_event_codec.py
+```
+"""
+
+import json
+import pickle
+import timeit
+from dataclasses import asdict
+from messenger_utils.max import MaxReceiver
+from messenger_utils.models.max_webhook_event import MaxWebhookEvent
+from samples import ALL
+
+NUMBER = 20_000
+
+
+def main():
+    for name, body in ALL.items():
+        event = MaxReceiver(body).parse_webhook()
+        event_cls = type(event)
+        codecs = {
+            "pickle": (
+                lambda: pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL),
+                pickle.loads
+            ),
+            "json (asdict)": (
+                lambda: json.dumps(asdict(event)).encode(),
+                lambda data: event_cls(**json.loads(data))
+            ),
+            "to_bytes": (
+                event.to_bytes,
+                MaxWebhookEvent.from_bytes
+            ),
+            "to_bytes, no full_body": (
+                lambda: event.to_bytes(with_full_body=False),
+                MaxWebhookEvent.from_bytes
+            ),
+        }
+        print(f"\n{name}")
+        print(f"  {'codec':<24} {'size':>6} {'dump, us':>10} {'load, us':>10}")
+        for title, (dump, load) in codecs.items():
+            data = dump()
+            t_dump = timeit.timeit(dump, number=NUMBER) / NUMBER * 1e6
+            t_load = timeit.timeit(lambda: load(data), number=NUMBER) / NUMBER * 1e6
+            print(f"  {title:<24} {len(data):>6} {t_dump:>10.2f} {t_load:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: import time of the package modules and CLI startup time.
+
+Import time is measured with `python -X importtime` in fresh interpreters (median of runs);
+startup is the wall time of `python -m messenger_utils version`.
+
+Usage:
+```
+python benchmarks/bench_import.py
+```
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 7
+MODULES = [
+    "messenger_utils",
+    "messenger_utils.cli",
+    "messenger_utils.max",
+    "messenger_utils.max.max_sender",
+    "messenger_utils.max.max_receiver",
+    "messenger_utils.max.max_keyboard",
+]
+HEAVY = ["asyncio", "httpx", "loguru", "pydantic", "rich"]
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    """Cumulative import time (ms) of the module and names of all modules imported with it."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, env=os.environ
+    )
+    imported: set[str] = set()
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        if name.strip() == module:
+            total = int(cumulative) / 1000
+    return total, imported
+
+
+def main():
+    print(f"{'module':<36} {'import, ms':>10}  heavy dependencies")
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(RUNS)]
+        median = statistics.median(t for t, _ in runs)
+        heavy = sorted(m for m in HEAVY if m in runs[0][1])
+        print(f"{module:<36} {median:10.1f}  {', '.join(heavy) or '-'}")
+    startups = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "messenger_utils", "version"], capture_output=True, check=True)
+        startups.append((time.perf_counter() - started) * 1000)
+    baseline = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        baseline.append((time.perf_counter() - started) * 1000)
+    print(f"\n`messenger_utils version` startup: {statistics.median(startups):.1f} ms"
+          f"  (bare interpreter: {statistics.median(baseline):.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: serialization of large keyboards.
+
+Compares compiled per-class serializers with the former `dataclasses.asdict` + `.replace` implementation.
+
+Usage:
+```
+python benchmarks/bench_keyboard.py
+```
+"""
+
+import json
+import timeit
+from dataclasses import asdict
+from messenger_utils.max.max_keyboard import *
+from messenger_utils.max.max_keyboard import json_enum_encoder
+
+NUMBER = 2_000
+
+
+def asdict_to_json(keyboard: MaxKeyboard) -> str:
+    """Former implementation of `MaxKeyboard.to_json`."""
+    rows = [[{k: v for k, v in asdict(b).items() if v is not None} for b in row] for row in keyboard.buttons]
+    return json.dumps({"buttons": rows}, default=json_enum_encoder).replace("btn_type", "type")
+
+
+def main():
+    keyboards = {
+        "30 x 7 callback": MaxKeyboard([
+            [CallbackButton(text=f"Item {r}-{c}", payload=f"item:{r}:{c}") for c in range(7)] for r in range(30)
+        ]),
+        "30 x 3 mixed": MaxKeyboard([
+            [
+                CallbackButton(text=f"Item {r}", payload=f"item:{r}", intent=BtnIntents.POSITIVE),
+                LinkButton(text="Open", url=f"https://example.com/items/{r}"),
+                OpenAppButton(text="App", web_app="mybot", payload=str(r))
+            ] for r in range(30)
+        ])
+    }
+    for name, keyboard in keyboards.items():
+        assert json.loads(keyboard.to_json()) == json.loads(asdict_to_json(keyboard))
+        base = timeit.timeit(lambda: asdict_to_json(keyboard), number=NUMBER) / NUMBER * 1e6
+        to_json = timeit.timeit(keyboard.to_json, number=NUMBER) / NUMBER * 1e6
+        to_dict = timeit.timeit(keyboard.to_dict, number=NUMBER) / NUMBER * 1e6
+        print(f"\n{name}")
+        print(f"  {'asdict + replace':<20} {base:9.1f} us")
+        print(f"  {'to_json':<20} {to_json:9.1f} us  (x{base / to_json:.1f})")
+        print(f"  {'to_dict':<20} {to_dict:9.1f} us")
+    # Personalized keyboard: rebuild per user vs template rendering
+    def build_menu(user_id: int) -> dict:
+        return MaxKeyboard([
+            [CallbackButton(text=f"Item {r}", payload=f"item:{r}:{user_id}") for r in range(row * 5, row * 5 + 5)]
+            for row in range(6)
+        ] + [[LinkButton(text="Profile", url=f"https://example.com/u/{user_id}")]]).to_dict()
+    template = MaxKeyboardTemplate(MaxKeyboard([
+        [CallbackButton(text=f"Item {r}", payload=f"item:{r}:{{user_id}}") for r in range(row * 5, row * 5 + 5)]
+        for row in range(6)
+    ] + [[LinkButton(text="Profile", url="https://example.com/u/{user_id}")]]))
+    assert template.render(user_id=7) == build_menu(7)
+    rebuild = timeit.timeit(lambda: build_menu(7), number=NUMBER) / NUMBER * 1e6
+    render = timeit.timeit(lambda: template.render(user_id=7), number=NUMBER) / NUMBER * 1e6
+    print("\npersonalized 31 buttons menu")
+    print(f"  {'rebuild MaxKeyboard':<20} {rebuild:9.1f} us")
+    print(f"  {'template.render':<20} {render:9.1f} us  (x{rebuild / render:.1f})")
+    build = timeit.timeit(
+        lambda: MaxKeyboard([[CallbackButton(text="x", payload="y") for _ in range(7)] for _ in range(30)]),
+        number=NUMBER
+    ) / NUMBER * 1e6
+    print(f"\nbuild 30 x 7 keyboard with limits check: {build:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Sample MAX webhook bodies for benchmarks.
+"""
+
+BOT_STARTED = {
+    "timestamp": 1767730065426,
+    "chat_id": 94154102,
+    "user": {
+        "user_id": 59483360,
+        "first_name": "Maxim",
+        "last_name": "",
+        "is_bot": False,
+        "last_activity_time": 1767730058000,
+        "name": "Maxim"
+    },
+    "user_locale": "ru",
+    "user_id": 59483360,
+    "update_type": "bot_started"
+}
+
+MESSAGE_CREATED = {
+    "timestamp": 1764671262844,
+    "message": {
+        "recipient": {"chat_id": 100052860, "chat_type": "dialog", "user_id": 108858268},
+        "timestamp": 1764671262844,
+        "body": {
+            "mid": "mid.0000000005f6af7c019ade9a907c08ef",
+            "seq": 115649495881746671,
+            "text": "Hello",
+            "attachments": [
+                {
+                    "payload": {
+                        "photo_id": 872509408,
+                        "token": "t3c925YlGVyqXqa2NOpP39V+Fl14BbVLyd0/JEhhGA9UYI1EmHNSHZqJM1vhFaCyUIU69jc/Beg+jzXQeS+8R99gWJxrJw0l",
+                        "url": "https://i.oneme.ru/i?r=BTGBPUwtwgYUeoFhO7rESmr8hY9gd4KKV5mzHmI277kTyNMW-5WsPYR_ZaEeuveXSk0"
+                    },
+                    "type": "image"
+                }
+            ]
+        },
+        "sender": {
+            "user_id": 59483360,
+            "first_name": "Maxim",
+            "last_name": "",
+            "is_bot": False,
+            "last_activity_time": 1764670619000,
+            "name": "Maxim"
+        }
+    },
+    "user_locale": "ru",
+    "update_type": "message_created"
+}
+
+MESSAGE_CALLBACK = {
+    "callback": {
+        "timestamp": 1766329065990,
+        "callback_id": "f9LHodD0cOI1Hv4QDc3fswtZ6PHyoXrc7sFjb5CjoZXmFZBsbKpH2_qhvdFnl1PfEoqifDNY9WJdhurgh7FYDYLN_Fpmd-DgCZeVtUG9j00Kx7H-LTkK",
+        "user": {
+            "user_id": 59483360,
+            "first_name": "Maxim",
+            "last_name": "",
+            "is_bot": False,
+            "last_activity_time": 1766329065000,
+            "name": "Maxim"
+        },
+        "payload": "BTN1"
+    },
+    "message": {
+        "recipient": {"chat_id": 100052860, "chat_type": "dialog", "user_id": 59483360},
+        "timestamp": 1766328664810,
+        "body": {
+            "mid": "mid.0000000005f6af7c019b416482ea64ea",
+            "seq": 115758115377013994,
+            "text": "Bot commands:\n/help  : help\n/info  : about\n/panel : commands panel"
+        },
+        "sender": {
+            "user_id": 108858268,
+            "first_name": "Bot",
+            "username": "id150304203430_bot",
+            "is_bot": True,
+            "last_activity_time": 1766329066691,
+            "name": "Bot"
+        }
+    },
+    "timestamp": 1766329065990,
+    "user_locale": "ru",
+    "update_type": "message_callback"
+}
+
+ALL = {
+    "bot_started": BOT_STARTED,
+    "message_created": MESSAGE_CREATED,
+    "message_callback": MESSAGE_CALLBACK
+}
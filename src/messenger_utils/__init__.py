@@ -1,6 +1,13 @@
 """
 Init messenger_utils package.
 """
-from loguru import logger
 
 __version__ = "2.3.1"
+
+
+def __getattr__(name: str):
+    # `logger` is imported on first use: `loguru` slows down the start of CLI
+    if name == "logger":
+        from loguru import logger
+        return logger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
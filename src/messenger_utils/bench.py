@@ -0,0 +1,203 @@
+"""
+Load testing of `MaxSender` against in-process fake MAX API (to size concurrency and rate limits of bots).
+
+The fake API answers messages sending with configurable latency, errors and rate limiting (429 with `Retry-After`),
+and counts TCP connections to measure reuse of the sender's connection pool.
+"""
+
+__all__ = ["FakeMaxApi", "BenchStats", "run_bench"]
+
+
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+import httpx
+from messenger_utils.http_server import HttpRequest, HttpResponse, HttpServer, json_response
+from messenger_utils.rate_limit import RateLimiter
+from messenger_utils.stats import LatencyStats
+from messenger_utils.max.max_sender import MaxSender
+
+
+
+### Class FakeMaxApi ###
+
+class FakeMaxApi:
+    """
+    Local HTTP server imitating MAX bot API.
+
+    Usage:
+    ```
+    async with FakeMaxApi(latency=0.05, rate_limit_rate=0.01) as api:
+        sender = MaxSender("token")
+        sender.api_url = api.url
+    ```
+    """
+
+    def __init__(
+        self, *,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: int|None = None
+    ):
+        """
+        Init fake API.
+
+        :param latency: response latency in seconds
+        :param error_rate: share of requests answered with 500 status (0..1)
+        :param rate_limit_rate: share of requests answered with 429 status (0..1)
+        :param retry_after: `Retry-After` of 429 responses in seconds
+        :param seed: random seed of errors (for reproducible runs)
+        """
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.rate_limit_rate: float = rate_limit_rate
+        self.retry_after: float = retry_after
+        self.statuses: Counter[int] = Counter()
+        self._random = random.Random(seed)
+        self._server = HttpServer(self._handle)
+        self._message_id: int = 0
+
+
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API (use as `api_url` of the sender)."""
+        return self._server.url
+
+
+    @property
+    def connections(self) -> int:
+        """Count of accepted TCP connections."""
+        return self._server.connections
+
+
+    @property
+    def requests(self) -> int:
+        """Count of received requests."""
+        return self._server.requests
+
+
+
+    async def __aenter__(self):
+        await self._server.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self._server.close(timeout=1.0)
+
+
+
+    async def _handle(self, request: HttpRequest) -> HttpResponse:
+        """Answer API request."""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        dice = self._random.random()
+        if dice < self.rate_limit_rate:
+            response = json_response(
+                {"code": "too.many.requests", "message": "Too many requests"}, 429,
+                headers={"Retry-After": f"{self.retry_after:g}"}
+            )
+        elif dice < self.rate_limit_rate + self.error_rate:
+            response = json_response({"code": "internal.error", "message": "Internal error"}, 500)
+        elif request.method == "POST" and request.path == "/messages":
+            self._message_id += 1
+            response = json_response({"message": {
+                "recipient": {"chat_id": int(request.params.get("chat_id", 0))},
+                "body": {"mid": f"mid.{self._message_id}", **request.json()}
+            }})
+        else:
+            response = json_response({"success": True})
+        self.statuses[response.status] += 1
+        return response
+
+### End of class FakeMaxApi ###
+
+
+
+@dataclass
+class BenchStats:
+    """
+    Results of the load test.
+    """
+    requests: int = 0           # sent messages (by the sender, without retries)
+    ok: int = 0
+    failed: int = 0
+    retries: int = 0
+    connections: int = 0        # TCP connections opened to the API
+    duration: float = 0.0       # seconds
+    latency: LatencyStats = field(default_factory=LatencyStats)    # of messages sending, with retries
+    statuses: Counter = field(default_factory=Counter)             # API responses statuses
+
+
+    @property
+    def throughput(self) -> float:
+        """Achieved rate of sent messages per second."""
+        return self.ok / self.duration if self.duration > 0 else 0.0
+
+
+    @property
+    def connection_reuse(self) -> float:
+        """Share of API requests sent over already opened connections (0..1)."""
+        total = sum(self.statuses.values())
+        return 1 - self.connections / total if total else 0.0
+
+
+
+async def run_bench(
+    *,
+    requests: int = 1000,
+    concurrency: int = 10,
+    rate: float|None = None,
+    max_retries: int = 3,
+    retry_backoff: float = 0.5,
+    api: FakeMaxApi|None = None
+) -> BenchStats:
+    """
+    Send messages with `MaxSender` to the fake API and collect stats.
+
+    :param requests: count of messages to send
+    :param concurrency: max simultaneous requests (and pooled connections)
+    :param rate: target messages per second (not limited if `None`)
+    :param max_retries: retries of 429 & 5xx responses
+    :param retry_backoff: delay before the first retry of 5xx responses
+    :param api: fake API settings (no latency & errors if not provided)
+    :return: load test stats
+    """
+    api = api if api is not None else FakeMaxApi()
+    stats = BenchStats()
+    limiter = RateLimiter(rate) if rate else None
+    counter = iter(range(requests))
+
+    async with api:
+        sender = MaxSender("bench-token", max_retries=max_retries, retry_backoff=retry_backoff)
+        sender.api_url = api.url
+
+        async def work():
+            for n in counter:
+                if limiter is not None:
+                    await limiter.acquire()
+                t_start = time.perf_counter()
+                stats.requests += 1
+                try:
+                    await sender.send_message(f"Message {n}", target=n)
+                    stats.ok += 1
+                except httpx.HTTPError:
+                    stats.failed += 1
+                stats.latency.add(time.perf_counter() - t_start)
+
+        started = time.perf_counter()
+        sender.open(max_connections=concurrency)
+        try:
+            await asyncio.gather(*(work() for _ in range(concurrency)))
+        finally:
+            await sender.aclose()
+        stats.duration = time.perf_counter() - started
+        stats.retries = sender.retries
+        stats.connections = api.connections
+        stats.statuses = api.statuses
+    return stats
@@ -0,0 +1,219 @@
+"""
+Broadcast of one message to users of several messengers.
+
+The message is messenger-neutral: it's rendered once per messenger to the arguments of its sender's `send_message`.
+Every messenger has own concurrency and rate limits; all of them are sent in parallel,
+results are yielded by one stream.
+"""
+
+__all__ = [
+    "BroadcastButton", "BroadcastMessage", "BroadcastChannel", "BroadcastResult", "RENDERERS", "read_targets", "broadcast"
+]
+
+
+import asyncio
+import csv
+import io
+import json
+import sys
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+import httpx
+from messenger_utils.rate_limit import RateLimiter
+from messenger_utils.sender import Sender
+
+
+# Max length of Telegram `callback_data` (bytes)
+TELEGRAM_CALLBACK_DATA_LENGTH = 64
+
+
+@dataclass(slots=True)
+class BroadcastButton:
+    """
+    Inline keyboard button: callback button (with `payload`) or link button (with `url`).
+    """
+    text: str
+    payload: str|None = None
+    url: str|None = None
+
+
+
+@dataclass(slots=True)
+class BroadcastMessage:
+    """
+    Messenger-neutral message.
+    """
+    text: str
+    image_url: str|None = None
+    keyboard: list[list[BroadcastButton]] = field(default_factory=list)     # rows of buttons
+
+
+
+@dataclass(slots=True)
+class BroadcastChannel:
+    """
+    Sender of the messenger with its limits.
+    """
+    sender: Sender
+    concurrency: int = 10
+    rate: float|None = None         # messages per second (not limited if `None`)
+
+
+
+@dataclass(slots=True)
+class BroadcastResult:
+    """
+    Result of sending the message to the target.
+    """
+    index: int                  # Number of the target in the stream (from 0)
+    messenger: str
+    target: int|str
+    ok: bool
+    error: str|None = None
+
+    def to_json(self) -> str:
+        """Result as JSON line."""
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+
+def _render_max(message: BroadcastMessage) -> dict[str, Any]:
+    from messenger_utils.max.max_keyboard import CallbackButton, LinkButton, MaxKeyboard
+    kwargs: dict[str, Any] = {"text": message.text, "image_url": message.image_url}
+    if message.keyboard:
+        kwargs["keyboard"] = MaxKeyboard([
+            [LinkButton(b.text, b.url) if b.url else CallbackButton(b.text, b.payload or "") for b in row]
+            for row in message.keyboard
+        ]).to_dict()
+    return kwargs
+
+
+def _render_telegram(message: BroadcastMessage) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"text": message.text, "image_url": message.image_url}
+    if message.keyboard:
+        for button in (b for row in message.keyboard for b in row):
+            if not button.url and len((button.payload or "").encode()) > TELEGRAM_CALLBACK_DATA_LENGTH:
+                raise ValueError(f"Button `{button.text}`: payload is longer than {TELEGRAM_CALLBACK_DATA_LENGTH} bytes")
+        kwargs["keyboard"] = {"inline_keyboard": [
+            [{"text": b.text, "url": b.url} if b.url else {"text": b.text, "callback_data": b.payload or ""} for b in row]
+            for row in message.keyboard
+        ]}
+    return kwargs
+
+
+# Messenger => function rendering the message to `send_message` kwargs (add yours to support other messengers)
+RENDERERS: dict[str, Callable[[BroadcastMessage], dict[str, Any]]] = {
+    "max": _render_max,
+    "telegram": _render_telegram,
+}
+
+
+
+def read_targets(
+    path: str|Path, *,
+    file_format: Literal["auto", "csv", "ndjson"] = "auto"
+) -> Iterator[tuple[str, int|str]]:
+    """
+    Stream targets from CSV (with header) or NDJSON file with `messenger` and `chat_id` fields.
+
+    :param path: file path or `-` for stdin
+    :param file_format: `csv`, `ndjson` or `auto` (by file extension, NDJSON for stdin)
+    :return: `(messenger, chat_id)` pairs (`chat_id` is int or `@channel` username)
+    :raises ValueError: if the row has no `messenger` or `chat_id`
+    """
+    if file_format == "auto":
+        file_format = "csv" if str(path).lower().endswith(".csv") else "ndjson"
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if str(path) == "-" else open(path, encoding="utf-8", newline="")
+    with stream:
+        records: Iterable[dict] = (
+            csv.DictReader(stream) if file_format == "csv"
+            else (json.loads(line) for line in stream if line.strip())
+        )
+        for n, record in enumerate(records, start=1):
+            messenger, chat_id = record.get("messenger"), record.get("chat_id")
+            if not messenger or chat_id in (None, ""):
+                raise ValueError(f"Row {n}: `messenger` and `chat_id` are required")
+            chat_id = str(chat_id)
+            yield messenger, chat_id if chat_id.startswith("@") else int(chat_id)
+
+
+
+async def broadcast(
+    message: BroadcastMessage,
+    targets: Iterable[tuple[str, int|str]],
+    channels: dict[str, BroadcastChannel], *,
+    buffer: int = 10_000
+) -> AsyncIterator[BroadcastResult]:
+    """
+    Send the message to the targets of all messengers in parallel.
+
+    :param message: message to send
+    :param targets: `(messenger, chat_id)` pairs (streamed, not loaded whole)
+    :param channels: messenger => its sender and limits (senders should be opened to reuse connections)
+    :param buffer: max targets waiting per messenger (a slow messenger holds the stream when its buffer is full)
+    :return: async iterator of results (in order of completion); targets of messengers without channel fail
+    :raises ValueError: if the message cannot be rendered for a messenger
+    """
+    rendered: dict[str, dict[str, Any]] = {}
+    for messenger in channels:
+        if messenger not in RENDERERS:
+            raise ValueError(f"No renderer for messenger `{messenger}`")
+        rendered[messenger] = RENDERERS[messenger](message)
+    queues: dict[str, asyncio.Queue[tuple[int, int|str]|None]] = {m: asyncio.Queue(maxsize=buffer) for m in channels}
+    results: asyncio.Queue[BroadcastResult|None] = asyncio.Queue()
+
+    async def produce():
+        it = enumerate(targets)
+        try:
+            # Targets are read in worker thread: slow source (e.g. stdin pipe) doesn't block sending
+            while (item := await asyncio.to_thread(next, it, None)) is not None:
+                index, (messenger, target) = item
+                if (queue := queues.get(messenger)) is None:
+                    await results.put(BroadcastResult(index, messenger, target, False, f"No sender for messenger `{messenger}`"))
+                    continue
+                await queue.put((index, target))
+        finally:
+            for messenger, channel in channels.items():
+                for _ in range(channel.concurrency):
+                    await queues[messenger].put(None)
+
+    async def work(messenger: str, channel: BroadcastChannel, limiter: RateLimiter|None):
+        queue, kwargs = queues[messenger], rendered[messenger]
+        try:
+            while (item := await queue.get()) is not None:
+                index, target = item
+                if limiter is not None:
+                    await limiter.acquire()
+                try:
+                    await channel.sender.send_message(target=target, **kwargs)
+                    result = BroadcastResult(index, messenger, target, True)
+                except httpx.HTTPStatusError as exc:
+                    result = BroadcastResult(index, messenger, target, False, f"HTTP {exc.response.status_code}: {exc.response.text[:200]}")
+                except Exception as exc:        # pylint: disable=broad-exception-caught
+                    # Any failure of the target (network, non-JSON response, ...) is reported, the worker goes on
+                    result = BroadcastResult(index, messenger, target, False, f"{type(exc).__name__}: {exc}")
+                await results.put(result)
+        finally:
+            # The consumer waits for the end marker of every worker
+            results.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    workers: list[asyncio.Task] = []
+    for messenger, channel in channels.items():
+        limiter = RateLimiter(channel.rate) if channel.rate else None
+        workers += [asyncio.create_task(work(messenger, channel, limiter)) for _ in range(channel.concurrency)]
+    try:
+        finished = 0
+        while finished < len(workers):
+            result = await results.get()
+            if result is None:
+                finished += 1
+                continue
+            yield result
+        await producer
+    finally:
+        producer.cancel()
+        for worker in workers:
+            worker.cancel()
@@ -0,0 +1,167 @@
+"""
+Bulk sending of messages from CSV / NDJSON streams.
+
+Row fields:
+- `chat_id` (required)
+- `text` (optional if default text is provided)
+- `image_url` (optional)
+"""
+
+__all__ = ["BulkRow", "BulkResult", "read_rows", "read_done_rows", "send_bulk"]
+
+
+import asyncio
+import csv
+import io
+import json
+import sys
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal
+import httpx
+from messenger_utils.rate_limit import RateLimiter
+from messenger_utils.sender import Sender
+
+
+@dataclass(slots=True)
+class BulkRow:
+    """
+    Message to send.
+    """
+    row: int                # Row number in the source (from 1)
+    chat_id: int
+    text: str
+    image_url: str|None = None
+
+
+@dataclass(slots=True)
+class BulkResult:
+    """
+    Result of sending the row.
+    """
+    row: int
+    chat_id: int
+    ok: bool
+    error: str|None = None
+
+    def to_json(self) -> str:
+        """Result as JSON line."""
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+
+def read_rows(
+    path: str|Path,
+    *,
+    file_format: Literal["auto", "csv", "ndjson"] = "auto",
+    default_text: str|None = None
+) -> Iterator[BulkRow]:
+    """
+    Stream rows from CSV (with header) or NDJSON file.
+
+    :param path: file path or `-` for stdin
+    :param file_format: `csv`, `ndjson` or `auto` (by file extension, NDJSON for stdin)
+    :param default_text: text for rows without `text` field
+    :raises ValueError: if the row has no `chat_id` or text
+    """
+    if file_format == "auto":
+        file_format = "csv" if str(path).lower().endswith(".csv") else "ndjson"
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if str(path) == "-" else open(path, encoding="utf-8", newline="")
+    with stream:
+        records: Iterable[dict] = (
+            csv.DictReader(stream) if file_format == "csv"
+            else (json.loads(line) for line in stream if line.strip())
+        )
+        for n, record in enumerate(records, start=1):
+            text = record.get("text") or default_text
+            if record.get("chat_id") in (None, "") or text is None:
+                raise ValueError(f"Row {n}: `chat_id` and `text` are required")
+            yield BulkRow(n, int(record["chat_id"]), text, record.get("image_url") or None)
+
+
+
+def read_done_rows(path: str|Path) -> set[int]:
+    """
+    Read numbers of successfully sent rows from results file (to resume sending).
+
+    :param path: results NDJSON file
+    """
+    done: set[int] = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip() and (result := json.loads(line)).get("ok"):
+                    done.add(result["row"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+
+async def send_bulk(
+    sender: Sender,
+    rows: Iterable[BulkRow], *,
+    concurrency: int = 10,
+    rate: float|None = None,
+    attachments: list[dict]|None = None
+) -> AsyncIterator[BulkResult]:
+    """
+    Send messages concurrently over the sender's connection pool.
+
+    :param sender: sender (should be opened as `async with sender` to reuse connections)
+    :param rows: messages to send (streamed, not loaded whole)
+    :param concurrency: max simultaneous requests
+    :param rate: max messages per second (not limited if `None`)
+    :param attachments: uploaded attachments of every message (see `MaxSender.upload`)
+    :return: async iterator of results (in order of completion)
+    :raises ValueError: if the rows source has invalid row (after sending the rows before it)
+    """
+    limiter = RateLimiter(rate) if rate else None
+    extra = {"attachments": attachments} if attachments else {}
+    queue: asyncio.Queue[BulkRow|None] = asyncio.Queue(maxsize=concurrency * 2)
+    results: asyncio.Queue[BulkResult|None] = asyncio.Queue()
+
+    async def produce():
+        it = iter(rows)
+        try:
+            # Rows are read in worker thread: slow source (e.g. stdin pipe) doesn't block sending
+            while (row := await asyncio.to_thread(next, it, None)) is not None:
+                await queue.put(row)
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def work():
+        try:
+            while (row := await queue.get()) is not None:
+                if limiter is not None:
+                    await limiter.acquire()
+                try:
+                    await sender.send_message(row.text, target=row.chat_id, image_url=row.image_url, **extra)
+                    result = BulkResult(row.row, row.chat_id, True)
+                except httpx.HTTPStatusError as exc:
+                    result = BulkResult(row.row, row.chat_id, False, f"HTTP {exc.response.status_code}: {exc.response.text[:200]}")
+                except Exception as exc:        # pylint: disable=broad-exception-caught
+                    # Any failure of the row (network, non-JSON response, ...) is reported, the worker goes on
+                    result = BulkResult(row.row, row.chat_id, False, f"{type(exc).__name__}: {exc}")
+                await results.put(result)
+        finally:
+            # The consumer waits for the end marker of every worker
+            results.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await results.get()
+            if result is None:
+                finished += 1
+                continue
+            yield result
+        await producer
+    finally:
+        producer.cancel()
+        for worker in workers:
+            worker.cancel()
@@ -11,14 +11,17 @@ Via UV:
 ``` uv run -m uessenger_utils -h```
 """
 
-from typing import Literal
-import asyncio
+from functools import cache
+from collections.abc import Callable, Coroutine
+from typing import TYPE_CHECKING, Any, Literal
 import typer
-from httpx import NetworkError
-from rich.console import Console
-from rich.table import Table
 from messenger_utils import __version__
-from messenger_utils.max import MaxSender
+
+# Heavy dependencies (asyncio, httpx, pydantic, loguru, rich) are imported by the commands using them:
+# startup time matters for short commands run from scripts
+if TYPE_CHECKING:
+    from rich.console import Console
+    from messenger_utils.profiles import BotProfile
 
 
 
@@ -30,40 +33,153 @@ app = typer.Typer(
     context_settings={"help_option_names": ["-h", "--help"]},
     rich_markup_mode="rich"
 )
-console = Console(highlight=False)
 ENV_PREFIX = "MESSENGER_UTILS_"
 
+
+@cache
+def console() -> "Console":
+    """Output console (created on first use)."""
+    from rich.console import Console
+    return Console(highlight=False)
+
+
+def run[T](coro: Coroutine[Any, Any, T]) -> T:
+    """Run coroutine in new event loop."""
+    import asyncio
+    return asyncio.run(coro)
+
+
+###  Bot profiles  ###
+
+
+def _select_profiles(
+    names: str|None,
+    all_profiles: bool,
+    messenger: Literal["max", "telegram"] = "max"
+) -> "dict[str, BotProfile]|None":
+    """Profiles selected by `--profile` / `--all` options (`None` if the options are not used)."""
+    if names is None and not all_profiles:
+        return None
+    if messenger != "max":
+        # Profiles are MAX bots
+        console().print(f"[!] `--profile` / `--all` are supported for MAX only, not `--messenger {messenger}`!", style="red")
+        raise typer.Exit(1)
+    from messenger_utils.profiles import load_profiles, select_profiles
+    try:
+        return select_profiles(load_profiles(), None if all_profiles else names)
+    except ValueError as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+
+
+def _require_token(bot_token: str|None) -> str:
+    """Check that bot token is provided (if profiles are not used)."""
+    if bot_token is None:
+        console().print("[!] MAX bot token is required (`--bot-token` option), or use `--profile` / `--all`!", style="red")
+        raise typer.Exit(1)
+    return bot_token
+
+
+def _sender(ctx: typer.Context, messenger: Literal["max", "telegram"], bot_token: str|None) -> Any:
+    """
+    Sender of the messenger. Telegram bot token is taken from `--bot-token` option
+    or `MESSENGER_UTILS_TG_BOT_TOKEN` env var (not from MAX one).
+    """
+    if messenger == "max":
+        from messenger_utils.max import MaxSender
+        return MaxSender(bot_token=_require_token(bot_token))
+    import os
+    source = ctx.get_parameter_source("bot_token")
+    if source is None or source.name != "COMMANDLINE":
+        bot_token = os.environ.get(f"{ENV_PREFIX}TG_BOT_TOKEN")
+    if not bot_token:
+        console().print(f"[!] Telegram bot token is required (`--bot-token` option or `{ENV_PREFIX}TG_BOT_TOKEN` env var)!", style="red")
+        raise typer.Exit(1)
+    from messenger_utils.telegram import TelegramSender
+    return TelegramSender(bot_token)
+
+
+def _chat_id(target: str|None, messenger: Literal["max", "telegram"]) -> int|str|None:
+    """Chat ID of `--chat` option (Telegram channels may be targeted by `@username`)."""
+    if target is None or (messenger == "telegram" and target.startswith("@")):
+        return target
+    try:
+        return int(target)
+    except ValueError:
+        console().print(f"[!] Chat ID must be integer, got `{target}`!", style="red")
+        raise typer.Exit(1)
+
+
+def _print_fan_out(title: str, columns: list[str], results: dict[str, Any], rows: Callable[[Any], list[list[str]]]):
+    """Print combined table of results of several bots (failed ones in red)."""
+    from rich.table import Table
+    table = Table(title=title)
+    table.add_column("Profile", style="cyan", no_wrap=True)
+    for column in columns:
+        table.add_column(column, style="cyan")
+    failed = 0
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            table.add_row(name, f"{type(result).__name__}: {result}", *[""] * (len(columns) - 1), style="red")
+            continue
+        for cells in rows(result) or [["-", *[""] * (len(columns) - 1)]]:
+            table.add_row(name, *cells)
+    console().print(table)
+    if failed:
+        raise typer.Exit(1)
+
+
+
 ###  CLI commands  ###
 
 
 @app.command()
 def version():
     """Print package version."""
-    console.print(__version__, style="cyan")
+    console().print(__version__, style="cyan")
 
 
 
 @app.command(name="bot-info")
 def bot_info(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
-    messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type")
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type"),
+    profile: str|None = typer.Option(None, "--profile", "-P", help="Comma-separated bot profiles to run the command for"),
+    all_profiles: bool = typer.Option(False, "--all", help="Run the command for all bot profiles")
 ):
     """Get information about the MAX or Telegram Bot."""
-    if messenger == "max":
-        sender = MaxSender(bot_token=bot_token)
-        bot_info =  asyncio.run(sender.get_bot_info())
-        console.print(bot_info, style="cyan")
-    else:
-        # TODO: bot information for Telegram bot
-        pass
-
+    if (profiles := _select_profiles(profile, all_profiles, messenger)) is not None:
+        from messenger_utils.profiles import fan_out
+        results = run(fan_out(profiles, lambda sender, _: sender.get_bot_info()))
+        _print_fan_out(
+            "Bots", ["Name", "Username", "User ID", "Commands"], results,
+            lambda info: [[info.get("name", ""), info.get("username", ""), str(info.get("user_id", "")), str(len(info.get("commands") or []))]]
+        )
+        return
+    sender = _sender(ctx, messenger, bot_token)
+    bot_info =  run(sender.get_bot_info())
+    console().print(bot_info, style="cyan")
+
+
+
+webhooks_app = typer.Typer(
+    help="Get or set webhooks processing servers, probe webhook endpoint.",
+    context_settings={"help_option_names": ["-h", "--help"]},
+    rich_markup_mode="rich"
+)
+app.add_typer(webhooks_app, name="webhooks")
 
 
-@app.command(name="webhooks")
+@webhooks_app.callback(invoke_without_command=True)
 def webhooks(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
     set_url: str|None = typer.Option(None, "--set", help="Webhook URL to set"),
     remove_url: str|None = typer.Option(None, "--remove", help="Webhook URL to remove"),
+    profile: str|None = typer.Option(None, "--profile", "-P", help="Comma-separated bot profiles to run the command for"),
+    all_profiles: bool = typer.Option(False, "--all", help="Run the command for all bot profiles")
 ):
     """
     Get or set webhooks processing servers.
@@ -72,120 +188,614 @@ def webhooks(
     :param remove_url: Existing webhook URL to unset.
     (if set_url and remove_url are not presented - info of current webhooks will be printed)
     """
+    if ctx.invoked_subcommand is not None:
+        return
+    if (profiles := _select_profiles(profile, all_profiles)) is not None:
+        from messenger_utils.profiles import fan_out
+
+        async def operation(sender, _) -> list[list[str]]:
+            rows = []
+            if set_url is not None:
+                rows.append(["set", set_url, str((await sender.start_webhooks(url=set_url)).get("success", ""))])
+            if remove_url is not None:
+                rows.append(["remove", remove_url, str((await sender.remove_webhook(url=remove_url)).get("success", ""))])
+            if not rows:
+                rows = [["", hook["url"], ""] for hook in (await sender.get_webhooks()).get("subscriptions", [])]
+            return rows
+
+        _print_fan_out("Webhooks", ["Action", "URL", "Success"], run(fan_out(profiles, operation)), lambda rows: rows)
+        return
+    bot_token = _require_token(bot_token)
+    from messenger_utils.max import MaxSender
     sender = MaxSender(bot_token=bot_token)
     if set_url is None and remove_url is None:
-        hooks =  asyncio.run(sender.get_webhooks())
+        hooks =  run(sender.get_webhooks())
         for hook in hooks.get("subscriptions", []):
-            console.print(f"[>] {hook['url']}", style="cyan")
+            console().print(f"[>] {hook['url']}", style="cyan")
     else:
         if set_url is not None:
-            response =  asyncio.run(sender.start_webhooks(url=set_url))
-            console.print("Set webhook:")
-            console.print(response, style="cyan")
+            response =  run(sender.start_webhooks(url=set_url))
+            console().print("Set webhook:")
+            console().print(response, style="cyan")
         if remove_url is not None:
-            response =  asyncio.run(sender.remove_webhook(url=remove_url))
-            console.print("Remove webhook:")
-            console.print(response, style="cyan")
-
+            response =  run(sender.remove_webhook(url=remove_url))
+            console().print("Remove webhook:")
+            console().print(response, style="cyan")
+
+
+
+@webhooks_app.command(name="probe")
+def webhooks_probe(
+    url: str = typer.Argument(..., help="Webhook endpoint URL of the bot (e.g. `http://127.0.0.1:8080/`)"),
+    concurrency: int|None = typer.Option(None, "--concurrency", "-c", help="Fixed concurrency (ramped up 1, 2, 4... by default)"),
+    max_concurrency: int = typer.Option(256, "--max-concurrency", help="Ramp up limit"),
+    requests: int = typer.Option(500, "--requests", "-n", help="Requests per concurrency step"),
+    max_error_rate: float = typer.Option(0.01, "--max-error-rate", help="Max share of failed requests (0..1)"),
+    max_p99: float = typer.Option(1000.0, "--max-p99", help="Max p99 latency (ms)"),
+    secret: str|None = typer.Option(None, "--secret", envvar=f"{ENV_PREFIX}MAX_WEBHOOK_SECRET", show_envvar=True, help="Secret of webhooks subscription"),
+    seed: int|None = typer.Option(None, "--seed", help="Random seed of synthetic webhooks")
+):
+    """Probe webhook endpoint with synthetic webhooks of all event types and find the highest sustainable rate."""
+    from rich.table import Table
+    from messenger_utils.max.max_synthetic import SyntheticWebhooks
+    from messenger_utils.probe import probe_endpoint
+    result = run(probe_endpoint(
+        url, concurrency=concurrency, max_concurrency=max_concurrency, requests=requests,
+        max_error_rate=max_error_rate, max_p99=max_p99 / 1000, secret=secret, webhooks=SyntheticWebhooks(seed=seed)
+    ))
+    # Report
+    table = Table(title=f"Probe of {url}")
+    for column in ("Concurrency", "Requests / s", "Errors", "p50, ms", "p90, ms", "p99, ms", "Statuses"):
+        table.add_column(column, style="cyan", justify="right")
+    for step in result.steps:
+        latency = step.latency.summary((50, 90, 99))
+        table.add_row(
+            str(step.concurrency), f"{step.rate:.1f}", f"{step.error_rate:.1%}",
+            *(f"{v:.1f}" for v in latency.values()),
+            " ".join(f"{status or 'ERR'}:{count}" for status, count in sorted(step.statuses.items())),
+            style=None if step.passed else "red"
+        )
+    console().print(table)
+    if result.best is None:
+        console().print("[!] Endpoint failed the probe at the lowest concurrency!", style="red")
+        raise typer.Exit(1)
+    console().print(f"Highest sustainable rate: {result.sustainable_rate:.1f} webhooks / s (concurrency {result.best.concurrency})", style="cyan")
+
+
+
+bot_commands_app = typer.Typer(
+    help="Get list of bot commands, sync commands with a file.",
+    context_settings={"help_option_names": ["-h", "--help"]},
+    rich_markup_mode="rich"
+)
+app.add_typer(bot_commands_app, name="bot-commands")
 
 
-@app.command(name="bot-commands")
+@bot_commands_app.callback(invoke_without_command=True)
 def bot_commands(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
-    messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type")
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type"),
+    profile: str|None = typer.Option(None, "--profile", "-P", help="Comma-separated bot profiles to run the command for"),
+    all_profiles: bool = typer.Option(False, "--all", help="Run the command for all bot profiles")
 ):
     """Get list of bot commands."""
-    if messenger == "max":
-        sender = MaxSender(bot_token=bot_token)
-        bot_commands =  asyncio.run(sender.get_bot_commands())
-        # if bot_commands list is empty
-        if not bot_commands:
-            console.print("No commands found for bot", style="yellow")
-            return
-        table = Table(title="Bot Commands")
-        table.add_column("Name", style="cyan", no_wrap=True)
-        table.add_column("Description", style="cyan")
-        for command in bot_commands:
-            table.add_row(command.get("name", ""), command.get("description", ""))
-        console.print(table)
-    else:
-        # TODO: bot commands for Telegram bot
-        pass
+    if ctx.invoked_subcommand is not None:
+        return
+    if (profiles := _select_profiles(profile, all_profiles, messenger)) is not None:
+        from messenger_utils.profiles import fan_out
+        results = run(fan_out(profiles, lambda sender, _: sender.get_bot_commands()))
+        _print_fan_out(
+            "Bot Commands", ["Name", "Description"], results,
+            lambda commands: [[c.get("name", ""), c.get("description", "")] for c in commands]
+        )
+        return
+    sender = _sender(ctx, messenger, bot_token)
+    bot_commands =  run(sender.get_bot_commands())
+    # if bot_commands list is empty
+    if not bot_commands:
+        console().print("No commands found for bot", style="yellow")
+        return
+    from rich.table import Table
+    table = Table(title="Bot Commands")
+    table.add_column("Name", style="cyan", no_wrap=True)
+    table.add_column("Description", style="cyan")
+    for command in bot_commands:
+        table.add_row(command.get("name", ""), command.get("description", ""))
+    console().print(table)
+
+
+
+@bot_commands_app.command(name="sync")
+def bot_commands_sync(
+    source: str = typer.Option(..., "--file", "-f", help="Commands file (.toml, .json, .yaml)"),
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Print the difference without changing the commands"),
+    profile: str|None = typer.Option(None, "--profile", "-P", help="Comma-separated bot profiles to run the command for"),
+    all_profiles: bool = typer.Option(False, "--all", help="Run the command for all bot profiles")
+):
+    """Set bot commands from the file: the difference is written by one request (replaces `set-command` / `remove-command` scripts)."""
+    from messenger_utils.max.max_commands import CommandsDiff, load_commands, sync_commands
+    try:
+        commands = load_commands(source)
+    except (ValueError, OSError) as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+
+    def diff_rows(diff: CommandsDiff) -> list[list[str]]:
+        rows = [["+", c["name"], c["description"]] for c in diff.added]
+        rows += [["~", new["name"], f"{old['description']} -> {new['description']}"] for old, new in diff.changed]
+        rows += [["-", c["name"], c.get("description", "")] for c in diff.removed]
+        if diff.reordered:
+            rows.append(["~", "", "order: " + ", ".join(c["name"] for c in commands)])
+        return rows
+
+    title = "Commands diff (dry run)" if dry_run else "Commands diff"
+    if (profiles := _select_profiles(profile, all_profiles)) is not None:
+        from messenger_utils.profiles import fan_out
+        results = run(fan_out(profiles, lambda sender, _: sync_commands(sender, commands, dry_run=dry_run)))
+        _print_fan_out(title, ["", "Name", "Description"], results, diff_rows)
+        return
+    from messenger_utils.max import MaxSender
+    diff = run(sync_commands(MaxSender(bot_token=_require_token(bot_token)), commands, dry_run=dry_run))
+    if not diff.has_changes:
+        console().print("Bot commands are up to date", style="cyan")
+        return
+    from rich.table import Table
+    table = Table(title=title)
+    for column in ("", "Name", "Description"):
+        table.add_column(column, style="cyan")
+    for row in diff_rows(diff):
+        table.add_row(*row, style={"+": "green", "-": "red"}.get(row[0], "yellow"))
+    console().print(table)
 
 
 
 @app.command(name="set-command")
 def set_command(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
     messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type"),
     name: str = typer.Option(..., "--name", "-n", help="Command name", prompt=True),
     description: str = typer.Option(..., "--description", "-d", help="Command description", prompt=True)
 ):
     """Register new command for the Bot."""
-    if messenger == "max":
-        sender = MaxSender(bot_token=bot_token)
-        try:
-            response = asyncio.run(sender.register_command(name=name, description=description))
-        except ValueError:
-            console.print(f"[!] Command `{name}` already exists!", style="red")
-            return
-        console.print(response, style="cyan")
-    else:
-        # TODO: set command for Telegram bot
-        pass
+    sender = _sender(ctx, messenger, bot_token)
+    try:
+        response = run(sender.register_command(name=name, description=description))
+    except ValueError:
+        console().print(f"[!] Command `{name}` already exists!", style="red")
+        return
+    console().print(response, style="cyan")
 
 
 
 @app.command(name="remove-command")
 def remove_command(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
     messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type"),
     names: list[str] = typer.Option([], "--name", "-n", help="Command name")
 ):
     """Remove command from the Bot."""
     if not names:
-        console.print("[!] No commands provided!", style="red")
+        console().print("[!] No commands provided!", style="red")
         raise typer.Abort()
-    # MAX Messenger part
-    if messenger == "max":
-        sender = MaxSender(bot_token=bot_token)
-        response: dict = {}
-        for name in names:
-            try:
-                response = asyncio.run(sender.remove_command(name=name))
-            except ValueError:
-                console.print(f"[!] Command `{name}` not found!", style="red")
-                return
-        console.print(response, style="cyan")
-    # Telegram part
-    else:
-        # TODO: remove command for Telegram bot
-        pass
+    sender = _sender(ctx, messenger, bot_token)
+    response: dict|bool = {}
+    for name in names:
+        try:
+            response = run(sender.remove_command(name=name))
+        except ValueError:
+            console().print(f"[!] Command `{name}` not found!", style="red")
+            return
+    console().print(response, style="cyan")
 
 
 
 @app.command(name="send")
 def send_message(
-    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    ctx: typer.Context,
+    bot_token: str|None = typer.Option(None, "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
     messenger: Literal["max", "telegram"] = typer.Option("max", "--messenger", "-m", help="Messenger type"),
-    target: str = typer.Option(..., "--chat", "-c", help="Chat ID for MAX"),
-    content: str = typer.Argument(..., help="Message to send")
-    # content: str = typer.Option(..., "--message", "-c", help="Message to send", prompt=True),
+    target: str|None = typer.Option(None, "--chat", "-c", help="Chat ID (or `@channel` for Telegram)"),
+    content: str|None = typer.Argument(None, help="Message to send (default text of rows in bulk mode)"),
+    source: str|None = typer.Option(None, "--file", "-f", help="Bulk mode: CSV / NDJSON file of messages (`-` for stdin)"),
+    file_format: Literal["auto", "csv", "ndjson"] = typer.Option("auto", "--format", help="Bulk mode: file format"),
+    concurrency: int = typer.Option(10, "--concurrency", help="Bulk mode: messages sent simultaneously"),
+    rate: float|None = typer.Option(None, "--rate", "-r", help="Bulk mode: max messages per second"),
+    results: str|None = typer.Option(None, "--results", help="Bulk mode: NDJSON file to append results of rows to"),
+    resume: bool = typer.Option(False, "--resume", help="Bulk mode: skip rows successfully sent according to `--results` file"),
+    attach: str|None = typer.Option(None, "--attach", "-a", help="MAX: local file to upload and attach (uploaded once in bulk mode)"),
+    profile: str|None = typer.Option(None, "--profile", "-P", help="Comma-separated bot profiles to send the message from (to `--chat` or profile's chat)"),
+    all_profiles: bool = typer.Option(False, "--all", help="Send the message from all bot profiles")
 ):
-    """Send message to the Bot."""
-    # MAX part
-    if messenger == "max":
-        sender = MaxSender(bot_token=bot_token)
+    """
+    Send message to the chat, or messages from CSV / NDJSON file (bulk mode).
+
+    Bulk mode rows fields: `chat_id`, `text`, `image_url` (optional).
+    """
+    if (profiles := _select_profiles(profile, all_profiles, messenger)) is not None:
+        if source is not None or content is None:
+            console().print("[!] Message is required (bulk mode is not supported with profiles)!", style="red")
+            raise typer.Exit(1)
+        from messenger_utils.profiles import fan_out
+        target_id = _chat_id(target, "max")
+
+        async def operation(sender, bot: "BotProfile") -> dict:
+            chat_id = target_id if target_id is not None else bot.chat_id
+            if chat_id is None:
+                raise ValueError("no `--chat` and profile's `chat_id`")
+            return await sender.send_message(text=content, target=chat_id)
+
+        _print_fan_out(
+            "Send", ["Chat ID", "Message ID"], run(fan_out(profiles, operation)),
+            lambda response: [[str(response.get("message", {}).get("recipient", {}).get("chat_id", "")),
+                               str(response.get("message", {}).get("body", {}).get("mid", ""))]]
+        )
+        return
+    sender = _sender(ctx, messenger, bot_token)
+    if attach is not None and messenger != "max":
+        console().print("[!] `--attach` is supported for MAX only!", style="red")
+        raise typer.Exit(1)
+    if source is not None:
+        _send_bulk(sender, source, file_format, content, concurrency, rate, results, resume, attach)
+        return
+    if target is None or content is None:
+        console().print("[!] Chat ID and message are required!", style="red")
+        raise typer.Exit(1)
+    chat_id = _chat_id(target, messenger)
+    from httpx import NetworkError
+
+    async def send() -> dict:
+        kwargs = {"attachments": [await _upload(sender, attach)]} if attach is not None else {}
+        return await sender.send_message(text=content, target=chat_id, **kwargs)
+
+    try:
+        response = run(send())
+    except NetworkError:
+        console().print("[!] Network error!", style="red")
+        return
+    console().print(response, style="cyan")
+
+
+
+async def _upload(sender: Any, path: str) -> dict:
+    """Upload file to MAX (attachment type by file name)."""
+    from messenger_utils.max.max_upload import upload_type_of
+    return await sender.upload(path, upload_type_of(path))
+
+
+
+def _send_bulk(
+    sender: Any,
+    source: str,
+    file_format: Literal["auto", "csv", "ndjson"],
+    default_text: str|None,
+    concurrency: int,
+    rate: float|None,
+    results_path: str|None,
+    resume: bool,
+    attach: str|None = None
+):
+    """Send messages from the file over one connection pool, with progress bar."""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+    from messenger_utils.bulk import read_done_rows, read_rows, send_bulk
+    if resume and results_path is None:
+        console().print("[!] `--resume` requires `--results` file!", style="red")
+        raise typer.Exit(1)
+    done = read_done_rows(results_path) if resume and results_path else set()
+    total: int|None = None
+    if source != "-":
         try:
-            response = asyncio.run(sender.send_text_message (text=content, target=target))
-        except NetworkError:
-            console.print("[!] Network error!", style="red")
-            return
-        console.print(response, style="cyan")
-    # Telegram part
-    else:
-        # TODO: send command for Telegram bot
-        pass
+            with open(source, "rb") as f:
+                total = sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            console().print(f"[!] File `{source}` not found!", style="red")
+            raise typer.Exit(1)
+        if file_format == "csv" or (file_format == "auto" and source.lower().endswith(".csv")):
+            total -= 1      # header
+        total = max(total - len(done), 0)
+    rows = (row for row in read_rows(source, file_format=file_format, default_text=default_text) if row.row not in done)
+    sent = failed = 0
+
+    async def send_all():
+        nonlocal sent, failed
+        results_file = open(results_path, "a", encoding="utf-8") if results_path else None
+        try:
+            with Progress(
+                TextColumn("Sending"), BarColumn(), MofNCompleteColumn(), TextColumn("[red]{task.fields[failed]} failed"),
+                TimeElapsedColumn(), console=console()
+            ) as progress:
+                task = progress.add_task("send", total=total, failed=0)
+                async with sender:
+                    attachments = [await _upload(sender, attach)] if attach is not None else None
+                    async for result in send_bulk(sender, rows, concurrency=concurrency, rate=rate, attachments=attachments):
+                        if result.ok:
+                            sent += 1
+                        else:
+                            failed += 1
+                        if results_file is not None:
+                            results_file.write(result.to_json() + "\n")
+                        progress.update(task, advance=1, failed=failed)
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+    try:
+        run(send_all())
+    except ValueError as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+    finally:
+        if done:
+            console().print(f"Skipped (sent before): {len(done)}")
+        console().print(f"Sent: {sent}", style="cyan")
+        if failed:
+            console().print(f"Failed: {failed}", style="red")
+    if failed:
+        raise typer.Exit(1)
+
+
+
+
+
+@app.command(name="shell")
+def shell(
+    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+):
+    """Interactive shell of bot commands (one connection pool and cached bot info for the session)."""
+    from messenger_utils.max import MaxSender
+    from messenger_utils.shell import Shell
+    Shell(MaxSender(bot_token=bot_token), console()).run()
+
+
+
+
+
+@app.command(name="replay")
+def replay(
+    source: str = typer.Argument(..., help="NDJSON file of webhook bodies or webhooks journal directory"),
+    handlers: str = typer.Option(..., "--handlers", "-H", help="Module with handlers registered by `MaxReceiver` decorators"),
+    speed: float = typer.Option(0.0, "--speed", "-s", help="0 - full speed, otherwise scale of recorded timing (2 - twice faster)"),
+    concurrency: int = typer.Option(1, "--concurrency", "-c", help="Webhooks processed simultaneously"),
+    api_latency: float = typer.Option(0.0, "--api-latency", help="Simulated latency of stubbed bot API (ms)"),
+    show_log: bool = typer.Option(False, "--log", help="Show log messages of the library")
+):
+    """Replay recorded webhooks through handlers (bot API calls are stubbed)."""
+    import importlib
+    import sys
+    from loguru import logger
+    from rich.table import Table
+    from messenger_utils.sender import Sender
+    from messenger_utils.replay import ReplayStats, read_webhooks, replay_webhooks, stub_transport
+    sys.path.insert(0, "")
+    try:
+        importlib.import_module(handlers)
+    except ImportError as exc:
+        console().print(f"[!] Cannot import handlers module `{handlers}`: {exc}", style="red")
+        raise typer.Exit(1)
+    if not show_log:
+        logger.disable("messenger_utils")
+    stats = ReplayStats()
+    saved_transport = Sender.default_transport
+    Sender.default_transport = stub_transport(stats, latency=api_latency / 1000)
+    try:
+        run(replay_webhooks(read_webhooks(source), speed=speed, concurrency=concurrency, stats=stats))
+    except FileNotFoundError:
+        console().print(f"[!] File `{source}` not found!", style="red")
+        raise typer.Exit(1)
+    finally:
+        Sender.default_transport = saved_transport
+        logger.enable("messenger_utils")
+    # Report
+    table = Table(title="Replay")
+    table.add_column("Metric", style="cyan", no_wrap=True)
+    table.add_column("Value", style="cyan", justify="right")
+    table.add_row("Events", str(stats.events))
+    table.add_row("Duration, s", f"{stats.duration:.3f}")
+    table.add_row("Events / s", f"{stats.events_per_sec:.1f}")
+    for name, value in stats.latency.summary().items():
+        table.add_row(f"Latency {name}, ms", f"{value:.3f}")
+    table.add_row("Parse errors", str(stats.parse_errors), style="red" if stats.parse_errors else None)
+    table.add_row("Handler errors", str(stats.handler_errors), style="red" if stats.handler_errors else None)
+    for call, count in sorted(stats.sends.items()):
+        table.add_row(f"API {call}", str(count))
+    console().print(table)
+
+
+
+
+
+@app.command(name="broadcast")
+def broadcast_message(
+    content: str = typer.Argument(..., help="Message to send"),
+    source: str = typer.Option(..., "--targets", "-f", help="CSV / NDJSON file of targets with `messenger` (max, telegram) and `chat_id` fields (`-` for stdin)"),
+    file_format: Literal["auto", "csv", "ndjson"] = typer.Option("auto", "--format", help="Targets file format"),
+    image_url: str|None = typer.Option(None, "--image-url", "-i", help="URL of image to attach"),
+    buttons: list[str] = typer.Option([], "--button", "-b", help="Button row: `text=payload` or `text=https://...`, several buttons separated by `;`"),
+    max_token: str|None = typer.Option(None, "--max-token", envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    tg_token: str|None = typer.Option(None, "--tg-token", envvar=f"{ENV_PREFIX}TG_BOT_TOKEN", show_envvar=True, help="Telegram bot token"),
+    max_concurrency: int = typer.Option(10, "--max-concurrency", help="MAX messages sent simultaneously"),
+    max_rate: float|None = typer.Option(None, "--max-rate", help="Max MAX messages per second"),
+    tg_concurrency: int = typer.Option(30, "--tg-concurrency", help="Telegram messages sent simultaneously"),
+    tg_rate: float|None = typer.Option(None, "--tg-rate", help="Max Telegram messages per second (flood limits are applied anyway)"),
+    results_path: str|None = typer.Option(None, "--results", help="NDJSON file to append results to")
+):
+    """Send the message to MAX and Telegram users in parallel, with limits per messenger and one progress."""
+    from contextlib import AsyncExitStack
+    from rich.progress import BarColumn, Progress, TextColumn, TimeElapsedColumn
+    from messenger_utils.broadcast import BroadcastButton, BroadcastChannel, BroadcastMessage, broadcast, read_targets
+    keyboard = [
+        [
+            BroadcastButton(text, url=value) if value.startswith(("http://", "https://")) else BroadcastButton(text, payload=value)
+            for text, _, value in (button.partition("=") for button in row.split(";"))
+        ]
+        for row in buttons
+    ]
+    message = BroadcastMessage(content, image_url, keyboard)
+    channels: dict[str, BroadcastChannel] = {}
+    if max_token:
+        from messenger_utils.max import MaxSender
+        channels["max"] = BroadcastChannel(MaxSender(max_token), max_concurrency, max_rate)
+    if tg_token:
+        from messenger_utils.telegram import TelegramSender
+        channels["telegram"] = BroadcastChannel(TelegramSender(tg_token), tg_concurrency, tg_rate)
+    if not channels:
+        console().print("[!] MAX or Telegram bot token is required!", style="red")
+        raise typer.Exit(1)
+    counts = {messenger: 0 for messenger in channels}
+    failed = 0
+
+    async def send_all():
+        nonlocal failed
+        results_file = open(results_path, "a", encoding="utf-8") if results_path else None
+        try:
+            with Progress(
+                TextColumn("Broadcast"), BarColumn(pulse_style="cyan"), TextColumn("{task.fields[counts]}"),
+                TextColumn("[red]{task.fields[failed]} failed"), TimeElapsedColumn(), console=console()
+            ) as progress:
+                task = progress.add_task("broadcast", total=None, counts="", failed=0)
+                async with AsyncExitStack() as stack:
+                    for channel in channels.values():
+                        await stack.enter_async_context(channel.sender)
+                    async for result in broadcast(message, read_targets(source, file_format=file_format), channels):
+                        if result.ok:
+                            counts[result.messenger] += 1
+                        else:
+                            failed += 1
+                        if results_file is not None:
+                            results_file.write(result.to_json() + "\n")
+                        progress.update(
+                            task, advance=1, failed=failed,
+                            counts=" ".join(f"{messenger}: {count}" for messenger, count in counts.items())
+                        )
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+    try:
+        run(send_all())
+    except (ValueError, OSError) as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+    console().print(f"Sent: {sum(counts.values())}, failed: {failed}", style="red" if failed else "cyan")
+
+
+
+@app.command(name="serve")
+def serve(
+    app_spec: str = typer.Option(..., "--app", "-a", help="Bot module with handlers registered by `MaxReceiver` decorators (`module` or `module:startup`)"),
+    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}MAX_BOT_TOKEN", show_envvar=True, help="MAX bot token"),
+    host: str = typer.Option("0.0.0.0", "--host", help="Interface to listen on"),
+    port: int = typer.Option(8080, "--port", "-p", help="Port to listen on"),
+    path: str = typer.Option("/", "--path", help="Webhooks endpoint path"),
+    workers: int = typer.Option(1, "--workers", "-w", help="Worker processes sharing the port"),
+    secret: str|None = typer.Option(None, "--secret", envvar=f"{ENV_PREFIX}MAX_WEBHOOK_SECRET", show_envvar=True, help="Secret of webhooks subscription"),
+    drain_timeout: float = typer.Option(30.0, "--drain-timeout", help="Max time to finish active requests on reload / shutdown (s)"),
+    enable_metrics: bool = typer.Option(False, "--metrics", help="Collect metrics served on `GET /metrics` (Prometheus text format)")
+):
+    """
+    Serve bot webhooks with several worker processes.
+
+    `GET /health` - health check, `GET /metrics` - metrics (with `--metrics`), `SIGHUP` - graceful reload of workers, `SIGTERM` - graceful shutdown.
+    """
+    from messenger_utils.max.max_server import MaxWebhookServer
+    try:
+        server = MaxWebhookServer(
+            app_spec, bot_token=bot_token, host=host, port=port, path=path, workers=workers,
+            secret=secret, drain_timeout=drain_timeout, enable_metrics=enable_metrics
+        )
+        server.run()
+    except (ValueError, RuntimeError) as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+
+
+
+
+@app.command(name="poll")
+def poll(
+    app_spec: str = typer.Option(..., "--app", "-a", help="Bot module with handlers registered by `TelegramReceiver` decorators (`module` or `module:startup`)"),
+    bot_token: str = typer.Option(..., "--bot-token", "-t",  envvar=f"{ENV_PREFIX}TG_BOT_TOKEN", show_envvar=True, help="Telegram bot token"),
+    concurrency: int = typer.Option(100, "--concurrency", "-c", help="Max updates processed simultaneously"),
+    timeout: int = typer.Option(30, "--timeout", help="Long polling timeout (s)")
+):
+    """
+    Receive Telegram updates by `getUpdates` long polling (no public webhook URL needed) and process them by the bot handlers.
+
+    `SIGTERM` / `SIGINT` - finish active updates and stop.
+    """
+    import asyncio
+    import signal
+    from loguru import logger
+    from messenger_utils.max.max_server import load_app
+    from messenger_utils.telegram import TelegramReceiver, TelegramSender
+
+    async def serve():
+        startup = load_app(app_spec)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        sender = TelegramSender(bot_token)
+        sender.open(max_connections=concurrency + 1, timeout=timeout + 10)
+        try:
+            kwargs = (await startup(sender) or {}) if startup is not None else {}
+            logger.info("Polling Telegram updates...")
+            await TelegramReceiver.poll(sender, concurrency=concurrency, timeout=timeout, stop=stop, **kwargs)
+        finally:
+            await sender.aclose()
+
+    try:
+        run(serve())
+    except (ValueError, ImportError) as exc:
+        console().print(f"[!] {exc}", style="red")
+        raise typer.Exit(1)
+
+
+
+@app.command(name="bench")
+def bench(
+    requests: int = typer.Option(1000, "--requests", "-n", help="Messages to send"),
+    concurrency: int = typer.Option(10, "--concurrency", "-c", help="Simultaneous requests (and pooled connections)"),
+    rate: float|None = typer.Option(None, "--rate", "-r", help="Target messages per second (not limited by default)"),
+    retries: int = typer.Option(3, "--retries", help="Retries of 429 & 5xx responses"),
+    latency: float = typer.Option(50.0, "--latency", help="Fake API latency (ms)"),
+    error_rate: float = typer.Option(0.0, "--error-rate", help="Share of 500 responses of fake API (0..1)"),
+    rate_limit_rate: float = typer.Option(0.0, "--429-rate", help="Share of 429 responses of fake API (0..1)"),
+    retry_after: float = typer.Option(100.0, "--retry-after", help="`Retry-After` of 429 responses (ms)"),
+    seed: int|None = typer.Option(None, "--seed", help="Random seed of fake API errors")
+):
+    """Load-test `MaxSender` against local fake MAX API (the real API is not called)."""
+    from loguru import logger
+    from rich.table import Table
+    from messenger_utils.bench import FakeMaxApi, run_bench
+    logger.disable("messenger_utils")
+    api = FakeMaxApi(
+        latency=latency / 1000, error_rate=error_rate, rate_limit_rate=rate_limit_rate,
+        retry_after=retry_after / 1000, seed=seed
+    )
+    try:
+        stats = run(run_bench(requests=requests, concurrency=concurrency, rate=rate, max_retries=retries, api=api))
+    finally:
+        logger.enable("messenger_utils")
+    # Report
+    table = Table(title="Bench")
+    table.add_column("Metric", style="cyan", no_wrap=True)
+    table.add_column("Value", style="cyan", justify="right")
+    table.add_row("Messages sent", str(stats.ok))
+    table.add_row("Failed", str(stats.failed), style="red" if stats.failed else None)
+    table.add_row("Duration, s", f"{stats.duration:.3f}")
+    table.add_row("Messages / s", f"{stats.throughput:.1f}")
+    for name, value in stats.latency.summary().items():
+        table.add_row(f"Latency {name}, ms", f"{value:.3f}")
+    table.add_row("Retries", str(stats.retries))
+    table.add_row("Connections", str(stats.connections))
+    table.add_row("Connection reuse", f"{stats.connection_reuse:.1%}")
+    for status, count in sorted(stats.statuses.items()):
+        table.add_row(f"API status {status}", str(count))
+    console().print(table)
 
 
 
@@ -0,0 +1,278 @@
+"""
+Minimal asyncio HTTP/1.1 server for webhook endpoints and local API stubs.
+
+Supports keep-alive connections and requests with `Content-Length` body (enough for bot APIs & webhooks),
+shared listening port (`SO_REUSEPORT`) and graceful shutdown with draining of active requests.
+"""
+
+__all__ = ["HttpRequest", "HttpResponse", "HttpHandler", "HttpServer", "json_response"]
+
+
+import asyncio
+import json
+import socket
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import parse_qsl
+from loguru import logger
+
+
+@dataclass(slots=True)
+class HttpRequest:
+    """
+    Received HTTP request.
+    """
+    method: str
+    path: str
+    query: str = ""
+    headers: dict[str, str] = field(default_factory=dict)     # lowercase names
+    body: bytes = b""
+
+
+    @property
+    def params(self) -> dict[str, str]:
+        """Query string params."""
+        return dict(parse_qsl(self.query))
+
+
+    def json(self) -> Any:
+        """Body parsed as JSON."""
+        return json.loads(self.body)
+
+
+
+@dataclass(slots=True)
+class HttpResponse:
+    """
+    HTTP response to send.
+    """
+    status: int = 200
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+    content_type: str = "application/json"
+
+
+
+def json_response(data: Any, status: int = 200, headers: dict[str, str]|None = None) -> HttpResponse:
+    """Create response with JSON body."""
+    return HttpResponse(status, json.dumps(data, ensure_ascii=False).encode(), headers or {})
+
+
+
+type HttpHandler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+
+### Class HttpServer ###
+
+class HttpServer:
+    """
+    HTTP/1.1 server calling the handler function for every request.
+
+    Usage:
+    ```
+    async def handler(request: HttpRequest) -> HttpResponse:
+        return json_response({"ok": True})
+
+    async with HttpServer(handler, port=8080) as server:
+        await server.serve_forever()
+    ```
+    """
+
+    def __init__(
+        self,
+        handler: HttpHandler, *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        reuse_port: bool = False,
+        max_body_size: int = 1024 * 1024,
+        keep_alive_timeout: float = 75.0
+    ):
+        """
+        Init server.
+
+        :param handler: async function `(request) -> response`
+        :param host: interface to listen on
+        :param port: port to listen on (0 - any free port, see `port` property after `start`)
+        :param reuse_port: share the port with other processes (`SO_REUSEPORT`, for multi-worker servers)
+        :param max_body_size: max request body size in bytes (larger requests get 413)
+        :param keep_alive_timeout: idle keep-alive connection timeout in seconds (and timeout of request body reading)
+        """
+        self.handler: HttpHandler = handler
+        self.host: str = host
+        self.port: int = port
+        self.reuse_port: bool = reuse_port
+        self.max_body_size: int = max_body_size
+        self.keep_alive_timeout: float = keep_alive_timeout
+        self.connections: int = 0           # Accepted connections count
+        self.requests: int = 0              # Processed requests count
+        self._server: asyncio.Server|None = None
+        self._closing: bool = False
+        self._active: int = 0               # Requests being processed
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._writers: set[asyncio.StreamWriter] = set()
+
+
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+
+
+    async def start(self, sock: socket.socket|None = None):
+        """
+        Start listening.
+
+        :param sock: already bound socket to listen on (instead of `host` & `port`)
+        """
+        if sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=sock)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port, reuse_port=self.reuse_port
+            )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+
+
+    async def serve_forever(self):
+        """Serve until the task is cancelled or the server is closed."""
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            if not self._closing:
+                raise
+
+
+
+    async def close(self, timeout: float = 30.0):
+        """
+        Stop accepting connections, wait for active requests (up to `timeout` seconds) and close connections.
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except TimeoutError:
+            logger.warning(f"HTTP server closed with {self._active} requests unfinished")
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+
+    #  PRIVATE METHODS
+
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Process requests of the connection until it is closed."""
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while not self._closing:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError, ConnectionError):
+                    return
+                self._active += 1
+                self._idle.clear()
+                try:
+                    keep_alive = await self._handle_request(head, reader, writer)
+                finally:
+                    self._active -= 1
+                    if self._active == 0:
+                        self._idle.set()
+                if not keep_alive:
+                    return
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+
+    async def _handle_request(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Read request body, call handler and write response.
+
+        :return: if the connection should be kept alive
+        """
+        try:
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            await self._write(writer, HttpResponse(400), keep_alive=False)
+            return False
+        if "chunked" in headers.get("transfer-encoding", ""):
+            await self._write(writer, HttpResponse(411), keep_alive=False)
+            return False
+        if length < 0:
+            await self._write(writer, HttpResponse(400), keep_alive=False)
+            return False
+        if length > self.max_body_size:
+            await self._write(writer, HttpResponse(413), keep_alive=False)
+            return False
+        try:
+            # Stalled client doesn't hold the request slot (and `close`) longer than idle one
+            body = await asyncio.wait_for(reader.readexactly(length), self.keep_alive_timeout) if length else b""
+        except (asyncio.IncompleteReadError, TimeoutError, ConnectionError):
+            return False
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        path, _, query = target.partition("?")
+        self.requests += 1
+        try:
+            response = await self.handler(HttpRequest(method, path, query, headers, body))
+        except Exception:       # pylint: disable=broad-exception-caught
+            logger.exception(f"HTTP handler failed on {method} {path}")
+            response = HttpResponse(500)
+        keep_alive = keep_alive and not self._closing
+        await self._write(writer, response, keep_alive=keep_alive)
+        return keep_alive
+
+
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: HttpResponse, *, keep_alive: bool):
+        """Write response to the connection."""
+        status = HTTPStatus(response.status)
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        if response.body:
+            lines.append(f"Content-Type: {response.content_type}")
+        lines.extend(f"{name}: {value}" for name, value in response.headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + response.body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+### End of class HttpServer ###
@@ -0,0 +1,501 @@
+"""
+Append-only journal of received webhooks, for recovery and replay.
+
+Journal directory layout:
+- `<first_seq>.log` : segment of records (header + raw webhook body), appended only
+- `<first_seq>.idx` : side index of the segment - fixed-size entries (chat_id, timestamp, seq, offset, length)
+- `checkpoint`      : sequence number of the last processed entry (all entries below are processed too)
+- `failed`          : sequence numbers of entries failed to process (below the checkpoint, retried by replay)
+
+Writes are fsync-ed in batches (by count of records or by time interval), so the entries
+appended after the last sync can be lost if the whole host crashes (but not if only the process does).
+"""
+
+__all__ = ["JournalEntry", "WebhookJournal", "read_journal"]
+
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+
+_RECORD = struct.Struct("<IIQqq")       # payload length, crc32 of payload, seq, chat_id, timestamp
+_INDEX = struct.Struct("<qqQII")        # chat_id, timestamp, seq, record offset, record length
+_CHECKPOINT_FILE = "checkpoint"
+_FAILED_FILE = "failed"
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    """
+    Single webhook stored in the journal.
+    """
+    seq: int
+    chat_id: int
+    timestamp: int
+    data: bytes             # Raw webhook body
+
+
+@dataclass(slots=True)
+class _Segment:
+    """Journal segment info."""
+    first_seq: int
+    log_path: Path
+    idx_path: Path
+    size: int = 0
+    last_seq: int = 0
+    min_ts: int = 0
+    max_ts: int = 0
+
+
+
+### Class WebhookJournal ###
+
+class WebhookJournal:
+    """
+    Append-only segmented log of webhook bodies with index of entries by `chat_id` and timestamp.
+
+    Usage:
+    ```
+    journal = WebhookJournal("/var/lib/mybot/journal")
+    seq = journal.append(raw_body, chat_id=chat_id, timestamp=timestamp)
+    ...                     # process webhook
+    journal.ack(seq)        # or `journal.fail(seq)` if processing failed
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str|Path, *,
+        segment_size: int = 64 * 1024 * 1024,
+        sync_every: int = 100,
+        sync_interval: float = 0.05
+    ):
+        """
+        Open (or create) the journal.
+
+        :param path: journal directory
+        :param segment_size: size of segment file (in bytes) to start the next segment after
+        :param sync_every: fsync after this count of appended records...
+        :param sync_interval: ...or if this time (in seconds) passed from the last fsync
+        """
+        self.path: Path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_size: int = segment_size
+        self.sync_every: int = sync_every
+        self.sync_interval: float = sync_interval
+        self._segments: list[_Segment] = []
+        self._log: BinaryIO|None = None
+        self._idx: BinaryIO|None = None
+        self._acked: set[int] = set()
+        # Chat => its entries (seq, timestamp, first seq of segment, record offset, record length)
+        self._chats: dict[int, list[tuple[int, int, int, int, int]]] = {}
+        # Sync may run in worker thread (see `sync_due`) while the segment is switched
+        self._lock = threading.RLock()
+        self._failed: set[int] = self._read_failed()
+        self._failed_changed: bool = False
+        self._unsynced: int = 0
+        self._last_sync: float = time.monotonic()
+        self._checkpoint: int = self._read_checkpoint()
+        self._synced_checkpoint: int = self._checkpoint
+        self._open_segments()
+        self._next_seq: int = max(self._segments[-1].last_seq, self._checkpoint) + 1 if self._segments else self._checkpoint + 1
+
+
+
+    #  PUBLIC METHODS
+
+
+    @property
+    def checkpoint(self) -> int:
+        """Sequence number of the last processed entry."""
+        return self._checkpoint
+
+
+
+    @property
+    def sync_due(self) -> bool:
+        """If appended records should be synced (by count or time), see `append` with `sync=False`."""
+        return self._unsynced > 0 and (
+            self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval
+        )
+
+
+
+    def append(self, data: bytes, *, chat_id: int = 0, timestamp: int = 0, sync: bool = True) -> int:
+        """
+        Append webhook body to the journal.
+
+        :param data: raw webhook body
+        :param chat_id: chat of the webhook (for `chat_history` search)
+        :param timestamp: timestamp of the webhook (for `chat_history` search)
+        :param sync: fsync the batch here if it's due (with `False` the caller syncs when `sync_due`,
+            e.g. by `await asyncio.to_thread(journal.sync)` not to block the event loop)
+        :return: sequence number of the entry
+        """
+        if self._log is None or self._idx is None:
+            raise ValueError("Journal is closed")
+        segment = self._segments[-1]
+        if segment.size >= self.segment_size:
+            segment = self._new_segment()
+        seq = self._next_seq
+        self._next_seq += 1
+        record = _RECORD.pack(len(data), zlib.crc32(data), seq, chat_id, timestamp)
+        self._log.write(record)
+        self._log.write(data)
+        self._idx.write(_INDEX.pack(chat_id, timestamp, seq, segment.size, len(record) + len(data)))
+        self._chats.setdefault(chat_id, []).append((seq, timestamp, segment.first_seq, segment.size, len(record) + len(data)))
+        if segment.last_seq == 0:
+            segment.min_ts = segment.max_ts = timestamp
+        else:
+            segment.min_ts = min(segment.min_ts, timestamp)
+            segment.max_ts = max(segment.max_ts, timestamp)
+        segment.size += len(record) + len(data)
+        segment.last_seq = seq
+        self._unsynced += 1
+        if sync and self.sync_due:
+            self.sync()
+        return seq
+
+
+
+    @property
+    def failed(self) -> frozenset[int]:
+        """Sequence numbers of entries failed to process."""
+        return frozenset(self._failed)
+
+
+
+    def ack(self, seq: int):
+        """
+        Mark entry as processed (failed entry too, if its retry succeeded).
+        Checkpoint is moved over all contiguous processed entries and saved on the next sync.
+
+        :param seq: sequence number of the entry
+        """
+        if seq in self._failed:
+            self._failed.discard(seq)
+            self._failed_changed = True
+        if seq <= self._checkpoint:
+            return
+        self._acked.add(seq)
+        while self._checkpoint + 1 in self._acked:
+            self._checkpoint += 1
+            self._acked.discard(self._checkpoint)
+
+
+
+    def fail(self, seq: int):
+        """
+        Mark entry as failed to process: the checkpoint is moved over it (not stalled by it),
+        the entry is kept for retry by `failed_entries` (its segment is not removed until then).
+
+        :param seq: sequence number of the entry
+        """
+        if seq not in self._failed:
+            self._failed.add(seq)
+            self._failed_changed = True
+        if seq > self._checkpoint:
+            self._acked.add(seq)
+            while self._checkpoint + 1 in self._acked:
+                self._checkpoint += 1
+                self._acked.discard(self._checkpoint)
+
+
+
+    def sync(self):
+        """Flush written records and checkpoint to disk (can be called from worker thread)."""
+        with self._lock:
+            self._sync()
+
+
+
+    def pending(self) -> Iterator[JournalEntry]:
+        """
+        Iterate over unprocessed entries (for replay on startup).
+        """
+        for segment in list(self._segments):
+            if segment.last_seq <= self._checkpoint:
+                continue
+            yield from self._read_entries(
+                segment,
+                lambda chat_id, ts, seq: seq > self._checkpoint and seq not in self._acked and seq not in self._failed
+            )
+
+
+
+    def failed_entries(self) -> Iterator[JournalEntry]:
+        """
+        Iterate over entries failed to process (for retry).
+        """
+        if not self._failed:
+            return
+        low, high = min(self._failed), max(self._failed)
+        for segment in list(self._segments):
+            if segment.last_seq < low or segment.first_seq > high:
+                continue
+            yield from self._read_entries(segment, lambda chat_id, ts, seq: seq in self._failed)
+
+
+
+    def entries(self) -> Iterator[JournalEntry]:
+        """
+        Iterate over all stored entries (processed and not).
+        """
+        for segment in list(self._segments):
+            yield from self._read_entries(segment, lambda chat_id, ts, seq: True)
+
+
+
+    def chat_history(self, chat_id: int, *, since: int|None = None, until: int|None = None) -> list[JournalEntry]:
+        """
+        Get stored webhooks of the chat.
+
+        :param chat_id: chat to search for
+        :param since: min timestamp of the entries (inclusive)
+        :param until: max timestamp of the entries (inclusive)
+        :return: list of entries in order of appending
+        """
+        low = since if since is not None else -2**63
+        high = until if until is not None else 2**63 - 1
+        if not (chat_entries := self._chats.get(chat_id)):
+            return []
+        if self._log is not None:
+            self._log.flush()
+        segments = {segment.first_seq: segment for segment in self._segments}
+        files: dict[int, BinaryIO] = {}
+        entries: list[JournalEntry] = []
+        try:
+            for seq, ts, first_seq, offset, length in chat_entries:
+                if not low <= ts <= high:
+                    continue
+                if (f := files.get(first_seq)) is None:
+                    f = files[first_seq] = open(segments[first_seq].log_path, "rb")
+                f.seek(offset + _RECORD.size)
+                entries.append(JournalEntry(seq, chat_id, ts, f.read(length - _RECORD.size)))
+        finally:
+            for f in files.values():
+                f.close()
+        return entries
+
+
+
+    def remove_processed(self) -> int:
+        """
+        Remove segments with processed entries only, without failed ones (the active segment is never removed).
+
+        :return: count of removed segments
+        """
+        self.sync()
+        removed = 0
+        for segment in self._segments[:-1]:
+            if segment.last_seq > self._checkpoint or any(segment.first_seq <= seq <= segment.last_seq for seq in self._failed):
+                continue
+            self._segments.remove(segment)
+            segment.log_path.unlink(missing_ok=True)
+            segment.idx_path.unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            first_seqs = {segment.first_seq for segment in self._segments}
+            for chat_id in list(self._chats):
+                if not (kept := [entry for entry in self._chats[chat_id] if entry[2] in first_seqs]):
+                    del self._chats[chat_id]
+                else:
+                    self._chats[chat_id] = kept
+        return removed
+
+
+
+    def close(self):
+        """Sync and close the journal files."""
+        with self._lock:
+            if self._log is None or self._idx is None:
+                return
+            self._sync()
+            self._log.close()
+            self._idx.close()
+            self._log = self._idx = None
+
+
+    def __enter__(self) -> "WebhookJournal":
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _sync(self):
+        """
+        Flush written records and checkpoint to disk (under the lock).
+        State is read once at start: appends & acks done meanwhile by the event loop are saved by the next sync.
+        """
+        unsynced, checkpoint = self._unsynced, self._checkpoint
+        if self._log is not None and self._idx is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._idx.flush()
+            os.fsync(self._idx.fileno())
+        if self._failed_changed:
+            self._failed_changed = False
+            # Saved before the checkpoint: failed entry is never lost by the checkpoint moved over it
+            tmp_path = self.path / f"{_FAILED_FILE}.tmp"
+            tmp_path.write_text("".join(f"{seq}\n" for seq in sorted(self._failed)))
+            os.replace(tmp_path, self.path / _FAILED_FILE)
+        if checkpoint != self._synced_checkpoint:
+            tmp_path = self.path / f"{_CHECKPOINT_FILE}.tmp"
+            tmp_path.write_text(str(checkpoint))
+            os.replace(tmp_path, self.path / _CHECKPOINT_FILE)
+            self._synced_checkpoint = checkpoint
+        self._unsynced -= unsynced
+        self._last_sync = time.monotonic()
+
+
+
+    def _read_checkpoint(self) -> int:
+        """Read saved checkpoint."""
+        try:
+            return int((self.path / _CHECKPOINT_FILE).read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+
+
+    def _read_failed(self) -> set[int]:
+        """Read saved sequence numbers of failed entries."""
+        try:
+            return {int(line) for line in (self.path / _FAILED_FILE).read_text().split()}
+        except FileNotFoundError:
+            return set()
+
+
+
+    def _open_segments(self):
+        """Load segments info and open the last segment for appending."""
+        for log_path in sorted(self.path.glob("*.log")):
+            segment = _Segment(int(log_path.stem), log_path, log_path.with_suffix(".idx"))
+            segment.size = log_path.stat().st_size
+            self._segments.append(segment)
+        if not self._segments:
+            self._new_segment(self._checkpoint + 1)
+            return
+        for segment in self._segments[:-1]:
+            self._load_index(segment)
+        self._recover(self._segments[-1])
+        self._log = open(self._segments[-1].log_path, "ab")
+        self._idx = open(self._segments[-1].idx_path, "ab")
+
+
+
+    def _new_segment(self, first_seq: int|None = None) -> _Segment:
+        """Start the next segment and make it active."""
+        with self._lock:
+            if self._log is not None and self._idx is not None:
+                self._sync()
+                self._log.close()
+                self._idx.close()
+            first_seq = first_seq if first_seq is not None else self._next_seq
+            log_path = self.path / f"{first_seq:020d}.log"
+            segment = _Segment(first_seq, log_path, log_path.with_suffix(".idx"))
+            self._segments.append(segment)
+            self._log = open(segment.log_path, "ab")
+            self._idx = open(segment.idx_path, "ab")
+            return segment
+
+
+
+    def _load_index(self, segment: _Segment):
+        """Fill segment's seq and timestamps range from its index."""
+        with open(segment.idx_path, "rb") as f:
+            data = f.read()
+        for chat_id, ts, seq, offset, length in _INDEX.iter_unpack(data[:len(data) - len(data) % _INDEX.size]):
+            self._chats.setdefault(chat_id, []).append((seq, ts, segment.first_seq, offset, length))
+            if segment.last_seq == 0:
+                segment.min_ts = segment.max_ts = ts
+            segment.min_ts = min(segment.min_ts, ts)
+            segment.max_ts = max(segment.max_ts, ts)
+            segment.last_seq = seq
+
+
+
+    def _recover(self, segment: _Segment):
+        """
+        Check records of the segment (the last one, possibly written partially on crash),
+        cut broken tail and rebuild the index.
+        """
+        index: list[bytes] = []
+        offset = 0
+        with open(segment.log_path, "rb") as f:
+            data = f.read()
+        while offset + _RECORD.size <= len(data):
+            size, crc, seq, chat_id, ts = _RECORD.unpack_from(data, offset)
+            end = offset + _RECORD.size + size
+            if end > len(data) or zlib.crc32(data[offset + _RECORD.size:end]) != crc:
+                break
+            index.append(_INDEX.pack(chat_id, ts, seq, offset, end - offset))
+            self._chats.setdefault(chat_id, []).append((seq, ts, segment.first_seq, offset, end - offset))
+            if segment.last_seq == 0:
+                segment.min_ts = segment.max_ts = ts
+            segment.min_ts = min(segment.min_ts, ts)
+            segment.max_ts = max(segment.max_ts, ts)
+            segment.last_seq = seq
+            offset = end
+        if offset != len(data):
+            with open(segment.log_path, "r+b") as f:
+                f.truncate(offset)
+        segment.size = offset
+        segment.idx_path.write_bytes(b"".join(index))
+
+
+
+    def _read_entries(self, segment: _Segment, predicate) -> Iterator[JournalEntry]:
+        """Read entries of the segment, selected by `predicate(chat_id, timestamp, seq)` applied to index."""
+        if segment is self._segments[-1] and self._log is not None and self._idx is not None:
+            self._log.flush()
+            self._idx.flush()
+        with open(segment.idx_path, "rb") as idx_file, open(segment.log_path, "rb") as log_file:
+            if segment.size == 0 or os.fstat(idx_file.fileno()).st_size < _INDEX.size:
+                return
+            with mmap.mmap(idx_file.fileno(), 0, access=mmap.ACCESS_READ) as idx_map, \
+                 mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+                count = len(idx_map) // _INDEX.size
+                for chat_id, ts, seq, offset, length in _INDEX.iter_unpack(idx_map[:count * _INDEX.size]):
+                    if predicate(chat_id, ts, seq):
+                        yield JournalEntry(seq, chat_id, ts, log_map[offset + _RECORD.size:offset + length])
+
+### End of class WebhookJournal ###
+
+
+
+def read_journal(path: str|Path) -> Iterator[JournalEntry]:
+    """
+    Read all entries of the journal without opening it (e.g. the journal of a running server).
+    Nothing is written: records are read from the segments up to the first incomplete or broken one
+    (the tail being written, or cut by `WebhookJournal` recovery later).
+
+    :param path: journal directory
+    :return: iterator of entries in order of appending
+    :raises ValueError: if the journal directory doesn't exist
+    """
+    path = Path(path)
+    if not path.is_dir():
+        raise ValueError(f"Journal directory `{path}` not found")
+    for log_path in sorted(path.glob("*.log")):
+        with open(log_path, "rb") as f:
+            while len(header := f.read(_RECORD.size)) == _RECORD.size:
+                size, crc, seq, chat_id, ts = _RECORD.unpack(header)
+                data = f.read(size)
+                if len(data) != size or zlib.crc32(data) != crc:
+                    break
+                yield JournalEntry(seq, chat_id, ts, data)
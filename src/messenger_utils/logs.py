@@ -0,0 +1,101 @@
+"""
+Logging of webhooks processing: levels per event type, sampling and queued sink.
+
+By default every recognized event is logged with `INFO` level, as before. On high load:
+```
+from messenger_utils.logs import configure_logging
+
+configure_logging(levels={"create_message": "DEBUG", "message_callback": None}, sample=100, enqueue=True)
+```
+
+Records are formatted lazily (only if the level is enabled) and have `event_type` and `chat_id` in `extra`
+for structured sinks (e.g. `logger.add(sink, serialize=True)`).
+"""
+
+__all__ = ["LogConfig", "LOG_CONFIG", "configure_logging", "log_event"]
+
+
+import itertools
+import sys
+from dataclasses import dataclass, field
+from typing import Any, TextIO
+from loguru import logger
+
+
+@dataclass(slots=True)
+class LogConfig:
+    """
+    Logging of recognized events.
+    """
+    level: str|None = "INFO"                                        # Level of events records (`None` - not logged)
+    levels: dict[str, str|None] = field(default_factory=dict)       # Event type => level (overrides `level`)
+    sample: int = 1                                                 # Log 1 of N records of every event type
+
+
+# Current config (set by `configure_logging`)
+LOG_CONFIG = LogConfig()
+
+# Event type => counter of records (for sampling)
+_counters: dict[str, itertools.count] = {}
+# ID of queued loguru handler added by `configure_logging`
+_queue_handler: int|None = None
+
+
+
+def configure_logging(
+    *,
+    level: str|None = "INFO",
+    levels: dict[str, str|None]|None = None,
+    sample: int = 1,
+    enqueue: bool = False,
+    sink: TextIO|Any|None = None,
+    sink_level: str = "DEBUG"
+):
+    """
+    Configure logging of webhooks processing.
+
+    :param level: level of recognized events records (`None` - events are not logged)
+    :param levels: event type (`bot_started`, `command`, `create_message`, `message_callback`, ...) => level
+    :param sample: log only 1 of N records of every event type (warnings are not sampled)
+    :param enqueue: replace default loguru handler by the handler writing to the sink from background thread,
+        so the event loop doesn't wait for I/O
+    :param sink: sink of queued handler (stderr by default)
+    :param sink_level: min level of queued handler
+    :raises ValueError: if `sample` is not positive
+    """
+    global _queue_handler
+    if sample < 1:
+        raise ValueError("`sample` must be positive")
+    LOG_CONFIG.level = level
+    LOG_CONFIG.levels = dict(levels or {})
+    LOG_CONFIG.sample = sample
+    _counters.clear()
+    if _queue_handler is not None:
+        logger.remove(_queue_handler)
+        _queue_handler = None
+    if enqueue:
+        try:
+            logger.remove(0)        # Default handler writing to stderr
+        except ValueError:
+            pass
+        _queue_handler = logger.add(sink or sys.stderr, level=sink_level, enqueue=True)
+
+
+
+def log_event(event_type: str, chat_id: int|str|None = None):
+    """
+    Log recognized event by the config (called by receivers).
+
+    :param event_type: event type or kind of message (`command`, `create_message`)
+    :param chat_id: chat of the event (in record's `extra`)
+    """
+    config = LOG_CONFIG
+    level = config.levels.get(event_type, config.level) if config.levels else config.level
+    if level is None:
+        return
+    if config.sample > 1:
+        if (counter := _counters.get(event_type)) is None:
+            counter = _counters[event_type] = itertools.count()
+        if next(counter) % config.sample:
+            return
+    logger.opt(depth=1).log(level, "Event `{event_type}` recognized", event_type=event_type, chat_id=chat_id)
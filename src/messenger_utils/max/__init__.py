@@ -1,13 +1,60 @@
 """
 MAX messenger inits.
+
+Classes are imported on first access, so importing a single module of the package
+doesn't load all the others (and their dependencies).
 """
 MAX_API_URL = "https://platform-api.max.ru"
 
-from .. import logger
-from .max_sender import MaxSender
-from .max_receiver import MaxReceiver
-from .max_keyboard import MaxKeyboard, CallbackButton
-from ..models.max_webhook_event import MaxWebhookEventType, MaxWebhookEvent, MessageCreatedEvent, MessageCallbackEvent, EventTypes
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from loguru import logger
+    from .max_sender import MaxSender
+    from .max_receiver import MaxReceiver
+    from .max_keyboard import MaxKeyboard, MaxKeyboardTemplate, CallbackButton
+    from .max_decoder import MaxWebhookDecoder
+    from .max_pagination import MaxPaginator
+    from .max_server import MaxWebhookServer
+    from .max_commands import CommandsDiff, sync_commands
+    from .max_downloader import AttachmentDownloader
+    from ..models.max_webhook_event import MaxWebhookEventType, MaxWebhookEvent, MessageCreatedEvent, MessageCallbackEvent, EventTypes
+
+
+# Name => module to import it from
+_LAZY_IMPORTS: dict[str, str] = {
+    "logger": "loguru",
+    "MaxSender": "messenger_utils.max.max_sender",
+    "MaxReceiver": "messenger_utils.max.max_receiver",
+    "MaxKeyboard": "messenger_utils.max.max_keyboard",
+    "MaxKeyboardTemplate": "messenger_utils.max.max_keyboard",
+    "CallbackButton": "messenger_utils.max.max_keyboard",
+    "MaxWebhookDecoder": "messenger_utils.max.max_decoder",
+    "MaxPaginator": "messenger_utils.max.max_pagination",
+    "MaxWebhookServer": "messenger_utils.max.max_server",
+    "CommandsDiff": "messenger_utils.max.max_commands",
+    "sync_commands": "messenger_utils.max.max_commands",
+    "AttachmentDownloader": "messenger_utils.max.max_downloader",
+    "MaxWebhookEvent": "messenger_utils.models.max_webhook_event",
+    "MaxWebhookEventType": "messenger_utils.models.max_webhook_event",
+    "MessageCreatedEvent": "messenger_utils.models.max_webhook_event",
+    "MessageCallbackEvent": "messenger_utils.models.max_webhook_event",
+    "EventTypes": "messenger_utils.models.max_webhook_event",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
 
 
 __all__ = [
@@ -16,6 +63,13 @@ __all__ = [
     "MaxSender",
     "MaxReceiver",
     "MaxKeyboard",
+    "MaxKeyboardTemplate",
+    "MaxWebhookDecoder",
+    "MaxPaginator",
+    "MaxWebhookServer",
+    "CommandsDiff",
+    "sync_commands",
+    "AttachmentDownloader",
     "CallbackButton",
     "MaxWebhookEvent",
     "MaxWebhookEventType",
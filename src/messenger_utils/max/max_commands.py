@@ -0,0 +1,122 @@
+"""
+Declarative bot commands: the commands list from a file is synced with the bot by one PATCH request.
+
+Supported files (`.toml`, `.json`, `.yaml` / `.yml` - needs `pyyaml` package):
+```
+# commands.toml
+[[commands]]
+name = "start"
+description = "Start the bot"
+
+# or the short form: name => description
+[commands]
+start = "Start the bot"
+```
+"""
+
+__all__ = ["CommandsDiff", "load_commands", "diff_commands", "sync_commands"]
+
+
+import json
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from messenger_utils.max.max_sender import MaxSender
+
+
+@dataclass
+class CommandsDiff:
+    """
+    Difference between current and desired commands of the bot.
+    """
+    added: list[dict[str, str]] = field(default_factory=list)
+    removed: list[dict[str, str]] = field(default_factory=list)
+    changed: list[tuple[dict[str, str], dict[str, str]]] = field(default_factory=list)     # (current, desired)
+    reordered: bool = False         # same commands in other order (order of the bot's menu)
+
+
+    @property
+    def has_changes(self) -> bool:
+        """Commands list must be rewritten."""
+        return bool(self.added or self.removed or self.changed or self.reordered)
+
+
+
+def load_commands(path: str|Path) -> list[dict[str, str]]:
+    """
+    Load commands list from TOML, JSON or YAML file.
+
+    :param path: file path (format by extension)
+    :return: commands in format `[{"name": <name>, "description": <description>}, ...]`
+    :raises ValueError: if the format is unknown or commands are invalid
+    """
+    path = Path(path)
+    match path.suffix.lower():
+        case ".toml":
+            data: Any = tomllib.loads(path.read_text(encoding="utf-8"))
+        case ".json":
+            data = json.loads(path.read_text(encoding="utf-8"))
+        case ".yaml" | ".yml":
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML files require `pyyaml` package (`pip install messenger-utils[yaml]`)") from None
+            data = yaml.safe_load(path.read_text(encoding="utf-8"))
+        case _:
+            raise ValueError(f"Unknown commands file format: `{path.suffix}` (toml, json, yaml expected)")
+    if isinstance(data, dict) and "commands" in data:
+        data = data["commands"]
+    if isinstance(data, dict):
+        data = [{"name": name, "description": description} for name, description in data.items()]
+    if not isinstance(data, list):
+        raise ValueError("Commands must be a list or a mapping of name => description")
+    commands: list[dict[str, str]] = []
+    for item in data:
+        if not isinstance(item, dict) or not item.get("name") or not item.get("description"):
+            raise ValueError(f"Command must have `name` and `description`: {item!r}")
+        commands.append({"name": str(item["name"]).lstrip("/"), "description": str(item["description"])})
+    names = [command["name"] for command in commands]
+    if duplicates := sorted({name for name in names if names.count(name) > 1}):
+        raise ValueError(f"Duplicated commands: {', '.join(duplicates)}")
+    return commands
+
+
+
+def diff_commands(current: list[dict[str, str]], desired: list[dict[str, str]]) -> CommandsDiff:
+    """
+    Compare commands lists.
+
+    :param current: commands of the bot
+    :param desired: commands to set
+    :return: difference
+    """
+    current_by_name = {command["name"]: command for command in current}
+    desired_by_name = {command["name"]: command for command in desired}
+    diff = CommandsDiff(
+        added=[command for command in desired if command["name"] not in current_by_name],
+        removed=[command for command in current if command["name"] not in desired_by_name],
+        changed=[
+            (current_by_name[command["name"]], command) for command in desired
+            if command["name"] in current_by_name and current_by_name[command["name"]].get("description") != command["description"]
+        ]
+    )
+    if not (diff.added or diff.removed):
+        diff.reordered = [c["name"] for c in current] != [c["name"] for c in desired]
+    return diff
+
+
+
+async def sync_commands(sender: MaxSender, commands: list[dict[str, str]], *, dry_run: bool = False) -> CommandsDiff:
+    """
+    Set commands of the bot: one GET request and one PATCH request (only if there are changes).
+
+    :param sender: MAX sender
+    :param commands: desired commands
+    :param dry_run: only compute the difference
+    :return: difference between the bot's commands and desired ones
+    """
+    diff = diff_commands(await sender.get_bot_commands(), commands)
+    if diff.has_changes and not dry_run:
+        await sender.update_all_commands(commands=commands)
+    return diff
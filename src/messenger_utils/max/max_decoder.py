@@ -0,0 +1,306 @@
+"""
+Compiled decoder of MAX webhook bodies.
+
+Decodes raw webhook bytes straight to `MaxWebhookEvent` / `MessageCreatedEvent` / `MessageCallbackEvent`
+objects in one validating pass, instead of `json.loads` + structural `match` of `MaxReceiver.parse_webhook`.
+
+Backends:
+- `pydantic`: pydantic-core schema (always available through `pydantic-settings` dependency).
+- `msgspec`: msgspec structs (used only if `msgspec` package is installed).
+"""
+
+__all__ = ["DecoderBackends", "MaxWebhookDecoder"]
+
+
+from typing import Annotated, Any, Literal, TypedDict
+from pydantic import AliasPath, Field, TypeAdapter, ValidationError
+import pydantic_core
+from messenger_utils.models.max_webhook_event import *
+
+try:
+    import msgspec
+except ImportError:     # msgspec is optional
+    msgspec = None
+
+
+DecoderBackends = Literal["auto", "pydantic", "msgspec"]
+
+
+#
+# Wire schema for pydantic backend.
+# Nested fields of webhook body are flattened to the event fields by `AliasPath`.
+#
+
+class _AttachmentWire(TypedDict):
+    attachment_type: Annotated[str, Field(validation_alias="type")]
+    url: Annotated[str, Field(validation_alias=AliasPath("payload", "url"))]
+    token: Annotated[str, Field(validation_alias=AliasPath("payload", "token"))]
+
+
+class _UserEventWire(TypedDict):
+    event_type: Annotated[
+        Literal["bot_started", "bot_stopped", "dialog_cleared", "dialog_removed"],
+        Field(validation_alias="update_type")
+    ]
+    timestamp: int
+    chat_id: int
+    user_id: Annotated[int, Field(validation_alias=AliasPath("user", "user_id"))]
+    user_name: Annotated[str, Field(validation_alias=AliasPath("user", "name"))]
+    user_is_bot: Annotated[bool, Field(validation_alias=AliasPath("user", "is_bot"))]
+
+
+class _MessageCreatedWire(TypedDict):
+    event_type: Annotated[Literal["message_created"], Field(validation_alias="update_type")]
+    timestamp: int
+    chat_id: Annotated[int, Field(validation_alias=AliasPath("message", "recipient", "chat_id"))]
+    recipient_id: Annotated[int, Field(validation_alias=AliasPath("message", "recipient", "user_id"))]
+    user_id: Annotated[int, Field(validation_alias=AliasPath("message", "sender", "user_id"))]
+    user_name: Annotated[str, Field(validation_alias=AliasPath("message", "sender", "name"))]
+    user_is_bot: Annotated[bool, Field(validation_alias=AliasPath("message", "sender", "is_bot"))]
+    text: Annotated[str, Field(validation_alias=AliasPath("message", "body", "text"))]
+    attachments: Annotated[
+        list[_AttachmentWire],
+        Field(validation_alias=AliasPath("message", "body", "attachments"), default_factory=list)
+    ]
+
+
+class _MessageCallbackWire(TypedDict):
+    event_type: Annotated[Literal["message_callback"], Field(validation_alias="update_type")]
+    timestamp: int
+    chat_id: Annotated[int, Field(validation_alias=AliasPath("message", "recipient", "chat_id"))]
+    user_id: Annotated[int, Field(validation_alias=AliasPath("callback", "user", "user_id"))]
+    user_name: Annotated[str, Field(validation_alias=AliasPath("callback", "user", "name"))]
+    user_is_bot: Annotated[bool, Field(validation_alias=AliasPath("callback", "user", "is_bot"))]
+    callback_id: Annotated[str, Field(validation_alias=AliasPath("callback", "callback_id"))]
+    payload: Annotated[str, Field(validation_alias=AliasPath("callback", "payload"))]
+
+
+_WIRE_ADAPTER: TypeAdapter = TypeAdapter(
+    Annotated[
+        _UserEventWire | _MessageCreatedWire | _MessageCallbackWire,
+        Field(discriminator="event_type")
+    ]
+)
+
+
+#
+# Wire schema for msgspec backend (nested structs, mirroring the webhook body).
+#
+
+if msgspec is not None:
+
+    class _MsUser(msgspec.Struct):
+        user_id: int
+        name: str
+        is_bot: bool
+
+    class _MsAttachmentPayload(msgspec.Struct):
+        url: str
+        token: str
+
+    class _MsAttachment(msgspec.Struct):
+        type: str
+        payload: _MsAttachmentPayload
+
+    class _MsRecipient(msgspec.Struct):
+        chat_id: int
+        user_id: int|None = None
+
+    class _MsBody(msgspec.Struct):
+        text: str
+        attachments: list[_MsAttachment]|None = None
+
+    class _MsMessage(msgspec.Struct):
+        recipient: _MsRecipient
+        sender: _MsUser|None = None
+        body: _MsBody|None = None
+
+    class _MsCallback(msgspec.Struct):
+        callback_id: str
+        payload: str
+        user: _MsUser
+
+    class _MsUserEvent(msgspec.Struct, tag_field="update_type"):
+        timestamp: int
+        chat_id: int
+        user: _MsUser
+
+    class _MsBotStarted(_MsUserEvent, tag="bot_started"):
+        pass
+
+    class _MsBotStopped(_MsUserEvent, tag="bot_stopped"):
+        pass
+
+    class _MsDialogCleared(_MsUserEvent, tag="dialog_cleared"):
+        pass
+
+    class _MsDialogRemoved(_MsUserEvent, tag="dialog_removed"):
+        pass
+
+    class _MsMessageCreated(msgspec.Struct, tag_field="update_type", tag="message_created"):
+        timestamp: int
+        message: _MsMessage
+
+    class _MsMessageCallback(msgspec.Struct, tag_field="update_type", tag="message_callback"):
+        timestamp: int
+        message: _MsMessage
+        callback: _MsCallback
+
+    _MsWire = _MsBotStarted | _MsBotStopped | _MsDialogCleared | _MsDialogRemoved | _MsMessageCreated | _MsMessageCallback
+    _MS_DECODER = msgspec.json.Decoder(_MsWire)
+    _MS_RAW_DECODER = msgspec.json.Decoder()
+
+
+
+### Class MaxWebhookDecoder ###
+
+class MaxWebhookDecoder:
+    """
+    Schema-compiled decoder of MAX webhook bodies.
+
+    Usage:
+    ```
+    decoder = MaxWebhookDecoder()
+    event = decoder.decode(await request.body())
+    ```
+    """
+
+    def __init__(self, *, backend: DecoderBackends = "auto", keep_full_body: bool = True):
+        """
+        Init decoder.
+
+        :param backend: `pydantic`, `msgspec` or `auto` (msgspec if installed, pydantic otherwise)
+        :param keep_full_body: if `False` - `full_body` of events is empty dict and the body is decoded
+            in a single pass without building intermediate dicts
+        :raises ValueError: if `msgspec` backend requested but package is not installed
+        """
+        if backend == "auto":
+            backend = "pydantic" if msgspec is None else "msgspec"
+        if backend == "msgspec" and msgspec is None:
+            raise ValueError("`msgspec` backend requested, but `msgspec` package is not installed")
+        self.backend: DecoderBackends = backend
+        self.keep_full_body: bool = keep_full_body
+
+
+
+    def decode(self, raw: bytes|str) -> MaxWebhookEventType:
+        """
+        Decode raw webhook body to the event object.
+
+        :param raw: JSON body of webhook request
+        :return: Parsed webhook event object
+        :raises ValueError if the webhook body is not valid
+        """
+        if self.backend == "msgspec":
+            return self._decode_msgspec(raw)
+        return self._decode_pydantic(raw)
+
+
+
+    def decode_dict(self, webhook_data: dict[str, Any]) -> MaxWebhookEventType:
+        """
+        Decode already loaded webhook body.
+
+        :param webhook_data: webhook body as dict
+        :return: Parsed webhook event object
+        :raises ValueError if the webhook body is not valid
+        """
+        try:
+            if self.backend == "msgspec":
+                wire = msgspec.convert(webhook_data, _MsWire)
+                return self._from_msgspec(wire, webhook_data)
+            return self._from_wire(_WIRE_ADAPTER.validate_python(webhook_data), webhook_data)
+        except (ValidationError, ValueError) as exc:
+            raise ValueError("Cannot parse webhook body") from exc
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _decode_pydantic(self, raw: bytes|str) -> MaxWebhookEventType:
+        """Decode webhook by pydantic-core schema."""
+        try:
+            if self.keep_full_body:
+                full_body = pydantic_core.from_json(raw)
+                return self._from_wire(_WIRE_ADAPTER.validate_python(full_body), full_body)
+            return self._from_wire(_WIRE_ADAPTER.validate_json(raw), {})
+        except ValueError as exc:
+            raise ValueError("Cannot parse webhook body") from exc
+
+
+
+    def _decode_msgspec(self, raw: bytes|str) -> MaxWebhookEventType:
+        """Decode webhook by msgspec structs."""
+        try:
+            # Typed decoding straight from bytes is faster than `msgspec.convert` of the loaded dict
+            full_body = _MS_RAW_DECODER.decode(raw) if self.keep_full_body else {}
+            return self._from_msgspec(_MS_DECODER.decode(raw), full_body)
+        except (msgspec.ValidationError, msgspec.DecodeError) as exc:
+            raise ValueError("Cannot parse webhook body") from exc
+
+
+
+    @staticmethod
+    def _from_wire(wire: dict[str, Any], full_body: dict) -> MaxWebhookEventType:
+        """Build event object from validated pydantic wire dict."""
+        match wire["event_type"]:
+            case "message_created":
+                wire["attachments"] = [Attachment(**a) for a in wire["attachments"]]
+                return MessageCreatedEvent(**wire, full_body=full_body)
+            case "message_callback":
+                return MessageCallbackEvent(**wire, full_body=full_body)
+            case _:
+                return MaxWebhookEvent(**wire, full_body=full_body)
+
+
+
+    @staticmethod
+    def _from_msgspec(wire: Any, full_body: dict) -> MaxWebhookEventType:
+        """Build event object from decoded msgspec struct."""
+        match wire:
+            case _MsMessageCreated(message=_MsMessage(
+                recipient=_MsRecipient(user_id=int()), sender=_MsUser() as user, body=_MsBody() as body
+            ) as msg):
+                return MessageCreatedEvent(
+                    "message_created",
+                    chat_id = msg.recipient.chat_id,
+                    user_id = user.user_id,
+                    user_name = user.name,
+                    user_is_bot = user.is_bot,
+                    timestamp = wire.timestamp,
+                    full_body = full_body,
+                    text = body.text,
+                    recipient_id = msg.recipient.user_id,
+                    attachments = [
+                        Attachment(a.type, url=a.payload.url, token=a.payload.token)
+                        for a in body.attachments or []
+                    ]
+                )
+            case _MsMessageCallback():
+                user = wire.callback.user
+                return MessageCallbackEvent(
+                    "message_callback",
+                    chat_id = wire.message.recipient.chat_id,
+                    user_id = user.user_id,
+                    user_name = user.name,
+                    user_is_bot = user.is_bot,
+                    timestamp = wire.timestamp,
+                    full_body = full_body,
+                    callback_id = wire.callback.callback_id,
+                    payload = wire.callback.payload
+                )
+            case _MsUserEvent():
+                return MaxWebhookEvent(
+                    wire.__struct_config__.tag,
+                    chat_id = wire.chat_id,
+                    user_id = wire.user.user_id,
+                    user_name = wire.user.name,
+                    user_is_bot = wire.user.is_bot,
+                    timestamp = wire.timestamp,
+                    full_body = full_body
+                )
+            case _:
+                raise ValueError("Cannot parse webhook body")
+
+### End of class MaxWebhookDecoder ###
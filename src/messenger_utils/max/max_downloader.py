@@ -0,0 +1,188 @@
+"""
+Streaming download of attachments of received messages.
+
+Usage:
+```
+async with AttachmentDownloader(sender.client, max_size=20 * 2**20) as downloader:
+    results = await downloader.download_all(event.attachments, "downloads/")
+```
+"""
+
+__all__ = ["DownloadResult", "AttachmentDownloader"]
+
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+import httpx
+from messenger_utils.sender import Sender
+from messenger_utils.models.max_webhook_event import Attachment
+
+
+# Consumer of downloaded chunks
+type ChunkConsumer = Callable[[bytes], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class DownloadResult:
+    """
+    Downloaded attachment.
+    """
+    url: str
+    size: int
+    sha256: str
+    path: Path|None = None          # `None` if streamed to consumer
+    content_type: str|None = None
+
+
+
+### Class AttachmentDownloader ###
+
+class AttachmentDownloader:
+    """
+    Downloader of attachments over pooled HTTP client, with size limit and bounded concurrency.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient|None = None, *,
+        concurrency: int = 8,
+        max_size: int|None = 50 * 2**20,
+        chunk_size: int = 64 * 1024,
+        timeout: float = 60.0
+    ):
+        """
+        Init downloader.
+
+        :param client: shared HTTP client (e.g. `sender.client`), own pooled client is opened if not provided
+        :param concurrency: max simultaneous downloads
+        :param max_size: max size of attachment in bytes (not limited if `None`)
+        :param chunk_size: size of chunks read from the network
+        :param timeout: timeout of own client (seconds)
+        """
+        self.client: httpx.AsyncClient = client or httpx.AsyncClient(
+            transport=Sender.default_transport,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=timeout,
+            follow_redirects=True
+        )
+        self._own_client: bool = client is None
+        self.max_size: int|None = max_size
+        self.chunk_size: int = chunk_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+
+
+    async def aclose(self):
+        """Close own HTTP client."""
+        if self._own_client:
+            await self.client.aclose()
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+
+    async def download(
+        self,
+        attachment: Attachment|str,
+        destination: str|Path|ChunkConsumer, *,
+        filename: str|None = None,
+        sha256: str|None = None
+    ) -> DownloadResult:
+        """
+        Download attachment to the directory, file or async consumer of chunks.
+        Partially downloaded file is removed on error.
+
+        :param attachment: attachment of the message or URL
+        :param destination: directory (existing), file path or async function getting chunks
+        :param filename: file name in the directory (by URL and content type if not provided)
+        :param sha256: expected SHA-256 (hex) of the content
+        :return: download info
+        :raises ValueError: if the size exceeds the limit or the checksum doesn't match
+        :raises httpx.HTTPError: on network errors and error responses
+        """
+        url = attachment.url if isinstance(attachment, Attachment) else attachment
+        async with self._semaphore, self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").partition(";")[0] or None
+            if self.max_size is not None and int(response.headers.get("Content-Length") or 0) > self.max_size:
+                raise ValueError(f"Attachment `{url}` exceeds size limit of {self.max_size} bytes")
+            path: Path|None = None
+            consumer: ChunkConsumer
+            if callable(destination):
+                consumer = destination
+                file = None
+            else:
+                path = Path(destination)
+                if path.is_dir():
+                    path = path / (filename or self._filename(url, content_type))
+                file = open(path.with_name(path.name + ".part"), "wb")
+                consumer = lambda chunk: asyncio.to_thread(file.write, chunk)
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    size += len(chunk)
+                    if self.max_size is not None and size > self.max_size:
+                        raise ValueError(f"Attachment `{url}` exceeds size limit of {self.max_size} bytes")
+                    digest.update(chunk)
+                    await consumer(chunk)
+                if sha256 is not None and digest.hexdigest() != sha256.lower():
+                    raise ValueError(f"Attachment `{url}`: checksum mismatch")
+            except BaseException:
+                if file is not None:
+                    file.close()
+                    os.unlink(file.name)
+                raise
+            if file is not None and path is not None:
+                file.close()
+                os.replace(file.name, path)
+        return DownloadResult(url, size, digest.hexdigest(), path, content_type)
+
+
+
+    async def download_all(
+        self,
+        attachments: Iterable[Attachment|str],
+        directory: str|Path, *,
+        checksums: dict[str, str]|None = None
+    ) -> list[DownloadResult|Exception]:
+        """
+        Download attachments (e.g. of one message) to the directory in parallel.
+
+        :param attachments: attachments or URLs
+        :param directory: existing directory
+        :param checksums: URL => expected SHA-256
+        :return: results in order of attachments (exception for failed ones)
+        """
+        checksums = checksums or {}
+        return await asyncio.gather(
+            *(
+                self.download(a, directory, sha256=checksums.get(a.url if isinstance(a, Attachment) else a))
+                for a in attachments
+            ),
+            return_exceptions=True
+        )
+
+
+
+    #  PRIVATE METHODS
+
+
+    @staticmethod
+    def _filename(url: str, content_type: str|None) -> str:
+        """Unique file name by URL (attachment URLs have no file names)."""
+        extension = (mimetypes.guess_extension(content_type) if content_type else None) or ""
+        return hashlib.sha1(url.encode()).hexdigest()[:16] + extension
+
+### End of class AttachmentDownloader ###
@@ -4,14 +4,26 @@ Keyboard construction classes for MAX inline keyboards.
 
 import json
 from enum import Enum
-from dataclasses import dataclass, field, asdict
+from string import Template
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
 
 __all__ = [
-    "BtnTypes", "BtnIntents", "ButtonUnion", "MaxKeyboard",
+    "BtnTypes", "BtnIntents", "ButtonUnion", "MaxKeyboard", "MaxKeyboardTemplate",
     "CallbackButton", "LinkButton", "RequestContactButton", "RequestGeoLocationButton", "OpenAppButton", "MessageButton"
 ]
 
 
+# MAX API limits of inline keyboard
+
+MAX_PAYLOAD_LENGTH = 1024       # `payload` of callback button
+MAX_URL_LENGTH = 2048           # `url` of link button
+MAX_BUTTONS = 210               # buttons in keyboard
+MAX_ROWS = 30                   # rows in keyboard
+MAX_ROW_BUTTONS = 7             # buttons in row...
+MAX_ROW_WIDE_BUTTONS = 3        # ...or if the row contains link, open_app, request_geo_location, request_contact buttons
+
+
 # Button enums
 
 
@@ -57,16 +69,57 @@ class BaseButton:
     text:       str
 
     def to_dict(self) -> dict:
-        """Convert the button to a JSON-serializable dictionary."""
-        btn_dict = asdict(self)
-        # remove keys with `None` values
-        btn_dict = {k: v for k, v in btn_dict.items() if v is not None}
-        return btn_dict
+        """Convert the button to a JSON-serializable dictionary (MAX API format)."""
+        serializer = _serializers.get(type(self))
+        if serializer is None:
+            serializer = _serializers[type(self)] = _compile_serializer(type(self))
+        return serializer(self)
 
     def to_json(self) -> str:
         """Convert the button to a JSON string."""
-        btn_dict = self.to_dict()
-        return json.dumps(btn_dict, default=json_enum_encoder).replace("btn_type", "type")
+        return json.dumps(self.to_dict())
+
+    def validate(self):
+        """
+        Check the button against MAX API limits.
+
+        :raises ValueError: if the button exceeds limits
+        """
+        payload = getattr(self, "payload", None)
+        if payload is not None and len(payload) > MAX_PAYLOAD_LENGTH:
+            raise ValueError(f"Button `{self.text}`: payload is longer than {MAX_PAYLOAD_LENGTH} chars")
+        url = getattr(self, "url", None)
+        if url is not None and len(url) > MAX_URL_LENGTH:
+            raise ValueError(f"Button `{self.text}`: url is longer than {MAX_URL_LENGTH} chars")
+
+
+
+# Compiled serializers of button classes: button class => function(button) -> dict
+
+_serializers: dict[type, Callable[[BaseButton], dict]] = {}
+
+
+def _compile_serializer(cls: type) -> Callable[[BaseButton], dict]:
+    """
+    Generate function converting button of the class to MAX API dict directly:
+    `btn_type` => `type`, enums => values, fields with `None` values are skipped.
+    """
+    lines = [
+        "def to_dict(self):",
+        f"    d = {{'type': {str(cls.btn_type)!r}, 'text': self.text}}"
+    ]
+    for f in fields(cls):
+        if f.name in ("btn_type", "text"):
+            continue
+        value = f"self.{f.name}"
+        if isinstance(f.type, type) and issubclass(f.type, Enum):
+            value += ".value"
+        lines.append(f"    if self.{f.name} is not None:")
+        lines.append(f"        d[{f.name!r}] = {value}")
+    lines.append("    return d")
+    namespace: dict = {}
+    exec("\n".join(lines), {}, namespace)     # pylint: disable=exec-used
+    return namespace["to_dict"]
 
 
 
@@ -134,6 +187,7 @@ class MaxKeyboard:
         Allows to init keyboard by single button, buttons list (align vertical) and 2d-nested list of buttons.
 
         :param btn: object of one of ButtonUnion classes, list of ButtonUnion objects or 2d-nested list of ButtonUnion objects
+        :raises ValueError: if the keyboard exceeds MAX API limits
         """
         self.buttons: list[list[ButtonUnion]] = []
         match btn:
@@ -141,7 +195,8 @@ class MaxKeyboard:
                 pass
             # Nested list
             case list() as lst if lst and isinstance(lst[0], list):
-                self.buttons = btn
+                for row in lst:
+                    self.add_row(row)
             # Flat list
             case list() as lst:
                 for item in lst:
@@ -158,33 +213,125 @@ class MaxKeyboard:
         
         :param button: Button object
         :param row_idx: Row index to add the button to. If -1, adds a new row with this button.
+        :raises ValueError: if the keyboard exceeds MAX API limits
         """
         if row_idx == -1 or row_idx >= len(self.buttons):
-            self.buttons.append([button])
+            self.add_row([button])
         else:
+            button.validate()
+            self._check_row(self.buttons[row_idx] + [button])
+            self._check_count(1, 0)
             self.buttons[row_idx].append(button)
 
 
 
     def add_row(self, btn_row: list[ButtonUnion]):
-        """Add a row of buttons to the keyboard."""
+        """
+        Add a row of buttons to the keyboard.
+
+        :raises ValueError: if the keyboard exceeds MAX API limits
+        """
+        for button in btn_row:
+            button.validate()
+        self._check_row(btn_row)
+        self._check_count(len(btn_row), 1)
         self.buttons.append(btn_row)
 
 
 
     def to_dict(self) -> dict:
         """Convert the keyboard to a JSON-serializable dictionary."""
-        keyboard_data = []
-        for row in self.buttons:
-            row_data = []
-            for button in row:
-                btn_dict = button.to_dict()
-                row_data.append(btn_dict)
-            keyboard_data.append(row_data)
-        return {"buttons": keyboard_data}
+        return {"buttons": [[button.to_dict() for button in row] for row in self.buttons]}
 
 
 
     def to_json(self) -> str:
         """Convert the keyboard to a JSON string."""
-        return json.dumps(self.to_dict(), default=json_enum_encoder).replace("btn_type", "type")
+        return json.dumps(self.to_dict())
+
+
+
+    #  PRIVATE METHODS
+
+
+    @staticmethod
+    def _check_row(row: list[ButtonUnion]):
+        """Check count of buttons in the row."""
+        wide = any(isinstance(b, (LinkButton, OpenAppButton, RequestGeoLocationButton, RequestContactButton)) for b in row)
+        limit = MAX_ROW_WIDE_BUTTONS if wide else MAX_ROW_BUTTONS
+        if len(row) > limit:
+            raise ValueError(f"Too many buttons in keyboard row: {len(row)} (max {limit})")
+
+
+
+    def _check_count(self, new_buttons: int, new_rows: int):
+        """Check count of rows and buttons in the keyboard after adding new ones."""
+        if len(self.buttons) + new_rows > MAX_ROWS:
+            raise ValueError(f"Too many rows in keyboard (max {MAX_ROWS})")
+        if sum(len(row) for row in self.buttons) + new_buttons > MAX_BUTTONS:
+            raise ValueError(f"Too many buttons in keyboard (max {MAX_BUTTONS})")
+
+
+
+class MaxKeyboardTemplate:
+    """
+    Keyboard with `$placeholders` in buttons' text, payload or url, rendered per user.
+
+    The keyboard is serialized once; rendering copies only the rows with placeholders
+    and formats only the templated values:
+    ```
+    template = MaxKeyboardTemplate(MaxKeyboard([
+        CallbackButton(text="Pay", payload="pay:$order_id"),
+        LinkButton(text="Details", url="https://shop.example/orders/${order_id}")
+    ]))
+    await sender.send_message("Your order", target=chat_id, keyboard=template.render(order_id=42))
+    ```
+    Placeholders have `string.Template` syntax (`$name` or `${name}`, literal `$` is `$$`),
+    so braces (e.g. of JSON payloads) are kept as is.
+    """
+
+    def __init__(self, keyboard: MaxKeyboard):
+        """
+        Init template.
+
+        :param keyboard: keyboard with placeholders
+        """
+        self._skeleton: list[list[dict]] = keyboard.to_dict()["buttons"]
+        # Templated values: row => [(col, [(key, template), ...]), ...]
+        self._slots: dict[int, list[tuple[int, list[tuple[str, Template]]]]] = {}
+        for r, row in enumerate(self._skeleton):
+            for c, btn in enumerate(row):
+                templated = [
+                    (key, template) for key, value in btn.items()
+                    if isinstance(value, str) and "$" in value and (template := Template(value)).get_identifiers()
+                ]
+                if templated:
+                    self._slots.setdefault(r, []).append((c, templated))
+
+
+
+    def render(self, **values) -> dict:
+        """
+        Render keyboard payload for `MaxSender.send_message`.
+
+        :param values: placeholders values
+        :return: JSON-serializable dict of the keyboard (static buttons are shared between renders, don't modify them)
+        :raises KeyError: if value of placeholder is not provided
+        :raises ValueError: if rendered payload or url exceeds MAX API limits
+        """
+        rows = self._skeleton.copy()
+        for r, slots in self._slots.items():
+            row = rows[r] = rows[r].copy()
+            for c, templated in slots:
+                btn = row[c] = row[c].copy()
+                for key, template in templated:
+                    btn[key] = template.substitute(values)
+                if len(btn.get("payload") or "") > MAX_PAYLOAD_LENGTH or len(btn.get("url") or "") > MAX_URL_LENGTH:
+                    raise ValueError(f"Button `{btn['text']}`: rendered payload or url exceeds MAX API limits")
+        return {"buttons": rows}
+
+
+
+    def render_json(self, **values) -> str:
+        """Render keyboard to JSON string."""
+        return json.dumps(self.render(**values))
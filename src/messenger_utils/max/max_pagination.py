@@ -0,0 +1,155 @@
+"""
+Paginated keyboards for long lists of items.
+
+Only the current page of the list is loaded and rendered; the page number is encoded in the payload
+of navigation buttons (`<name>:<page>`), and the paginator processes the navigation callbacks itself.
+"""
+
+__all__ = ["PageSource", "MaxPaginator"]
+
+
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, Generic, TypeVar
+from messenger_utils.max.max_keyboard import *
+from messenger_utils.max.max_keyboard import MAX_ROWS
+from messenger_utils.max.max_receiver import MaxReceiver
+from messenger_utils.models.max_webhook_event import MessageCallbackEvent
+
+
+T = TypeVar("T")
+
+# Items source: a sequence (sliced by page) or async function `(offset, limit) -> items`
+type PageSource[T] = Sequence[T] | Callable[[int, int], Awaitable[Sequence[T]]]
+
+
+
+### Class MaxPaginator ###
+
+class MaxPaginator(Generic[T]):
+    """
+    Paginated keyboard builder.
+
+    Usage:
+    ```
+    async def load_orders(offset: int, limit: int) -> list[Order]:
+        return await db.fetch_orders(offset=offset, limit=limit)
+
+    orders = MaxPaginator(
+        "orders", load_orders,
+        item_button=lambda o: CallbackButton(text=o.title, payload=f"order:{o.id}"),
+        text="Your orders:"
+    )
+    await sender.send_message(orders.text, target=chat_id, keyboard=await orders.render(0))
+    ```
+    Page flips are answered by `MaxSender.answer_callback` with `sender` passed to the paginator
+    or to `process_webhook` as `sender` kwarg.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: PageSource[T], *,
+        item_button: Callable[[T], ButtonUnion],
+        page_size: int = 10,
+        columns: int = 1,
+        text: str|None = None,
+        prev_text: str = "◀",
+        next_text: str = "▶",
+        sender: Any = None,
+        on_page: Callable[..., Awaitable[Any]]|None = None
+    ):
+        """
+        Init paginator and register its navigation callback route in `MaxReceiver`.
+
+        :param name: unique name of paginator (route of navigation buttons' payload)
+        :param source: items sequence or async function `(offset, limit) -> items`
+        :param item_button: function creating button for the item
+        :param page_size: items per page
+        :param columns: buttons per keyboard row
+        :param text: new message text on page flip (the text of the message is kept if `None`)
+        :param prev_text, next_text: navigation buttons' text
+        :param sender: `MaxSender` to answer navigation callbacks
+        :param on_page: custom page flip handler `(event, keyboard, page, **kwargs)` instead of answering callback
+        :raises ValueError: if page doesn't fit MAX keyboard limits
+        """
+        if -(-page_size // columns) + 1 > MAX_ROWS:
+            raise ValueError(f"Page of {page_size} items in {columns} columns exceeds {MAX_ROWS} keyboard rows")
+        self.name: str = name
+        self.source: PageSource[T] = source
+        self.item_button: Callable[[T], ButtonUnion] = item_button
+        self.page_size: int = page_size
+        self.columns: int = columns
+        self.text: str|None = text
+        self.prev_text: str = prev_text
+        self.next_text: str = next_text
+        self.sender: Any = sender
+        self.on_page: Callable[..., Awaitable[Any]]|None = on_page
+        MaxReceiver.callback_route(name)(self._navigate)
+
+
+
+    async def render(self, page: int = 0) -> MaxKeyboard:
+        """
+        Render keyboard of the page: items buttons and navigation row.
+
+        :param page: page number (from 0), limited by the pages count of the sequence source
+        :return: keyboard of the page
+        """
+        page = self._clamp(page)
+        offset = page * self.page_size
+        # One item over the page tells if there is the next page
+        pages: int|None = self._pages()
+        if isinstance(self.source, Sequence):
+            items = self.source[offset:offset + self.page_size + 1]
+        else:
+            items = await self.source(offset, self.page_size + 1)
+            pages = None
+        has_next = len(items) > self.page_size
+        buttons = [self.item_button(item) for item in items[:self.page_size]]
+        keyboard = MaxKeyboard()
+        for i in range(0, len(buttons), self.columns):
+            keyboard.add_row(buttons[i:i + self.columns])
+        nav: list[ButtonUnion] = []
+        if page > 0:
+            nav.append(CallbackButton(text=self.prev_text, payload=f"{self.name}:{page - 1}"))
+        if pages is not None and pages > 1:
+            nav.append(CallbackButton(text=f"{page + 1}/{pages}", payload=f"{self.name}:{page}"))
+        if has_next:
+            nav.append(CallbackButton(text=self.next_text, payload=f"{self.name}:{page + 1}"))
+        if nav:
+            keyboard.add_row(nav)
+        return keyboard
+
+
+
+    async def _navigate(self, event: MessageCallbackEvent, **kwargs):
+        """Navigation callback handler."""
+        try:
+            page = int(event.payload.partition(":")[2])
+        except ValueError:
+            return
+        page = self._clamp(page)
+        keyboard = await self.render(page)
+        if self.on_page is not None:
+            await self.on_page(event, keyboard, page, **kwargs)
+            return
+        sender = self.sender if self.sender is not None else kwargs.get("sender")
+        if sender is not None:
+            await sender.answer_callback(event.callback_id, text=self.text, keyboard=keyboard)
+
+
+
+    def _pages(self) -> int|None:
+        """Pages count of the sequence source (unknown for async source)."""
+        if isinstance(self.source, Sequence):
+            return max(-(-len(self.source) // self.page_size), 1)
+        return None
+
+
+
+    def _clamp(self, page: int) -> int:
+        """Page number limited to existing pages (stale or forged payloads)."""
+        pages = self._pages()
+        return max(min(page, pages - 1) if pages is not None else page, 0)
+
+### End of class MaxPaginator ###
@@ -2,10 +2,29 @@
 Webhooks requests functionality for MAX API.
 """
 
+import asyncio
+import itertools
+import time
+from collections.abc import Callable
 from typing import Any, get_args
+from messenger_utils import metrics, tracing
 from messenger_utils.receiver import Receiver
+from messenger_utils.journal import WebhookJournal
+from messenger_utils.state import FSMContext
 from messenger_utils.models.max_webhook_event import *
-from . import logger
+from .max_decoder import MaxWebhookDecoder
+from loguru import logger
+from messenger_utils.logs import log_event
+
+
+_decoder: MaxWebhookDecoder|None = None
+
+def _default_decoder() -> MaxWebhookDecoder:
+    """Shared decoder for `MaxReceiver.from_raw` (schema is compiled once)."""
+    global _decoder
+    if _decoder is None:
+        _decoder = MaxWebhookDecoder()
+    return _decoder
 
 
 
@@ -16,21 +35,114 @@ class MaxReceiver(Receiver[MaxWebhookEventType]):
     Webhooks requests processing for MAX API.
     """
 
-    def __init__(self, webhook_data: dict[str, Any], bot_token: str|None = None):
+    def __init__(
+        self,
+        webhook_data: dict[str, Any],
+        bot_token: str|None = None, *,
+        webhook_event: MaxWebhookEventType|None = None
+    ):
         """
         Init MaxReceiver object.
         
         :param webhook_data: JSON-formatted message from messenger's webhook API
+        :param webhook_event: already parsed event (if provided, the body is not checked and parsed again)
         :raises ValueError if the webhook body is not valid
         """
         super().__init__(webhook_data, bot_token)
+        self.webhook_event: MaxWebhookEventType | None  = webhook_event
+        if webhook_event is not None:
+            return
         # Base check for MAX webhook body is valid
         if (update_type := webhook_data.get("update_type")) is None:
             raise ValueError("No `update_type` field in webhook body")
         valid_events = get_args(EventTypes)
         if update_type not in valid_events:
             raise ValueError("Unknown `update_type` value of webhook")
-        self.webhook_event: MaxWebhookEventType | None  = None
+
+
+
+    @classmethod
+    def from_raw(
+        cls,
+        raw: bytes|str,
+        bot_token: str|None = None, *,
+        decoder: MaxWebhookDecoder|None = None
+    ) -> "MaxReceiver":
+        """
+        Create receiver from raw webhook body, decoded by compiled decoder in one pass.
+
+        :param raw: JSON body of webhook request
+        :param decoder: decoder to use (default decoder is created if not provided)
+        :return: MaxReceiver object with parsed `webhook_event`
+        :raises ValueError if the webhook body is not valid
+        """
+        if decoder is None:
+            decoder = _default_decoder()
+        event = cls._parse_measured(lambda: decoder.decode(raw))
+        return cls(event.full_body, bot_token, webhook_event=event)
+
+
+
+    @classmethod
+    async def process_journaled(
+        cls,
+        journal: WebhookJournal,
+        raw: bytes,
+        bot_token: str|None = None, *,
+        decoder: MaxWebhookDecoder|None = None,
+        **kwargs
+    ):
+        """
+        Store raw webhook in the journal, process it and mark processed.
+        If the handler fails, the entry is marked failed and will be retried by `replay_journal`.
+
+        :param journal: journal to store webhooks in
+        :param raw: JSON body of webhook request
+        :param kwargs: args passed to handler functions
+        :raises ValueError if the webhook body is not valid
+        """
+        receiver = cls.from_raw(raw, bot_token, decoder=decoder)
+        assert receiver.webhook_event is not None
+        seq = journal.append(raw, chat_id=receiver.webhook_event.chat_id, timestamp=receiver.webhook_event.timestamp, sync=False)
+        if journal.sync_due:
+            # fsync in worker thread not to block the event loop
+            await asyncio.to_thread(journal.sync)
+        try:
+            await receiver.process_webhook(**kwargs)
+        except Exception:
+            journal.fail(seq)
+            raise
+        journal.ack(seq)
+
+
+
+    @classmethod
+    async def replay_journal(
+        cls,
+        journal: WebhookJournal,
+        bot_token: str|None = None, *,
+        decoder: MaxWebhookDecoder|None = None,
+        **kwargs
+    ) -> int:
+        """
+        Process webhooks stored in the journal but not processed, and retry failed ones (call it on startup).
+        Entries failed on replay are logged and marked processed.
+
+        :param journal: journal to replay
+        :param kwargs: args passed to handler functions
+        :return: count of replayed entries
+        """
+        count = 0
+        for entry in itertools.chain(list(journal.failed_entries()), journal.pending()):
+            try:
+                receiver = cls.from_raw(entry.data, bot_token, decoder=decoder)
+                await receiver.process_webhook(**kwargs)
+            except Exception:       # pylint: disable=broad-exception-caught
+                logger.exception("Replay of journal entry {} failed", entry.seq)
+            journal.ack(entry.seq)
+            count += 1
+        await asyncio.to_thread(journal.sync)
+        return count
 
 
 
@@ -136,52 +248,119 @@ class MaxReceiver(Receiver[MaxWebhookEventType]):
     async def process_webhook(self, **kwargs):
         """Bind handler functions to the event."""
         if self.webhook_event is None:
-            self.parse_webhook()
+            self._parse_measured(self.parse_webhook)
         assert self.webhook_event is not None
         event: MaxWebhookEventType = self.webhook_event
         if event is None:
             return
+        # Dialog state
+        current_state: str|None = None
+        if MaxReceiver.state_store is not None:
+            context = FSMContext(MaxReceiver.state_store, (event.chat_id, event.user_id))
+            kwargs["state"] = context
+            if MaxReceiver.state_commands_table or MaxReceiver.state_callbacks_table or MaxReceiver.state_messages_table:
+                current_state = await context.get_state()
+        func: Callable|None = None
         match event:
             # Bind start & stop
             case MaxWebhookEvent(event_type="bot_started"):
-                logger.info("Event `bot_started` recognized")
-                if MaxReceiver.bot_started_func is not None:
-                    await MaxReceiver.bot_started_func(event, **kwargs)
+                log_event("bot_started", event.chat_id)
+                func = MaxReceiver.bot_started_func
             case MaxWebhookEvent(event_type="bot_stopped"):
-                logger.info("Event `bot_stopped` recognized")
-                if MaxReceiver.bot_stopped_func is not None:
-                    await MaxReceiver.bot_stopped_func(event, **kwargs)
+                log_event("bot_stopped", event.chat_id)
+                func = MaxReceiver.bot_stopped_func
             # Bind dialog cleared & removed
             case MaxWebhookEvent(event_type="dialog_cleared"):
-                logger.info("Event `dialog_cleared` recognized")
-                if MaxReceiver.chat_cleared_func is not None:
-                    await MaxReceiver.chat_cleared_func(event, **kwargs)
+                log_event("dialog_cleared", event.chat_id)
+                func = MaxReceiver.chat_cleared_func
             case MaxWebhookEvent(event_type="dialog_removed"):
-                logger.info("Event `dialog_removed` recognized")
-                if MaxReceiver.chat_removed_func is not None:
-                    await MaxReceiver.chat_removed_func(event, **kwargs)
+                log_event("dialog_removed", event.chat_id)
+                func = MaxReceiver.chat_removed_func
             # Button callback
             case MessageCallbackEvent(event_type="message_callback"):
-                logger.info("Event `message_callback` recognized")
-                if event.payload not in MaxReceiver.callback_messages_table:
-                    logger.warning(f"Callback for button `{event.payload}` not found!")
-                    return
-                await MaxReceiver.callback_messages_table[event.payload](event, **kwargs)
+                log_event("message_callback", event.chat_id)
+                if (
+                    (func := MaxReceiver.state_callbacks_table.get((current_state, event.payload))) is None
+                    and (func := MaxReceiver.callback_messages_table.get(event.payload)) is None
+                ):
+                    route, _, _ = event.payload.partition(":")
+                    if (func := MaxReceiver.callback_routes_table.get(route)) is None:
+                        logger.warning("Callback for button `{}` not found!", event.payload)
+                        if metrics.REGISTRY.enabled:
+                            metrics.WEBHOOK_NOT_FOUND.inc(("callback",))
+                        return
             # Message created
             case MessageCreatedEvent(event_type="message_created"):
                 if event.text.startswith("/"):
                     # The Message is a command
-                    logger.info("Event `command` recognized")
+                    log_event("command", event.chat_id)
                     command = event.text[1:]
-                    if command not in MaxReceiver.commands_table:
-                        logger.warning(f"Command `{command}` not found!")
+                    if (
+                        (func := MaxReceiver.state_commands_table.get((current_state, command))) is None
+                        and (func := MaxReceiver.commands_table.get(command)) is None
+                    ):
+                        logger.warning("Command `{}` not found!", command)
+                        if metrics.REGISTRY.enabled:
+                            metrics.WEBHOOK_NOT_FOUND.inc(("command",))
                         return
-                    await MaxReceiver.commands_table[command](event, **kwargs)
                 else:
                     # The Message is a text or img, or voice, etc...
-                    logger.info("Event `create_message` recognized")
-                    if MaxReceiver.create_message_func is not None:
-                        await MaxReceiver.create_message_func(event, **kwargs)
-        return
+                    log_event("create_message", event.chat_id)
+                    if current_state is None or (func := MaxReceiver.state_messages_table.get(current_state)) is None:
+                        func = MaxReceiver.create_message_func
+        if func is not None:
+            await self._dispatch(func, event, **kwargs)
+
+
+
+    #  PRIVATE METHODS
+
+
+    @staticmethod
+    def _parse_measured(parse: Callable[[], MaxWebhookEventType]) -> MaxWebhookEventType:
+        """Parse the webhook by the function (measured if metrics are enabled, traced if tracing is)."""
+        if tracing.tracer is None and not metrics.REGISTRY.enabled:
+            return parse()
+        with tracing.span("messenger_utils.webhook.parse") as span:
+            started = time.perf_counter()
+            event = parse()
+            if metrics.REGISTRY.enabled:
+                metrics.WEBHOOK_PARSE_SECONDS.observe(time.perf_counter() - started, (event.event_type,))
+            if span is not None:
+                span.set_attribute(tracing.ATTR_EVENT_TYPE, event.event_type)
+                span.set_attribute(tracing.ATTR_CHAT_ID, event.chat_id)
+        return event
+
+
+
+    async def _dispatch(self, func: Callable, event: MaxWebhookEventType, **kwargs):
+        """Call the handler of the event (traced if tracing is enabled: the span is passed as `trace_span` kwarg)."""
+        if tracing.tracer is None:
+            await self._call_measured(func, event, **kwargs)
+            return
+        attributes = {
+            tracing.ATTR_EVENT_TYPE: event.event_type,
+            tracing.ATTR_CHAT_ID: event.chat_id,
+            tracing.ATTR_HANDLER: getattr(func, "__qualname__", repr(func))
+        }
+        with tracing.tracer.start_as_current_span("messenger_utils.webhook.dispatch", attributes=attributes) as span:
+            await self._call_measured(func, event, trace_span=span, **kwargs)
+
+
+
+    async def _call_measured(self, func: Callable, event: MaxWebhookEventType, **kwargs):
+        """Call the handler of the event (measured if metrics are enabled)."""
+        if not metrics.REGISTRY.enabled:
+            await func(event, **kwargs)
+            return
+        labels = (event.event_type, getattr(func, "__qualname__", repr(func)))
+        started = time.perf_counter()
+        try:
+            await func(event, **kwargs)
+        except Exception:
+            metrics.WEBHOOK_HANDLER_ERRORS.inc(labels)
+            raise
+        finally:
+            metrics.WEBHOOK_DISPATCH_SECONDS.observe(time.perf_counter() - started, labels)
 
 ### End of class Receiver ###
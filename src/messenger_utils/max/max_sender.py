@@ -4,14 +4,24 @@ Sender functionality for MAX messenger.
 Contains class MaxSender, derived from Sender abstract class.
 """
 
-import json
+import asyncio
+import hashlib
+from collections.abc import AsyncIterable
+from pathlib import Path
 from typing import Any
 import warnings
+import httpx
+from messenger_utils import tracing
 from messenger_utils.sender import Sender
 from messenger_utils.max.max_keyboard import *
+from messenger_utils.max.max_upload import UploadCache, UploadTypes, file_chunks, file_sha256, multipart_stream
 from . import MAX_API_URL
 
 
+# Retries of messages with uploaded attachments not processed by MAX yet
+ATTACHMENT_NOT_READY_RETRIES = 5
+
+
 ###   Class MaxSender   ###
 
 class MaxSender(Sender):
@@ -23,17 +33,30 @@ class MaxSender(Sender):
 
     def __init__(
         self,
-        bot_token: str
+        bot_token: str, *,
+        transport: httpx.AsyncBaseTransport|None = None,
+        client: httpx.AsyncClient|None = None,
+        max_retries: int = 0,
+        retry_backoff: float = 0.5,
+        upload_cache: UploadCache|None = None
     ):
         """
         Constructor.
         
         :param secret_key: Secret key for API authentication.
+        :param transport: custom HTTP transport (see `Sender`)
+        :param client: shared HTTP client (see `Sender`)
+        :param max_retries: retries of requests answered with 429 or 5xx status (see `Sender`)
+        :param retry_backoff: delay before the first retry (see `Sender`)
+        :param upload_cache: cache of uploaded attachments (share it between senders of one bot)
         """
         if bot_token is None:
             raise ValueError("`bot_token` must be provided in constructor or in environment variable")
-        super().__init__(bot_token)
+        super().__init__(
+            bot_token, transport=transport, client=client, max_retries=max_retries, retry_backoff=retry_backoff
+        )
         self.api_url = MAX_API_URL
+        self.upload_cache: UploadCache = upload_cache or UploadCache()
 
 
 
@@ -169,7 +192,8 @@ class MaxSender(Sender):
             text: str, *,
             target: int,
             image_url: str|None = None,
-            keyboard: MaxKeyboard|None = None,
+            keyboard: MaxKeyboard|dict|None = None,
+            attachments: list[dict]|None = None,
             **kwargs
     ) -> dict:
         """
@@ -177,7 +201,9 @@ class MaxSender(Sender):
         
         :param message: text of the message
         :param target: chat_id
-        :param attachments: list of attachments
+        :param image_url: URL of image to attach
+        :param keyboard: keyboard object or rendered keyboard dict (see `MaxKeyboardTemplate.render`)
+        :param attachments: attachments of uploaded media (see `upload`)
         """
         endpoint = "messages"
         data: dict[str, Any] = {
@@ -193,14 +219,124 @@ class MaxSender(Sender):
                     }
                 }
             ]
+        if attachments:
+            data.setdefault("attachments", []).extend(attachments)
         if keyboard:
             if "attachments" not in data:
                 data["attachments"] = []
             data["attachments"].append({
                 "type": "inline_keyboard",
-                "payload": json.loads(keyboard.to_json())
+                "payload": keyboard if isinstance(keyboard, dict) else keyboard.to_dict()
             })
-        response = await self.post(endpoint, data=data, url_params={"chat_id": target})
+        attempt = 0
+        while True:
+            try:
+                return await self.post(endpoint, data=data, url_params={"chat_id": target})
+            except httpx.HTTPStatusError as exc:
+                # Uploaded media is processed by MAX for a while after upload
+                if not attachments or attempt >= ATTACHMENT_NOT_READY_RETRIES or "attachment.not.ready" not in exc.response.text:
+                    raise
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
+
+
+
+    async def upload(
+            self,
+            source: str|Path|AsyncIterable[bytes],
+            upload_type: UploadTypes = "file", *,
+            filename: str|None = None,
+            size: int|None = None,
+            content_type: str|None = None,
+            content_hash: str|None = None
+    ) -> dict:
+        """
+        Upload media streamed from disk or async iterator (not loaded whole to memory).
+        Attachments are cached by SHA-256 of the content: the same content is uploaded once.
+
+        :param source: file path or async iterator of content chunks
+        :param upload_type: `image`, `video`, `audio` or `file`
+        :param filename: file name (required for iterator source)
+        :param size: content size of iterator source (chunked upload if not provided)
+        :param content_type: content type (by file name if not provided)
+        :param content_hash: SHA-256 (hex) of iterator content, to use cache before upload
+        :return: attachment for `send_message(attachments=[...])`
+        :raises ValueError: if file name of iterator source is not provided
+        """
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            filename, size = filename or path.name, path.stat().st_size
+            content_hash = content_hash or await file_sha256(path)
+            upload = lambda: self._upload(file_chunks(path), upload_type, filename, size, content_type, None)
+        else:
+            if filename is None:
+                raise ValueError("`filename` is required to upload content of iterator")
+            if content_hash is None:
+                # Hash is known after upload only: the content is cached for next uploads
+                digest = hashlib.sha256()
+                attachment = await self._upload(source, upload_type, filename, size, content_type, digest)
+                self.upload_cache.put(f"{upload_type}:{digest.hexdigest()}", attachment)
+                return attachment
+            upload = lambda: self._upload(source, upload_type, filename, size, content_type, None)
+        return await self.upload_cache.get_or_upload(f"{upload_type}:{content_hash}", upload)
+
+
+
+    async def _upload(
+            self,
+            content: AsyncIterable[bytes],
+            upload_type: UploadTypes,
+            filename: str,
+            size: int|None,
+            content_type: str|None,
+            digest: "hashlib._Hash|None"
+    ) -> dict:
+        """Get upload URL, stream the content to it and make attachment."""
+        slot = await self.post("uploads", url_params={"type": upload_type})
+        body, headers = multipart_stream(content, filename=filename, size=size, content_type=content_type, digest=digest)
+        with tracing.span("POST upload", tracing.api_attributes("POST", "upload", {})) as span:
+            if self.client is not None:
+                response = await self.client.post(slot["url"], content=body, headers=headers)
+            else:
+                async with httpx.AsyncClient(transport=self.transport or Sender.default_transport, timeout=None) as client:
+                    response = await client.post(slot["url"], content=body, headers=headers)
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+        response.raise_for_status()
+        # Video & audio tokens are given with upload URL, image & file ones - by upload response
+        payload = {"token": slot["token"]} if "token" in slot else response.json()
+        return {"type": upload_type, "payload": payload}
+
+
+
+    async def answer_callback(
+            self,
+            callback_id: str, *,
+            text: str|None = None,
+            keyboard: MaxKeyboard|dict|None = None,
+            notification: str|None = None
+    ) -> dict:
+        """
+        Answer to the button callback: update the message with the button and/or show notification.
+
+        :param callback_id: `callback_id` of the callback event
+        :param text: new text of the message (the text is kept if `None`)
+        :param keyboard: new keyboard of the message (keyboard object or rendered keyboard dict)
+        :param notification: one-time notification text for the user
+        """
+        endpoint = "answers"
+        data: dict[str, Any] = {}
+        if text is not None or keyboard is not None:
+            message: dict[str, Any] = {"text": text, "format": "markdown"} if text is not None else {}
+            if keyboard is not None:
+                message["attachments"] = [{
+                    "type": "inline_keyboard",
+                    "payload": keyboard if isinstance(keyboard, dict) else keyboard.to_dict()
+                }]
+            data["message"] = message
+        if notification is not None:
+            data["notification"] = notification
+        response = await self.post(endpoint, data=data, url_params={"callback_id": callback_id})
         return response
 
 
@@ -244,7 +380,7 @@ class MaxSender(Sender):
             "attachments": [
                 {
                     "type": "inline_keyboard",
-                    "payload": json.loads(keyboard.to_json())
+                    "payload": keyboard.to_dict()
                 }
             ]
         }
@@ -0,0 +1,357 @@
+"""
+Multi-worker webhook server of MAX bot.
+
+Workers are separate processes listening on the same port (`SO_REUSEPORT`), each one with its own event loop
+and pooled `MaxSender` passed to handler functions as `sender` keyword argument.
+
+Endpoints:
+- `POST <path>`: webhooks, dispatched by `MaxReceiver` to the registered handlers
+- `GET /health`: health check of the worker
+- `GET /metrics`: metrics of the worker in Prometheus text format (if metrics are enabled)
+
+Signals of the master process:
+- `SIGHUP`: graceful reload: new workers (with re-imported bot code) are started, then the old ones are drained
+- `SIGTERM` / `SIGINT`: graceful shutdown: workers finish active requests and exit
+"""
+
+__all__ = ["AppStartup", "load_app", "webhook_handler", "serve_worker", "MaxWebhookServer"]
+
+
+import asyncio
+import hmac
+import importlib
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from multiprocessing.context import SpawnProcess
+from multiprocessing.synchronize import Event
+from typing import Any
+from loguru import logger
+from messenger_utils import metrics, tracing
+from messenger_utils.http_server import HttpHandler, HttpRequest, HttpResponse, HttpServer, json_response
+from messenger_utils.max.max_decoder import MaxWebhookDecoder
+from messenger_utils.max.max_receiver import MaxReceiver
+from messenger_utils.max.max_sender import MaxSender
+
+
+# Delay before restart of crashed worker, doubled after every failed restart (seconds)
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 60.0
+
+
+# Per-worker startup hook of the bot: `async (sender) -> extra kwargs of handler functions`
+type AppStartup = Callable[[MaxSender], Awaitable[dict[str, Any]|None]]
+
+
+def load_app(spec: str) -> AppStartup|None:
+    """
+    Import bot module registering handlers in `MaxReceiver`.
+
+    :param spec: `module` or `module:startup` where `startup` is the module's `AppStartup` function
+    :return: startup function if provided
+    :raises ValueError: if the module has no such attribute
+    """
+    module_name, _, attr = spec.partition(":")
+    if "" not in sys.path:
+        sys.path.insert(0, "")
+    module = importlib.import_module(module_name)
+    if not attr:
+        return None
+    startup = getattr(module, attr, None)
+    if not callable(startup):
+        raise ValueError(f"`{spec}`: module `{module_name}` has no function `{attr}`")
+    return startup
+
+
+
+def webhook_handler(sender: MaxSender, *, path: str = "/", secret: str|None = None, **kwargs) -> HttpHandler:
+    """
+    Create HTTP handler of webhooks, health checks and metrics.
+
+    :param sender: sender passed to handler functions as `sender` kwarg
+    :param path: webhooks endpoint path
+    :param secret: expected `X-Max-Bot-Api-Secret` header (secret of webhook subscription)
+    :param kwargs: other args passed to handler functions
+    """
+    decoder = MaxWebhookDecoder()
+    started = time.monotonic()
+    counters = {"webhooks": 0, "errors": 0}
+    span_attributes = {"url.path": path}
+    secret_bytes = secret.encode() if secret is not None else b""
+
+    async def handle(request: HttpRequest) -> HttpResponse:
+        if request.path == "/health" and request.method == "GET":
+            return json_response({"status": "ok", "pid": os.getpid(), "uptime": time.monotonic() - started, **counters})
+        if request.path == "/metrics" and request.method == "GET" and metrics.REGISTRY.enabled:
+            return HttpResponse(200, metrics.prometheus_text().encode(), content_type="text/plain; version=0.0.4")
+        if request.path != path:
+            return HttpResponse(404)
+        if request.method != "POST":
+            return HttpResponse(405, headers={"Allow": "POST"})
+        if secret is not None and (
+            (secret_header := request.headers.get("x-max-bot-api-secret")) is None
+            # Constant time comparison (headers are decoded as latin-1)
+            or not hmac.compare_digest(secret_header.encode("latin-1"), secret_bytes)
+        ):
+            return HttpResponse(403)
+        with tracing.span("messenger_utils.webhook", span_attributes):
+            try:
+                receiver = MaxReceiver.from_raw(request.body, sender.bot_token, decoder=decoder)
+            except ValueError:
+                return HttpResponse(400)
+            counters["webhooks"] += 1
+            try:
+                await receiver.process_webhook(sender=sender, **kwargs)
+            except Exception:       # pylint: disable=broad-exception-caught
+                # Webhook is answered with success anyway: MAX would resend it and repeat side effects of the handler
+                counters["errors"] += 1
+                logger.exception("Webhook handler failed")
+        return json_response({"ok": True})
+
+    return handle
+
+
+
+async def serve_worker(
+    app: str, *,
+    bot_token: str,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    path: str = "/",
+    secret: str|None = None,
+    reuse_port: bool = False,
+    drain_timeout: float = 30.0,
+    max_connections: int = 100,
+    enable_metrics: bool = False,
+    ready: Event|None = None
+):
+    """
+    Serve webhooks in the current process until `SIGTERM` / `SIGINT`.
+
+    :param app: bot module spec (see `load_app`)
+    :param bot_token: MAX bot token
+    :param host: interface to listen on
+    :param port: port to listen on
+    :param path: webhooks endpoint path
+    :param secret: expected webhook secret header
+    :param reuse_port: share the port with other workers
+    :param drain_timeout: max time to finish active requests on shutdown (seconds)
+    :param max_connections: pool size of the sender
+    :param enable_metrics: collect metrics served on `GET /metrics`
+    :param ready: event set when the worker is listening
+    """
+    if enable_metrics:
+        metrics.enable()
+    startup = load_app(app)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    if hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, lambda: None)     # Reload is done by the master process
+    sender = MaxSender(bot_token)
+    sender.open(max_connections=max_connections)
+    try:
+        kwargs = (await startup(sender) or {}) if startup is not None else {}
+        server = HttpServer(
+            webhook_handler(sender, path=path, secret=secret, **kwargs),
+            host=host, port=port, reuse_port=reuse_port
+        )
+        await server.start()
+        logger.info(f"Worker {os.getpid()} is listening on {server.url}")
+        if ready is not None:
+            ready.set()
+        serving = asyncio.create_task(server.serve_forever())
+        await stop.wait()
+        await server.close(timeout=drain_timeout)
+        serving.cancel()
+        logger.info(f"Worker {os.getpid()} stopped")
+    finally:
+        await sender.aclose()
+
+
+
+def _worker_main(app: str, options: dict[str, Any]):
+    """Entry point of worker process."""
+    asyncio.run(serve_worker(app, **options))
+
+
+
+### Class MaxWebhookServer ###
+
+class MaxWebhookServer:
+    """
+    Master process of multi-worker webhook server.
+
+    Usage:
+    ```
+    MaxWebhookServer("mybot.handlers", bot_token=token, port=8080, workers=4).run()
+    ```
+    """
+
+    def __init__(
+        self,
+        app: str, *,
+        bot_token: str,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        path: str = "/",
+        workers: int = 1,
+        secret: str|None = None,
+        drain_timeout: float = 30.0,
+        start_timeout: float = 30.0,
+        enable_metrics: bool = False
+    ):
+        """
+        Init server.
+
+        :param app: bot module spec: `module` or `module:startup` (see `load_app`)
+        :param bot_token: MAX bot token
+        :param host: interface to listen on
+        :param port: port to listen on
+        :param path: webhooks endpoint path
+        :param workers: count of worker processes
+        :param secret: expected `X-Max-Bot-Api-Secret` header of webhooks
+        :param drain_timeout: max time to finish active requests on shutdown / reload (seconds)
+        :param start_timeout: max time of worker start (seconds)
+        :param enable_metrics: collect metrics served on `GET /metrics` (every worker serves its own ones)
+        :raises ValueError: if several workers are requested on platform without `SO_REUSEPORT`
+        """
+        if workers < 1:
+            raise ValueError("`workers` must be positive")
+        if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("Several workers require `SO_REUSEPORT` socket option, not supported by the platform")
+        self.app: str = app
+        self.workers: int = workers
+        self.start_timeout: float = start_timeout
+        self.options: dict[str, Any] = {
+            "bot_token": bot_token, "host": host, "port": port, "path": path, "secret": secret,
+            # Shared port is used with one worker too: new workers are started before old ones are stopped on reload
+            "reuse_port": hasattr(socket, "SO_REUSEPORT"), "drain_timeout": drain_timeout,
+            "enable_metrics": enable_metrics
+        }
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[SpawnProcess] = []
+        self._reload: bool = False
+        self._stop: bool = False
+        # Index of crashed worker => (time of its next restart, backoff)
+        self._restarts: dict[int, tuple[float, float]] = {}
+
+
+
+    def run(self):
+        """
+        Start workers and supervise them (restart crashed ones, reload on `SIGHUP`) until `SIGTERM` / `SIGINT`.
+        Failed restarts are retried with backoff, other workers keep serving.
+
+        :raises RuntimeError: if workers failed to start initially
+        """
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._on_reload)
+        self._processes = self._start_workers(self.workers)
+        logger.info(f"Serving `{self.app}` with {self.workers} workers")
+        try:
+            while not self._stop:
+                time.sleep(0.2)
+                if self._reload:
+                    self._reload = False
+                    self._reload_workers()
+                for i, process in enumerate(self._processes):
+                    if not process.is_alive() and not self._stop:
+                        self._restart_worker(i)
+        finally:
+            self._stop_workers(self._processes)
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _on_stop(self, *args):
+        self._stop = True
+
+
+    def _on_reload(self, *args):
+        self._reload = True
+
+
+    def _start_workers(self, count: int) -> list[SpawnProcess]:
+        """Start workers and wait until they listen."""
+        started: list[tuple[SpawnProcess, Event]] = []
+        for _ in range(count):
+            ready = self._context.Event()
+            process = self._context.Process(
+                target=_worker_main, args=(self.app, {**self.options, "ready": ready}), daemon=True
+            )
+            process.start()
+            started.append((process, ready))
+        deadline = time.monotonic() + self.start_timeout
+        for process, ready in started:
+            while not ready.wait(0.1):
+                if not process.is_alive() or time.monotonic() > deadline:
+                    self._stop_workers([p for p, _ in started])
+                    raise RuntimeError(f"Worker failed to start (exit code {process.exitcode})")
+        return [process for process, _ in started]
+
+
+    def _restart_worker(self, i: int):
+        """Restart exited worker (when its backoff is over)."""
+        process = self._processes[i]
+        if i not in self._restarts:
+            logger.warning(f"Worker {process.pid} exited with code {process.exitcode}, restarting")
+            self._restarts[i] = (time.monotonic() + RESTART_BACKOFF, RESTART_BACKOFF)
+        restart_at, backoff = self._restarts[i]
+        if time.monotonic() < restart_at:
+            return
+        try:
+            self._processes[i] = self._start_workers(1)[0]
+        except RuntimeError as exc:
+            backoff = min(backoff * 2, MAX_RESTART_BACKOFF)
+            logger.error(f"Worker restart failed, next try in {backoff:g} s: {exc}")
+            self._restarts[i] = (time.monotonic() + backoff, backoff)
+            return
+        del self._restarts[i]
+
+
+    def _reload_workers(self):
+        """Replace workers with new ones (new workers re-import the bot code)."""
+        logger.info("Reloading workers")
+        if not self.options["reuse_port"]:
+            self._stop_workers(self._processes)
+            try:
+                self._processes = self._start_workers(self.workers)
+            except RuntimeError as exc:
+                # Stopped workers are restarted by supervisor with backoff
+                logger.error(f"Reload failed, workers will be restarted: {exc}")
+                return
+            self._restarts.clear()
+            return
+        try:
+            new_processes = self._start_workers(self.workers)
+        except RuntimeError as exc:
+            logger.error(f"Reload failed, old workers are kept: {exc}")
+            return
+        old_processes, self._processes = self._processes, new_processes
+        self._restarts.clear()
+        self._stop_workers(old_processes)
+
+
+    def _stop_workers(self, processes: list[SpawnProcess]):
+        """Stop workers gracefully (kill them after drain timeout)."""
+        for process in processes:
+            if process.is_alive():
+                process.terminate()         # SIGTERM
+        deadline = time.monotonic() + self.options["drain_timeout"] + 5.0
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0.0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+### End of class MaxWebhookServer ###
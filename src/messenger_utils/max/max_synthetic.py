@@ -0,0 +1,201 @@
+"""
+Synthetic MAX webhook bodies for load tests of webhook endpoints.
+
+Bodies have the structure of real MAX webhooks of every `EventTypes` value, with random users, chats, texts,
+attachments and callback payloads.
+"""
+
+__all__ = ["DEFAULT_MIX", "SyntheticWebhooks"]
+
+
+import json
+import random
+import string
+import time
+from collections.abc import Iterator
+from typing import Any, get_args
+from messenger_utils.models.max_webhook_event import EventTypes
+
+
+# Share of event types in the stream (close to a chat bot traffic)
+DEFAULT_MIX: dict[str, float] = {
+    "message_created": 0.6,
+    "message_callback": 0.3,
+    "bot_started": 0.04,
+    "bot_stopped": 0.02,
+    "dialog_cleared": 0.02,
+    "dialog_removed": 0.02,
+}
+
+_WORDS = "hello menu order status help price delivery cart pay thanks yes no back next".split()
+_NAMES = ["Maxim", "Anna", "Ivan", "Olga", "Sergey", "Elena", "Dmitry", "Maria"]
+
+
+### Class SyntheticWebhooks ###
+
+class SyntheticWebhooks:
+    """
+    Generator of synthetic webhook bodies.
+
+    Usage:
+    ```
+    synthetic = SyntheticWebhooks(seed=1)
+    body = synthetic.body("message_callback")       # dict
+    for raw in synthetic.stream(1000):              # bytes, event types by `mix`
+        ...
+    ```
+    """
+
+    def __init__(
+        self, *,
+        seed: int|None = None,
+        users: int = 1000,
+        bot_id: int = 100000001,
+        payloads: list[str]|None = None,
+        commands: list[str]|None = None,
+        mix: dict[str, float]|None = None
+    ):
+        """
+        Init generator.
+
+        :param seed: random seed (for reproducible bodies)
+        :param users: count of distinct users (each one has own dialog chat)
+        :param bot_id: user ID of the bot
+        :param payloads: callback payloads of buttons (the bot's real ones make the probe more realistic)
+        :param commands: commands sent in messages sometimes (e.g. `["/start", "/help"]`)
+        :param mix: share of event types in `stream` (`DEFAULT_MIX` if not provided)
+        :raises ValueError: if mix contains unknown event types
+        """
+        self.users: int = users
+        self.bot_id: int = bot_id
+        self.payloads: list[str] = payloads or ["menu", "page:1", "order:i2s", "back"]
+        self.commands: list[str] = commands or ["/start", "/help"]
+        self.mix: dict[str, float] = mix or DEFAULT_MIX
+        if unknown := set(self.mix) - set(get_args(EventTypes)):
+            raise ValueError(f"Unknown event types: {', '.join(sorted(unknown))}")
+        self._random = random.Random(seed)
+        self._seq: int = 115649495881746671
+
+
+
+    def body(self, event_type: EventTypes) -> dict[str, Any]:
+        """
+        Generate webhook body.
+
+        :param event_type: type of the event
+        :return: webhook body
+        """
+        rnd = self._random
+        timestamp = int(time.time() * 1000)
+        user = self._user(rnd.randrange(self.users))
+        chat_id = 100000000 + user["user_id"]
+        match event_type:
+            case "message_created":
+                body: dict[str, Any] = {"mid": self._mid(), "seq": self._next_seq(), "text": self._text()}
+                if rnd.random() < 0.1:
+                    body["attachments"] = [{
+                        "type": "image",
+                        "payload": {
+                            "photo_id": rnd.randrange(10**9),
+                            "token": self._token(96),
+                            "url": f"https://i.oneme.ru/i?r={self._token(64)}"
+                        }
+                    }]
+                return {
+                    "timestamp": timestamp,
+                    "message": {
+                        "recipient": {"chat_id": chat_id, "chat_type": "dialog", "user_id": self.bot_id},
+                        "timestamp": timestamp,
+                        "body": body,
+                        "sender": user
+                    },
+                    "user_locale": "ru",
+                    "update_type": "message_created"
+                }
+            case "message_callback":
+                return {
+                    "callback": {
+                        "timestamp": timestamp,
+                        "callback_id": self._token(112),
+                        "user": user,
+                        "payload": rnd.choice(self.payloads)
+                    },
+                    "message": {
+                        "recipient": {"chat_id": chat_id, "chat_type": "dialog", "user_id": user["user_id"]},
+                        "timestamp": timestamp - rnd.randrange(1000, 600_000),
+                        "body": {"mid": self._mid(), "seq": self._next_seq(), "text": "Choose an option:"},
+                        "sender": {
+                            "user_id": self.bot_id, "first_name": "Bot", "username": "synthetic_bot",
+                            "is_bot": True, "last_activity_time": timestamp, "name": "Bot"
+                        }
+                    },
+                    "timestamp": timestamp,
+                    "user_locale": "ru",
+                    "update_type": "message_callback"
+                }
+            case "bot_started" | "bot_stopped" | "dialog_cleared" | "dialog_removed":
+                body = {
+                    "timestamp": timestamp,
+                    "chat_id": chat_id,
+                    "user": user,
+                    "user_id": user["user_id"],
+                    "update_type": event_type
+                }
+                if event_type == "bot_started":
+                    body["user_locale"] = "ru"
+                return body
+            case _:
+                raise ValueError(f"Unknown event type: {event_type}")
+
+
+
+    def stream(self, count: int|None = None) -> Iterator[bytes]:
+        """
+        Generate encoded webhook bodies with event types mixed by `mix`.
+
+        :param count: count of bodies (infinite stream if `None`)
+        """
+        types = list(self.mix)
+        weights = list(self.mix.values())
+        n = 0
+        while count is None or n < count:
+            event_type = self._random.choices(types, weights)[0]
+            yield json.dumps(self.body(event_type), ensure_ascii=False).encode()
+            n += 1
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _user(self, n: int) -> dict[str, Any]:
+        name = _NAMES[n % len(_NAMES)]
+        return {
+            "user_id": 50000000 + n,
+            "first_name": name,
+            "last_name": "",
+            "is_bot": False,
+            "last_activity_time": int(time.time() * 1000),
+            "name": name
+        }
+
+
+    def _text(self) -> str:
+        if self._random.random() < 0.2:
+            return self._random.choice(self.commands)
+        return " ".join(self._random.choices(_WORDS, k=self._random.randint(1, 12))).capitalize()
+
+
+    def _mid(self) -> str:
+        return "mid." + "".join(self._random.choices("0123456789abcdef", k=32))
+
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+
+    def _token(self, length: int) -> str:
+        return "".join(self._random.choices(string.ascii_letters + string.digits + "_-", k=length))
+
+### End of class SyntheticWebhooks ###
@@ -0,0 +1,170 @@
+"""
+Uploads of media to MAX: streaming multipart bodies and cache of attachment tokens by content hash.
+
+Upload flow of MAX API:
+1. `POST /uploads?type=<type>` returns upload URL (and the token for video & audio);
+2. the file is posted to the URL as `multipart/form-data` (field `data`), the response has the token for images & files;
+3. the message is sent with `{"type": <type>, "payload": <token>}` attachment.
+"""
+
+__all__ = ["UploadTypes", "CHUNK_SIZE", "UploadCache", "upload_type_of", "file_chunks", "file_sha256", "multipart_stream"]
+
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from pathlib import Path
+from typing import Any, Literal
+
+
+UploadTypes = Literal["image", "video", "audio", "file"]
+
+# Size of chunks read from disk
+CHUNK_SIZE = 256 * 1024
+
+
+### Class UploadCache ###
+
+class UploadCache:
+    """
+    Attachments of uploaded contents by content hash (LRU).
+    Concurrent uploads of the same content wait for the first one (the content is uploaded once).
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        Init cache.
+
+        :param max_size: max count of cached attachments
+        """
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._items: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+
+
+
+    def get(self, key: str) -> dict[str, Any]|None:
+        """Cached attachment of the content."""
+        if (attachment := self._items.get(key)) is not None:
+            self._items.move_to_end(key)
+        return attachment
+
+
+
+    def put(self, key: str, attachment: dict[str, Any]):
+        """Cache attachment of the content."""
+        self._items[key] = attachment
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
+
+    async def get_or_upload(self, key: str, upload: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        """
+        Cached attachment of the content, or upload it (once for concurrent calls).
+
+        :param key: content key (type and hash)
+        :param upload: async function uploading the content and returning the attachment
+        """
+        if (attachment := self.get(key)) is not None:
+            self.hits += 1
+            return attachment
+        if (pending := self._pending.get(key)) is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            attachment = await upload()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()          # retrieved: waiters re-raise it, no "never retrieved" warning
+            raise
+        else:
+            self.put(key, attachment)
+            future.set_result(attachment)
+            return attachment
+        finally:
+            del self._pending[key]
+
+### End of class UploadCache ###
+
+
+
+def upload_type_of(filename: str|Path) -> UploadTypes:
+    """Upload type by file name: `image`, `video`, `audio` or `file`."""
+    mime = mimetypes.guess_type(str(filename))[0] or ""
+    kind = mime.partition("/")[0]
+    return kind if kind in ("image", "video", "audio") else "file"     # type: ignore[return-value]
+
+
+
+async def file_chunks(path: str|Path, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read the file by chunks (in worker thread, not blocking the event loop)."""
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+
+async def file_sha256(path: str|Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of the file content (hex)."""
+    def digest() -> str:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                sha.update(chunk)
+        return sha.hexdigest()
+    return await asyncio.to_thread(digest)
+
+
+
+def multipart_stream(
+    content: AsyncIterable[bytes], *,
+    filename: str,
+    size: int|None = None,
+    content_type: str|None = None,
+    field: str = "data",
+    digest: "hashlib._Hash|None" = None
+) -> tuple[AsyncIterator[bytes], dict[str, str]]:
+    """
+    Streaming `multipart/form-data` body with one file field.
+
+    :param content: file content chunks
+    :param filename: file name
+    :param size: content size (`Content-Length` is set if known, chunked body otherwise)
+    :param content_type: content type of the file (by file name if not provided)
+    :param field: form field name
+    :param digest: hash object updated by the content chunks
+    :return: body chunks and request headers
+    """
+    boundary = uuid.uuid4().hex
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    safe_name = os.path.basename(filename).replace('"', "%22")
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{safe_name}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if size is not None:
+        headers["Content-Length"] = str(len(head) + size + len(tail))
+
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        async for chunk in content:
+            if digest is not None:
+                digest.update(chunk)
+            yield chunk
+        yield tail
+
+    return body(), headers
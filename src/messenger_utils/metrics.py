@@ -0,0 +1,321 @@
+"""
+Metrics of API requests and webhooks processing: counters & histograms with Prometheus text exposition.
+
+Metrics are disabled by default; instrumented code checks `REGISTRY.enabled` only, so the overhead is near zero:
+```
+from messenger_utils import metrics
+
+metrics.enable()
+...
+print(metrics.prometheus_text())
+```
+
+Library metrics:
+- `messenger_utils_api_requests_total{method, endpoint, status}`
+- `messenger_utils_api_request_seconds{method, endpoint}`
+- `messenger_utils_api_bytes_total{method, endpoint, direction}` (`sent` / `received`)
+- `messenger_utils_api_retries_total{method, endpoint, status}`
+- `messenger_utils_webhook_parse_seconds{event_type}`
+- `messenger_utils_webhook_dispatch_seconds{event_type, handler}`
+- `messenger_utils_webhook_handler_errors_total{event_type, handler}`
+- `messenger_utils_webhook_not_found_total{kind}` (`command` / `callback`)
+"""
+
+__all__ = [
+    "DEFAULT_BUCKETS", "MetricsSink", "Counter", "Histogram", "MetricsRegistry", "REGISTRY",
+    "observe_api_response", "enable", "disable", "prometheus_text"
+]
+
+
+import math
+from bisect import bisect_left
+from typing import Literal, Protocol
+
+
+# Histogram buckets (seconds)
+DEFAULT_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsSink(Protocol):
+    """
+    Receiver of every metric update (e.g. StatsD or logging exporter).
+    """
+    def record(self, kind: Literal["counter", "histogram"], name: str, labels: dict[str, str], value: float) -> None:
+        ...
+
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+
+### Class Counter ###
+
+class Counter:
+    """
+    Monotonic counter with labels.
+    """
+
+    kind: Literal["counter", "histogram"] = "counter"
+
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        """
+        Init counter (use `MetricsRegistry.counter`).
+
+        :param registry: registry of the counter
+        :param name: metric name
+        :param documentation: help text
+        :param labelnames: names of labels
+        """
+        self.registry = registry
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+
+
+    def inc(self, labels: tuple[str, ...] = (), value: float = 1.0):
+        """
+        Increase the counter.
+
+        :param labels: values of labels in order of `labelnames`
+        :param value: increment
+        """
+        self.values[labels] = self.values.get(labels, 0.0) + value
+        for sink in self.registry.sinks:
+            sink.record(self.kind, self.name, dict(zip(self.labelnames, labels)), value)
+
+
+    def exposition(self) -> list[str]:
+        """Prometheus text lines of the metric."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+### End of class Counter ###
+
+
+
+### Class Histogram ###
+
+class Histogram:
+    """
+    Histogram of observed values with labels.
+    """
+
+    kind: Literal["counter", "histogram"] = "histogram"
+
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (), *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """
+        Init histogram (use `MetricsRegistry.histogram`).
+
+        :param registry: registry of the histogram
+        :param name: metric name
+        :param documentation: help text
+        :param labelnames: names of labels
+        :param buckets: upper bounds of buckets (`+Inf` is added)
+        """
+        self.registry = registry
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # Labels => [count per bucket (+Inf last)..., sum]
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()):
+        """
+        Observe the value.
+
+        :param value: observed value
+        :param labels: values of labels in order of `labelnames`
+        """
+        if (data := self.values.get(labels)) is None:
+            data = self.values[labels] = [0.0] * (len(self.buckets) + 2)
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+        for sink in self.registry.sinks:
+            sink.record(self.kind, self.name, dict(zip(self.labelnames, labels)), value)
+
+
+    def count(self, labels: tuple[str, ...] = ()) -> int:
+        """Count of observations."""
+        data = self.values.get(labels)
+        return int(sum(data[:-1])) if data else 0
+
+
+    def exposition(self) -> list[str]:
+        """Prometheus text lines of the metric."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, data in self.values.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), data[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, labels, f'le=\"{_number(bound)}\"')} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, labels)} {_number(data[-1])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, labels)} {_number(cumulative)}")
+        return lines
+
+### End of class Histogram ###
+
+
+
+### Class MetricsRegistry ###
+
+class MetricsRegistry:
+    """
+    Registry of metrics.
+    """
+
+    def __init__(self, *, enabled: bool = False):
+        """
+        Init registry.
+
+        :param enabled: collect metrics (instrumented code skips the registry if disabled)
+        """
+        self.enabled: bool = enabled
+        self.sinks: list[MetricsSink] = []
+        self.metrics: dict[str, Counter|Histogram] = {}
+
+
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """
+        Get or create counter.
+
+        :raises ValueError: if the metric with the name has another type or labels
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (), *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Get or create histogram.
+
+        :raises ValueError: if the metric with the name has another type or labels
+        """
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+
+    def add_sink(self, sink: MetricsSink):
+        """Add receiver of every metric update."""
+        self.sinks.append(sink)
+
+
+
+    def reset(self):
+        """Drop collected values (metrics are kept)."""
+        for metric in self.metrics.values():
+            metric.values.clear()
+
+
+
+    def prometheus_text(self) -> str:
+        """Metrics in Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            if metric.values:
+                lines += metric.exposition()
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _get_or_create[M: (Counter, Histogram)](self, cls: type[M], name: str, documentation: str, labelnames: tuple[str, ...], **kwargs) -> M:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != labelnames:
+            raise ValueError(f"Metric `{name}` is already registered with another type or labels")
+        return metric
+
+### End of class MetricsRegistry ###
+
+
+
+# Default registry of the library metrics
+REGISTRY = MetricsRegistry()
+
+API_REQUESTS = REGISTRY.counter(
+    "messenger_utils_api_requests_total", "Bot API requests", ("method", "endpoint", "status"))
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "messenger_utils_api_request_seconds", "Latency of Bot API requests (with retries)", ("method", "endpoint"))
+API_BYTES = REGISTRY.counter(
+    "messenger_utils_api_bytes_total", "Bytes of Bot API requests & responses bodies", ("method", "endpoint", "direction"))
+API_RETRIES = REGISTRY.counter(
+    "messenger_utils_api_retries_total", "Retried Bot API requests", ("method", "endpoint", "status"))
+WEBHOOK_PARSE_SECONDS = REGISTRY.histogram(
+    "messenger_utils_webhook_parse_seconds", "Parse time of webhooks", ("event_type",))
+WEBHOOK_DISPATCH_SECONDS = REGISTRY.histogram(
+    "messenger_utils_webhook_dispatch_seconds", "Time of webhook handlers", ("event_type", "handler"))
+WEBHOOK_HANDLER_ERRORS = REGISTRY.counter(
+    "messenger_utils_webhook_handler_errors_total", "Failed webhook handlers", ("event_type", "handler"))
+WEBHOOK_NOT_FOUND = REGISTRY.counter(
+    "messenger_utils_webhook_not_found_total", "Commands & callbacks without handlers", ("kind",))
+
+
+
+def observe_api_response(method: str, endpoint: str, status: int, sent: int, received: int):
+    """
+    Count the response of Bot API (called by `Sender` if metrics are enabled).
+
+    :param method: HTTP method
+    :param endpoint: endpoint of the API (without IDs, to keep labels cardinality low)
+    :param status: response status
+    :param sent: size of request body
+    :param received: size of response body
+    """
+    API_REQUESTS.inc((method, endpoint, str(status)))
+    API_BYTES.inc((method, endpoint, "sent"), sent)
+    API_BYTES.inc((method, endpoint, "received"), received)
+
+
+
+def enable():
+    """Enable collection of the library metrics."""
+    REGISTRY.enabled = True
+
+
+def disable():
+    """Disable collection of the library metrics."""
+    REGISTRY.enabled = False
+
+
+def prometheus_text() -> str:
+    """Library metrics in Prometheus text exposition format."""
+    return REGISTRY.prometheus_text()
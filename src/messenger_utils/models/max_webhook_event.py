@@ -3,10 +3,15 @@ Webhook Events Classes
 """
 
 __all__ = [
-    "EventTypes", "AttachmentTypes", "Attachment", "MaxWebhookEvent", "MessageCreatedEvent", "MessageCallbackEvent", "MaxWebhookEventType"
+    "EventTypes", "AttachmentTypes", "Attachment", "MaxWebhookEvent", "MessageCreatedEvent", "MessageCallbackEvent", "MaxWebhookEventType",
+    "EVENT_CODEC_VERSION"
 ]
 
 
+import struct
+import pydantic_core
+from messenger_utils import payload as _payload
+from messenger_utils.payload import PayloadValue
 from typing import Literal
 from dataclasses import dataclass, field
 
@@ -28,6 +33,55 @@ AttachmentTypes = Literal[
 ]
 
 
+#
+# Binary codec of events (`to_bytes` / `from_bytes`)
+#
+# Layout (little-endian):
+#   header:  version u8 | event type code u8 | flags u8 | chat_id i64 | user_id i64 | timestamp i64
+#   strings: length u32 + utf-8 bytes
+#   body:    user_name str | <fields of event class> | [full_body as compact JSON str]
+#
+
+EVENT_CODEC_VERSION = 1
+
+_HEADER = struct.Struct("<BBBqqq")
+_LEN = struct.Struct("<I")
+_INT = struct.Struct("<q")
+
+_FLAG_USER_IS_BOT = 0x01
+_FLAG_FULL_BODY = 0x02
+
+_TYPE_CODES: dict[str, int] = {
+    "bot_started": 0,
+    "bot_stopped": 1,
+    "dialog_cleared": 2,
+    "dialog_removed": 3,
+    "message_created": 4,
+    "message_callback": 5
+}
+_TYPE_NAMES: list[str] = list(_TYPE_CODES)
+
+
+def _pack_str(parts: list[bytes], value: str):
+    """Append length-prefixed utf-8 string to the parts list."""
+    data = value.encode()
+    parts.append(_LEN.pack(len(data)))
+    parts.append(data)
+
+
+def _unpack_str(buf: memoryview, pos: int) -> tuple[str, int]:
+    """
+    Read length-prefixed utf-8 string from the buffer. Returns string and new position.
+    :raises ValueError: if the buffer is shorter than the string
+    """
+    (size,) = _LEN.unpack_from(buf, pos)
+    pos += _LEN.size
+    if pos + size > len(buf):
+        raise ValueError("Truncated string")
+    return str(buf[pos:pos + size], "utf-8"), pos + size
+
+
+
 @dataclass
 class Attachment:
     """
@@ -52,6 +106,87 @@ class MaxWebhookEvent:
     full_body: dict         # JSON body of original webjook request
 
 
+    def to_bytes(self, *, with_full_body: bool = True) -> bytes:
+        """
+        Serialize event to compact versioned binary format (for inter-process queues).
+
+        :param with_full_body: include `full_body` of webhook (empty dict is restored otherwise)
+        :return: Serialized event
+        """
+        flags = _FLAG_USER_IS_BOT if self.user_is_bot else 0
+        if with_full_body:
+            flags |= _FLAG_FULL_BODY
+        parts: list[bytes] = [
+            _HEADER.pack(
+                EVENT_CODEC_VERSION, _TYPE_CODES[self.event_type], flags,
+                self.chat_id, self.user_id, self.timestamp
+            )
+        ]
+        _pack_str(parts, self.user_name)
+        self._pack_fields(parts)
+        if with_full_body:
+            raw_body = pydantic_core.to_json(self.full_body)
+            parts.append(_LEN.pack(len(raw_body)))
+            parts.append(raw_body)
+        return b"".join(parts)
+
+
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MaxWebhookEventType":
+        """
+        Restore event serialized by `to_bytes`.
+        The class of the result is defined by event type stored in data.
+
+        :param data: Serialized event
+        :return: Event object
+        :raises ValueError: if data is broken or has unsupported version
+        """
+        buf = memoryview(data)
+        if not data or data[0] != EVENT_CODEC_VERSION:
+            raise ValueError(f"Unsupported event codec version: {data[0] if data else None}")
+        try:
+            _, type_code, flags, chat_id, user_id, timestamp = _HEADER.unpack_from(buf, 0)
+            event_type = _TYPE_NAMES[type_code]
+            user_name, pos = _unpack_str(buf, _HEADER.size)
+            event_cls = _EVENT_CLASSES.get(event_type, MaxWebhookEvent)
+            fields, pos = event_cls._unpack_fields(buf, pos)
+            full_body: dict = {}
+            if flags & _FLAG_FULL_BODY:
+                (size,) = _LEN.unpack_from(buf, pos)
+                pos += _LEN.size
+                if pos + size > len(buf):
+                    raise ValueError("Truncated body")
+                full_body = pydantic_core.from_json(data[pos:pos + size])
+                pos += size
+            if pos != len(buf):
+                raise ValueError("Trailing bytes after event")
+        except (struct.error, IndexError, ValueError) as exc:
+            raise ValueError("Cannot restore event from bytes") from exc
+        return event_cls(
+            event_type,
+            chat_id = chat_id,
+            user_id = user_id,
+            user_name = user_name,
+            user_is_bot = bool(flags & _FLAG_USER_IS_BOT),
+            timestamp = timestamp,
+            full_body = full_body,
+            **fields
+        )
+
+
+
+    def _pack_fields(self, parts: list[bytes]):
+        """Append fields of derived event class to the parts list."""
+        pass
+
+
+    @classmethod
+    def _unpack_fields(cls, buf: memoryview, pos: int) -> tuple[dict, int]:
+        """Read fields of derived event class. Returns fields dict and new position."""
+        return {}, pos
+
+
 @dataclass(slots=True)
 class MessageCreatedEvent(MaxWebhookEvent):
     """
@@ -62,6 +197,31 @@ class MessageCreatedEvent(MaxWebhookEvent):
     attachments: list[Attachment] = field(default_factory=list[Attachment])
 
 
+    def _pack_fields(self, parts: list[bytes]):
+        _pack_str(parts, self.text)
+        parts.append(_INT.pack(self.recipient_id))
+        parts.append(_LEN.pack(len(self.attachments)))
+        for a in self.attachments:
+            _pack_str(parts, a.attachment_type)
+            _pack_str(parts, a.url)
+            _pack_str(parts, a.token)
+
+
+    @classmethod
+    def _unpack_fields(cls, buf: memoryview, pos: int) -> tuple[dict, int]:
+        text, pos = _unpack_str(buf, pos)
+        (recipient_id,) = _INT.unpack_from(buf, pos)
+        (count,) = _LEN.unpack_from(buf, pos + _INT.size)
+        pos += _INT.size + _LEN.size
+        attachments: list[Attachment] = []
+        for _ in range(count):
+            attachment_type, pos = _unpack_str(buf, pos)
+            url, pos = _unpack_str(buf, pos)
+            token, pos = _unpack_str(buf, pos)
+            attachments.append(Attachment(attachment_type, url, token))    # type: ignore[arg-type]
+        return {"text": text, "recipient_id": recipient_id, "attachments": attachments}, pos
+
+
 @dataclass(slots=True)
 class MessageCallbackEvent(MaxWebhookEvent):
     """
@@ -69,6 +229,43 @@ class MessageCallbackEvent(MaxWebhookEvent):
     """
     callback_id: str
     payload: str        # Button token
+    # Payload & its values decoded by `args` (decoded once per payload)
+    _args: tuple[str, tuple[PayloadValue, ...]]|None = field(default=None, init=False, repr=False, compare=False)
+
+
+    @property
+    def route(self) -> str:
+        """Route of the payload in format `<route>:<args>`."""
+        return self.payload.partition(":")[0]
+
+
+    @property
+    def args(self) -> tuple[PayloadValue, ...]:
+        """
+        Values packed to the payload by `PayloadCodec` (see `messenger_utils.payload`).
+
+        :raises ValueError: if the payload is not encoded by the codec
+        """
+        if self._args is None or self._args[0] != self.payload:
+            self._args = (self.payload, _payload.default_codec.decode(self.payload)[1])
+        return self._args[1]
+
+
+    def _pack_fields(self, parts: list[bytes]):
+        _pack_str(parts, self.callback_id)
+        _pack_str(parts, self.payload)
+
+
+    @classmethod
+    def _unpack_fields(cls, buf: memoryview, pos: int) -> tuple[dict, int]:
+        callback_id, pos = _unpack_str(buf, pos)
+        payload, pos = _unpack_str(buf, pos)
+        return {"callback_id": callback_id, "payload": payload}, pos
 
 
 MaxWebhookEventType = MaxWebhookEvent | MessageCreatedEvent | MessageCallbackEvent
+
+_EVENT_CLASSES: dict[str, type[MaxWebhookEvent]] = {
+    "message_created": MessageCreatedEvent,
+    "message_callback": MessageCallbackEvent
+}
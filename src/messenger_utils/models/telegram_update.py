@@ -0,0 +1,179 @@
+"""
+Telegram Update Classes
+
+Updates of Bot API are mapped to the events of the same types and fields as MAX webhook events,
+so one handler code can process both messengers.
+"""
+
+__all__ = [
+    "TelegramEventTypes", "TelegramEvent", "TelegramMessageEvent", "TelegramCallbackEvent", "TelegramEventType",
+    "ALLOWED_UPDATES", "parse_update"
+]
+
+
+from dataclasses import dataclass, field
+from typing import Any, Literal
+from messenger_utils import payload as _payload
+from messenger_utils.payload import PayloadValue
+
+
+TelegramEventTypes = Literal[
+    "bot_started",
+    "bot_stopped",
+    "message_created",
+    "message_callback"
+]
+
+# Update kinds requested by `getUpdates` (others are not parsed)
+ALLOWED_UPDATES: list[str] = ["message", "callback_query", "my_chat_member"]
+
+
+
+@dataclass(slots=True)
+class TelegramEvent:
+    """
+    Base class for all Telegram update events.
+    """
+    event_type: TelegramEventTypes
+    update_id: int
+    chat_id: int
+    user_id: int
+    user_name: str          # first & last name of the user
+    user_is_bot: bool
+    timestamp: int          # milliseconds (as in MAX events)
+    full_body: dict         # original update
+
+
+
+@dataclass(slots=True)
+class TelegramMessageEvent(TelegramEvent):
+    """
+    Event with type `message_created`.
+    """
+    text: str               # text or caption of the message
+    message_id: int
+
+
+    @property
+    def command(self) -> str|None:
+        """Command of the message without `/`, `@botname` and arguments (`None` if it's not a command)."""
+        if not self.text.startswith("/"):
+            return None
+        return self.text[1:].split(maxsplit=1)[0].partition("@")[0] if len(self.text) > 1 else ""
+
+
+
+@dataclass(slots=True)
+class TelegramCallbackEvent(TelegramEvent):
+    """
+    Event of callback from inline keyboard button.
+    """
+    callback_id: str
+    payload: str            # `callback_data` of the button
+    message_id: int|None    # message with the keyboard (`None` if it's too old)
+    # Payload & its values decoded by `args` (decoded once per payload)
+    _args: tuple[str, tuple[PayloadValue, ...]]|None = field(default=None, init=False, repr=False, compare=False)
+
+
+    @property
+    def route(self) -> str:
+        """Route of the payload in format `<route>:<args>`."""
+        return self.payload.partition(":")[0]
+
+
+    @property
+    def args(self) -> tuple[PayloadValue, ...]:
+        """
+        Values packed to the payload by `PayloadCodec` (see `messenger_utils.payload`).
+
+        :raises ValueError: if the payload is not encoded by the codec
+        """
+        if self._args is None or self._args[0] != self.payload:
+            self._args = (self.payload, _payload.default_codec.decode(self.payload)[1])
+        return self._args[1]
+
+
+TelegramEventType = TelegramEvent | TelegramMessageEvent | TelegramCallbackEvent
+
+
+
+def _user_name(user: dict[str, Any]) -> str:
+    return " ".join(filter(None, (user.get("first_name"), user.get("last_name"))))
+
+
+
+def parse_update(update: dict[str, Any]) -> TelegramEventType:
+    """
+    Parse update of Bot API.
+
+    :param update: update object (`getUpdates` result item or webhook body)
+    :return: event object
+    :raises ValueError: if the update kind is not supported or the body is not valid
+    """
+    match update:
+        # > Message
+        case {
+            "update_id": update_id,
+            "message": {
+                "message_id": message_id,
+                "date": date,
+                "chat": {"id": chat_id},
+                "from": {"id": user_id, "is_bot": user_is_bot} as user
+            } as message
+        }:
+            return TelegramMessageEvent(
+                "message_created",
+                update_id = update_id,
+                chat_id = chat_id,
+                user_id = user_id,
+                user_name = _user_name(user),
+                user_is_bot = user_is_bot,
+                timestamp = date * 1000,
+                full_body = update,
+                text = message.get("text") or message.get("caption") or "",
+                message_id = message_id
+            )
+        # > Button callback
+        case {
+            "update_id": update_id,
+            "callback_query": {
+                "id": callback_id,
+                "from": {"id": user_id, "is_bot": user_is_bot} as user
+            } as callback
+        }:
+            message = callback.get("message") or {}
+            return TelegramCallbackEvent(
+                "message_callback",
+                update_id = update_id,
+                chat_id = message.get("chat", {}).get("id", user_id),
+                user_id = user_id,
+                user_name = _user_name(user),
+                user_is_bot = user_is_bot,
+                timestamp = message.get("date", 0) * 1000,
+                full_body = update,
+                callback_id = callback_id,
+                payload = callback.get("data", ""),
+                message_id = message.get("message_id")
+            )
+        # > Bot started (unblocked) or stopped (blocked) by the user in private chat
+        case {
+            "update_id": update_id,
+            "my_chat_member": {
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": user_is_bot} as user,
+                "date": date,
+                "new_chat_member": {"status": status}
+            }
+        }:
+            return TelegramEvent(
+                "bot_stopped" if status == "kicked" else "bot_started",
+                update_id = update_id,
+                chat_id = chat_id,
+                user_id = user_id,
+                user_name = _user_name(user),
+                user_is_bot = user_is_bot,
+                timestamp = date * 1000,
+                full_body = update
+            )
+        case _:
+            raise ValueError("Cannot parse Telegram update")
@@ -0,0 +1,191 @@
+"""
+Compact codec of structured values in buttons' callback payload.
+
+Payload format: `<route>:<value>:<value>...` (compatible with `Receiver.callback_route`), values are type-tagged:
+- `i<base36>`: int
+- `s<text>`: str (`%` and `:` are percent-escaped)
+- `d<repr>`: float
+- `t` / `f` / `n`: True / False / None
+Enums are encoded by their values.
+
+If encoded payload exceeds the limit, the values are put to the store and payload contains short token:
+`<route>:~<token>`. The default store is bounded in-memory LRU; for several processes use shared store
+(any `MutableMapping[str, str]`).
+"""
+
+__all__ = ["PayloadValue", "PayloadCodec", "default_codec"]
+
+
+import base64
+import hashlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from enum import Enum
+
+
+type PayloadValue = int | str | float | bool | None | Enum
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _int_to_base36(value: int) -> str:
+    """Format integer in base 36."""
+    if value < 0:
+        return "-" + _int_to_base36(-value)
+    if value < 36:
+        return _DIGITS[value]
+    digits: list[str] = []
+    while value:
+        value, rest = divmod(value, 36)
+        digits.append(_DIGITS[rest])
+    return "".join(reversed(digits))
+
+
+
+class _LRUStore(OrderedDict):
+    """Bounded in-memory store of overflowed payloads."""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+
+### Class PayloadCodec ###
+
+class PayloadCodec:
+    """
+    Callback payload encoder / decoder.
+
+    Usage:
+    ```
+    button = CallbackButton(text="Pay", payload=default_codec.encode("pay", order_id, "card"))
+    ...
+    @MaxReceiver.callback_route("pay")
+    async def pay(event: MessageCallbackEvent, **kwargs):
+        order_id, method = event.args
+    ```
+    """
+
+    def __init__(
+        self, *,
+        max_length: int = 1024,
+        cache_size: int = 10_000,
+        store: MutableMapping[str, str]|None = None
+    ):
+        """
+        Init codec.
+
+        :param max_length: max payload length in bytes of UTF-8 (1024 for MAX, 64 for Telegram)
+        :param cache_size: size of default in-memory store of overflowed payloads
+        :param store: custom store of overflowed payloads
+        """
+        self.max_length: int = max_length
+        self.store: MutableMapping[str, str] = store if store is not None else _LRUStore(cache_size)
+
+
+
+    def encode(self, route: str, *values: PayloadValue) -> str:
+        """
+        Encode values to payload.
+
+        :param route: route name (payload part before the first `:`)
+        :param values: values to pack
+        :return: payload string
+        :raises TypeError: if value type is not supported
+        :raises ValueError: if route contains `:`
+        """
+        if ":" in route:
+            raise ValueError(f"Route `{route}` must not contain `:`")
+        args = ":".join(self._encode_value(v) for v in values)
+        payload = f"{route}:{args}" if values else route
+        if len(payload.encode()) <= self.max_length:
+            return payload
+        # Overflow: store values, put token to payload
+        token = base64.urlsafe_b64encode(hashlib.blake2b(args.encode(), digest_size=12).digest()).decode()
+        self.store[token] = args
+        return f"{route}:~{token}"
+
+
+
+    def decode(self, payload: str) -> tuple[str, tuple[PayloadValue, ...]]:
+        """
+        Decode payload.
+
+        :param payload: payload string
+        :return: (route, values)
+        :raises ValueError: if payload is not valid or overflowed values are not found in the store
+        """
+        route, sep, args = payload.partition(":")
+        if not sep:
+            return route, ()
+        if args.startswith("~"):
+            try:
+                args = self.store[args[1:]]
+            except KeyError as exc:
+                raise ValueError(f"Payload values of `{payload}` not found in the store (expired?)") from exc
+        return route, tuple(self._decode_value(item) for item in args.split(":"))
+
+
+
+    #  PRIVATE METHODS
+
+
+    @staticmethod
+    def _encode_value(value: PayloadValue) -> str:
+        """Encode single value."""
+        if isinstance(value, Enum):
+            value = value.value
+        match value:
+            case None:
+                return "n"
+            case True:
+                return "t"
+            case False:
+                return "f"
+            case int():
+                return "i" + _int_to_base36(value)
+            case float():
+                return "d" + repr(value)
+            case str():
+                return "s" + value.replace("%", "%25").replace(":", "%3A")
+            case _:
+                raise TypeError(f"Unsupported payload value type: {type(value).__name__}")
+
+
+
+    @staticmethod
+    def _decode_value(item: str) -> PayloadValue:
+        """Decode single value."""
+        match item[:1]:
+            case "i":
+                return int(item[1:], 36)
+            case "s":
+                return item[1:].replace("%3A", ":").replace("%25", "%")
+            case "d":
+                return float(item[1:])
+            case "t":
+                return True
+            case "f":
+                return False
+            case "n":
+                return None
+            case _:
+                raise ValueError(f"Invalid payload value: `{item}`")
+
+### End of class PayloadCodec ###
+
+
+# Codec used by `MessageCallbackEvent.args` (can be replaced by codec with custom store)
+default_codec = PayloadCodec()
@@ -0,0 +1,153 @@
+"""
+Load probe of bot webhook endpoint with synthetic MAX webhooks (before switching the bot's webhooks to it).
+
+Concurrency is ramped up (1, 2, 4, ...) while the endpoint keeps error rate and p99 latency within limits
+and the throughput still grows; the best passed step gives the highest sustainable rate.
+"""
+
+__all__ = ["ProbeStep", "ProbeResult", "probe_step", "probe_endpoint"]
+
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import httpx
+from messenger_utils.stats import LatencyStats
+from messenger_utils.max.max_synthetic import SyntheticWebhooks
+
+
+@dataclass
+class ProbeStep:
+    """
+    Results of the probe at one concurrency.
+    """
+    concurrency: int
+    requests: int = 0
+    errors: int = 0                 # transport errors and non-2xx responses
+    duration: float = 0.0           # seconds
+    latency: LatencyStats = field(default_factory=LatencyStats)
+    statuses: Counter = field(default_factory=Counter)         # response status (0 - transport error) => count
+    passed: bool = False            # error rate & latency are within limits
+
+
+    @property
+    def rate(self) -> float:
+        """Achieved rate of successful requests per second."""
+        return (self.requests - self.errors) / self.duration if self.duration > 0 else 0.0
+
+
+    @property
+    def error_rate(self) -> float:
+        """Share of failed requests (0..1)."""
+        return self.errors / self.requests if self.requests else 0.0
+
+
+
+@dataclass
+class ProbeResult:
+    """
+    Results of the probe.
+    """
+    steps: list[ProbeStep] = field(default_factory=list)
+
+
+    @property
+    def best(self) -> ProbeStep|None:
+        """Passed step with the highest rate."""
+        return max((s for s in self.steps if s.passed), key=lambda s: s.rate, default=None)
+
+
+    @property
+    def sustainable_rate(self) -> float:
+        """Highest rate with error rate & latency within limits (requests per second)."""
+        return self.best.rate if self.best is not None else 0.0
+
+
+
+async def probe_step(
+    client: httpx.AsyncClient,
+    url: str,
+    bodies: Iterator[bytes], *,
+    concurrency: int,
+    requests: int,
+    headers: dict[str, str]|None = None
+) -> ProbeStep:
+    """
+    Post webhooks with fixed concurrency.
+
+    :param client: HTTP client (with pool of at least `concurrency` connections)
+    :param url: webhook endpoint URL
+    :param bodies: webhook bodies
+    :param concurrency: simultaneous requests
+    :param requests: count of requests
+    :param headers: extra headers (e.g. `X-Max-Bot-Api-Secret`)
+    :return: step stats
+    """
+    step = ProbeStep(concurrency)
+    counter = iter(range(requests))
+    headers = {"Content-Type": "application/json", **(headers or {})}
+
+    async def work():
+        for _ in counter:
+            body = next(bodies)
+            t_start = time.perf_counter()
+            step.requests += 1
+            try:
+                response = await client.post(url, content=body, headers=headers)
+                status = response.status_code
+            except httpx.TransportError:
+                status = 0
+            step.latency.add(time.perf_counter() - t_start)
+            step.statuses[status] += 1
+            if not 200 <= status < 300:
+                step.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    step.duration = time.perf_counter() - started
+    return step
+
+
+
+async def probe_endpoint(
+    url: str, *,
+    concurrency: int|None = None,
+    max_concurrency: int = 256,
+    requests: int = 500,
+    max_error_rate: float = 0.01,
+    max_p99: float = 1.0,
+    secret: str|None = None,
+    webhooks: SyntheticWebhooks|None = None,
+    timeout: float = 10.0
+) -> ProbeResult:
+    """
+    Probe webhook endpoint with synthetic webhooks.
+
+    :param url: webhook endpoint URL
+    :param concurrency: fixed concurrency (no ramp up) if provided
+    :param max_concurrency: ramp up limit
+    :param requests: requests per step
+    :param max_error_rate: max share of failed requests of passed step (0..1)
+    :param max_p99: max p99 latency of passed step (seconds)
+    :param secret: `X-Max-Bot-Api-Secret` header value
+    :param webhooks: generator of webhook bodies (all event types mixed by default)
+    :param timeout: request timeout (seconds)
+    :return: results of all steps
+    """
+    bodies = (webhooks or SyntheticWebhooks()).stream()
+    headers = {"X-Max-Bot-Api-Secret": secret} if secret else None
+    levels = [concurrency] if concurrency else [2 ** i for i in range(max_concurrency.bit_length()) if 2 ** i <= max_concurrency]
+    result = ProbeResult()
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        for level in levels:
+            step = await probe_step(client, url, bodies, concurrency=level, requests=requests, headers=headers)
+            step.passed = step.error_rate <= max_error_rate and step.latency.percentile(99) <= max_p99
+            previous = result.steps[-1] if result.steps else None
+            result.steps.append(step)
+            # Stop ramp up on failure or saturation (the rate doesn't grow with concurrency)
+            if not step.passed or (previous is not None and step.rate < previous.rate * 1.05):
+                break
+    return result
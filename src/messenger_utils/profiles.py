@@ -0,0 +1,117 @@
+"""
+Named bot profiles of the CLI and concurrent operations over several bots.
+
+Profiles are read from TOML file (`~/.config/messenger_utils/profiles.toml`, or the path from
+`MESSENGER_UTILS_PROFILES_FILE` env var) and environment variables (they override the file):
+```
+# profiles.toml
+[profiles.shop]
+token = "..."
+chat_id = 123456        # default chat of `send`
+
+# env
+MESSENGER_UTILS_PROFILES__SUPPORT__TOKEN=...
+```
+"""
+
+__all__ = ["BotProfile", "ProfilesSettings", "load_profiles", "select_profiles", "fan_out"]
+
+
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import TypeVar
+import httpx
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict, TomlConfigSettingsSource
+from messenger_utils.sender import Sender
+from messenger_utils.max.max_sender import MaxSender
+
+
+T = TypeVar("T")
+
+PROFILES_FILE = Path.home() / ".config" / "messenger_utils" / "profiles.toml"
+
+
+class BotProfile(BaseModel):
+    """
+    Bot profile.
+    """
+    token: str
+    chat_id: int|None = None        # Default chat to send messages to
+
+
+
+class ProfilesSettings(BaseSettings):
+    """
+    Profiles from TOML file and environment.
+    """
+    model_config = SettingsConfigDict(env_prefix="MESSENGER_UTILS_", env_nested_delimiter="__", extra="ignore")
+
+    profiles: dict[str, BotProfile] = {}
+
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> tuple[PydanticBaseSettingsSource, ...]:
+        toml_file = Path(os.environ.get("MESSENGER_UTILS_PROFILES_FILE", PROFILES_FILE))
+        return (init_settings, env_settings, TomlConfigSettingsSource(settings_cls, toml_file=toml_file))
+
+
+
+def load_profiles() -> dict[str, BotProfile]:
+    """Load profiles from the file and environment."""
+    return ProfilesSettings().profiles
+
+
+
+def select_profiles(profiles: dict[str, BotProfile], names: str|list[str]|None = None) -> dict[str, BotProfile]:
+    """
+    Select profiles by names.
+
+    :param profiles: all profiles
+    :param names: comma-separated or list of names (all profiles if `None`)
+    :return: selected profiles in order of names
+    :raises ValueError: if profile not found or no profiles selected
+    """
+    if names is None:
+        selected = dict(profiles)
+    else:
+        if isinstance(names, str):
+            names = [name.strip() for name in names.split(",") if name.strip()]
+        if unknown := [name for name in names if name not in profiles]:
+            raise ValueError(f"Profiles not found: {', '.join(unknown)}")
+        selected = {name: profiles[name] for name in names}
+    if not selected:
+        raise ValueError("No bot profiles selected (see `MESSENGER_UTILS_PROFILES_FILE`)")
+    return selected
+
+
+
+async def fan_out(
+    profiles: dict[str, BotProfile],
+    operation: Callable[[MaxSender, BotProfile], Awaitable[T]], *,
+    max_connections: int = 100
+) -> dict[str, T|Exception]:
+    """
+    Run operation against every bot concurrently over shared connection pool.
+
+    :param profiles: bots profiles
+    :param operation: async function `(sender, profile) -> result`
+    :param max_connections: size of the shared connection pool
+    :return: profile name => result or raised exception
+    """
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(transport=Sender.default_transport, limits=limits, timeout=30.0) as client:
+        results = await asyncio.gather(
+            *(operation(MaxSender(profile.token, client=client), profile) for profile in profiles.values()),
+            return_exceptions=True
+        )
+    return dict(zip(profiles, results))
@@ -0,0 +1,90 @@
+"""
+Rate limiting of API requests.
+"""
+
+__all__ = ["RateLimiter"]
+
+
+import asyncio
+import time
+
+
+### Class RateLimiter ###
+
+class RateLimiter:
+    """
+    Async token bucket: allows `rate` acquisitions per `period` with bursts up to `burst`.
+    Waiting tasks are served in FIFO order.
+    """
+
+    def __init__(self, rate: float, *, period: float = 1.0, burst: int|None = None):
+        """
+        Init limiter.
+
+        :param rate: allowed count of acquisitions per period
+        :param period: period in seconds
+        :param burst: max acquisitions at once after idle time (default - 1)
+        """
+        if rate <= 0:
+            raise ValueError("`rate` must be positive")
+        self.rate: float = rate / period            # per second
+        self.burst: int = burst if burst is not None else 1
+        self._tokens: float = float(self.burst)
+        self._updated: float = time.monotonic()
+        self._lock = asyncio.Lock()
+
+
+
+    async def acquire(self):
+        """Wait until the next acquisition is allowed."""
+        async with self._lock:
+            # `pause` may be called while waiting
+            while (delay := self.delay()) > 0:
+                await asyncio.sleep(delay)
+            self._refill()
+            self._tokens -= 1
+
+
+
+    def delay(self) -> float:
+        """Time (in seconds) to wait for the next acquisition, without acquiring."""
+        tokens = min(self._tokens + (time.monotonic() - self._updated) * self.rate, self.burst)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+
+
+    @property
+    def idle(self) -> bool:
+        """Bucket is full and nobody waits (the limiter is in the initial state)."""
+        tokens = self._tokens + (time.monotonic() - self._updated) * self.rate
+        return tokens >= self.burst and not self._lock.locked()
+
+
+
+    def pause(self, seconds: float):
+        """
+        Forbid acquisitions for the time (e.g. `retry_after` of the API), then continue with the rate.
+
+        :param seconds: pause in seconds
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 1.0) - seconds * self.rate
+
+
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+        self._updated = now
+
+
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+### End of class RateLimiter ###
@@ -6,6 +6,7 @@ from abc import ABC, abstractmethod
 from typing import Any, Generic, TypeVar
 from collections.abc import Callable
 from functools import wraps
+from messenger_utils.state import StateStore
 
 # Generic types: for MAX & Telegram specific objects
 T_WHOOK = TypeVar("T_WHOOK")    # WebHook type
@@ -26,11 +27,18 @@ class Receiver(ABC, Generic[T_WHOOK]):
     # Messages
     create_message_func: Callable | None = None
     callback_messages_table: dict[str, Callable] = {}      # Button's token <=> Function link (set by decorator `callback`)
+    callback_routes_table: dict[str, Callable] = {}        # Route of "<route>:<args>" tokens <=> Function link (set by decorator `callback_route`)
     # Functions processing bot state changes
     bot_started_func: Callable | None = None
     bot_stopped_func: Callable | None = None
     chat_cleared_func: Callable | None = None
     chat_removed_func: Callable | None = None
+    # Handlers active only in particular dialog state (set by decorators with `state` param)
+    state_commands_table: dict[tuple[str, str], Callable] = {}     # (State, Command) <=> Function link
+    state_callbacks_table: dict[tuple[str, str], Callable] = {}    # (State, Button's token) <=> Function link
+    state_messages_table: dict[str, Callable] = {}                 # State <=> Function link (set by decorator `state_message`)
+    # Dialog states storage (if set, `FSMContext` is passed to handlers as `state` kwarg)
+    state_store: StateStore | None = None
 
 
 
@@ -49,16 +57,20 @@ class Receiver(ABC, Generic[T_WHOOK]):
     #
 
     @classmethod
-    def command(cls, cmd_name: str) -> Callable:
+    def command(cls, cmd_name: str, *, state: str|None = None) -> Callable:
         """
         Decorator factory for commands processing.
         
         :param name: command name (without /) to process
+        :param state: if set - the function processes the command only in this dialog state
         :return: Decorator function
         """
         def decorator(func: Callable) -> Callable:
             """The decorator itself."""
-            cls.commands_table[cmd_name] = func
+            if state is None:
+                cls.commands_table[cmd_name] = func
+            else:
+                cls.state_commands_table[(state, cmd_name)] = func
             @wraps(func)
             def wrapper(*args, **kwargs) -> Callable:
                 """Wrapper function."""
@@ -68,15 +80,20 @@ class Receiver(ABC, Generic[T_WHOOK]):
 
 
     @classmethod
-    def callback(cls, btn_token: str) -> Callable:
+    def callback(cls, btn_token: str, *, state: str|None = None) -> Callable:
         """
         Decorator for `callback_message` processing function.
         
+        :param btn_token: button's payload to process
+        :param state: if set - the function processes the callback only in this dialog state
         :return: Decorator function
         """
         def decorator(func: Callable) -> Callable:
             """The decorator itself."""
-            cls.callback_messages_table[btn_token] = func
+            if state is None:
+                cls.callback_messages_table[btn_token] = func
+            else:
+                cls.state_callbacks_table[(state, btn_token)] = func
             @wraps(func)
             def wrapper(*args, **kwargs) -> Callable:
                 """Wrapper function."""
@@ -86,6 +103,40 @@ class Receiver(ABC, Generic[T_WHOOK]):
 
 
 
+    @classmethod
+    def callback_route(cls, route: str) -> Callable:
+        """
+        Decorator factory for processing callbacks of buttons with payload in format `<route>:<args>`.
+        Used if there is no handler for the exact payload.
+
+        :param route: route name (payload part before the first `:`)
+        :return: Decorator function
+        """
+        def decorator(func: Callable) -> Callable:
+            """The decorator itself."""
+            cls.callback_routes_table[route] = func
+            return func
+        return decorator
+
+
+
+    @classmethod
+    def state_message(cls, state: str) -> Callable:
+        """
+        Decorator factory for messages (not commands) processing in particular dialog state.
+        Replaces `create_message` function while the dialog is in the state.
+
+        :param state: dialog state name
+        :return: Decorator function
+        """
+        def decorator(func: Callable) -> Callable:
+            """The decorator itself."""
+            cls.state_messages_table[state] = func
+            return func
+        return decorator
+
+
+
     #
     # SIMPLE DECORATORS
     #
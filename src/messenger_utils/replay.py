@@ -0,0 +1,141 @@
+"""
+Offline replay of recorded MAX webhooks through `MaxReceiver` dispatch (for capacity tests of bots).
+
+Sources of recorded webhooks:
+- NDJSON file: one webhook body per line
+- `WebhookJournal` directory
+"""
+
+__all__ = ["ReplayStats", "read_webhooks", "stub_transport", "replay_webhooks"]
+
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+import httpx
+from messenger_utils.journal import read_journal
+from messenger_utils.stats import LatencyStats
+from messenger_utils.max.max_receiver import MaxReceiver
+from messenger_utils.max.max_decoder import MaxWebhookDecoder
+
+
+@dataclass
+class ReplayStats:
+    """
+    Results of the replay.
+    """
+    events: int = 0
+    parse_errors: int = 0
+    handler_errors: int = 0
+    duration: float = 0.0                                       # seconds
+    latency: LatencyStats = field(default_factory=LatencyStats)   # parse + dispatch time of events
+    sends: Counter = field(default_factory=Counter)             # stubbed API calls: "<METHOD> /<endpoint>" => count
+
+
+    @property
+    def events_per_sec(self) -> float:
+        """Achieved events rate."""
+        return self.events / self.duration if self.duration > 0 else 0.0
+
+
+
+def read_webhooks(path: str|Path) -> Iterator[bytes]:
+    """
+    Stream recorded webhook bodies.
+
+    :param path: NDJSON file or journal directory
+    :return: iterator of raw webhook bodies
+    """
+    path = Path(path)
+    if path.is_dir():
+        # Read only: the journal may be written by running server
+        for entry in read_journal(path):
+            yield entry.data
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+
+def stub_transport(stats: ReplayStats, *, latency: float = 0.0) -> httpx.AsyncBaseTransport:
+    """
+    Create HTTP transport answering all bot API calls with success and counting them.
+
+    :param stats: stats to count calls in
+    :param latency: simulated API latency in seconds
+    """
+    async def handler(request: httpx.Request) -> httpx.Response:
+        stats.sends[f"{request.method} {request.url.path}"] += 1
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return httpx.Response(200, json={"success": True})
+    return httpx.MockTransport(handler)
+
+
+
+async def replay_webhooks(
+    bodies: Iterable[bytes], *,
+    speed: float = 0.0,
+    concurrency: int = 1,
+    stats: ReplayStats|None = None,
+    **kwargs
+) -> ReplayStats:
+    """
+    Dispatch recorded webhooks through `MaxReceiver`.
+
+    :param bodies: raw webhook bodies
+    :param speed: 0 - as fast as possible, otherwise scale of original timing (2.0 - twice faster)
+    :param concurrency: max count of webhooks processed simultaneously (1 - sequential processing)
+    :param stats: stats object to fill (new one is created if not provided)
+    :param kwargs: args passed to handler functions
+    :return: replay stats
+    """
+    stats = stats if stats is not None else ReplayStats()
+    decoder = MaxWebhookDecoder()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
+    first_ts: int|None = None
+    started = time.perf_counter()
+
+    async def process(receiver: MaxReceiver, t_start: float):
+        try:
+            await receiver.process_webhook(**kwargs)
+        except Exception:       # pylint: disable=broad-exception-caught
+            stats.handler_errors += 1
+        finally:
+            stats.latency.add(time.perf_counter() - t_start)
+            semaphore.release()
+
+    for raw in bodies:
+        await semaphore.acquire()
+        t_start = time.perf_counter()
+        stats.events += 1
+        try:
+            receiver = MaxReceiver.from_raw(raw, decoder=decoder)
+        except ValueError:
+            stats.parse_errors += 1
+            semaphore.release()
+            continue
+        assert receiver.webhook_event is not None
+        # Keep original intervals between webhooks (scaled)
+        if speed > 0:
+            timestamp = receiver.webhook_event.timestamp
+            if first_ts is None:
+                first_ts = timestamp
+            delay = started + (timestamp - first_ts) / 1000 / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                t_start = time.perf_counter()
+        task = asyncio.create_task(process(receiver, t_start))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    stats.duration = time.perf_counter() - started
+    return stats
+
@@ -2,8 +2,16 @@
 Message send functionality for messenger_utils
 """
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from typing import Any
 import httpx
+from messenger_utils import metrics, tracing
+
+
+# Response statuses of requests to retry (see `max_retries` of `Sender`)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 
 ### CLASS `Sender` ###
@@ -14,14 +22,77 @@ class Sender(ABC):
     Particular functionality is implemented in derived classes.
     """
 
-    def __init__(self, bot_token: str):
+    # HTTP transport for senders without own one (e.g. `httpx.MockTransport` to stub API calls)
+    default_transport: httpx.AsyncBaseTransport | None = None
+
+
+    def __init__(
+        self,
+        bot_token: str, *,
+        transport: httpx.AsyncBaseTransport|None = None,
+        client: httpx.AsyncClient|None = None,
+        max_retries: int = 0,
+        retry_backoff: float = 0.5
+    ):
         """
         Init Sender object.
         
         :param secret_key: Secret key for API authentication.
+        :param transport: custom HTTP transport (`Sender.default_transport` is used if not provided)
+        :param client: shared HTTP client (connection pool) to send requests with
+        :param max_retries: retries of requests answered with 429 or 5xx status
+        :param retry_backoff: delay before the first retry (doubled for every next one) if no `Retry-After` header
         """
         self.bot_token: str = bot_token
         self.api_url: str = ""
+        self.transport: httpx.AsyncBaseTransport | None = transport
+        self.client: httpx.AsyncClient | None = client
+        self._own_client: bool = False
+        self.max_retries: int = max_retries
+        self.retry_backoff: float = retry_backoff
+        self.retries: int = 0           # Count of retried requests
+
+
+
+    ###  Connection pool  ###
+
+
+    def open(self, *, max_connections: int = 100, timeout: float = 30.0) -> httpx.AsyncClient:
+        """
+        Open pooled HTTP client, used by all requests of the sender until `aclose`.
+        Without the pool every request opens a new connection.
+
+        :param max_connections: max simultaneous connections to the API
+        :param timeout: requests timeout in seconds
+        :return: HTTP client
+        """
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                transport=self.transport or Sender.default_transport,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=timeout
+            )
+            self._own_client = True
+        return self.client
+
+
+
+    async def aclose(self):
+        """Close pooled HTTP client opened by `open`."""
+        if self.client is not None and self._own_client:
+            await self.client.aclose()
+            self.client = None
+            self._own_client = False
+
+
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
 
 
@@ -54,19 +125,7 @@ class Sender(ABC):
         :param endpoint: url part after `api_url`
         :param url-params: ?xxx&yyy params of get-request (if needed)
         """
-        url = f"{self.api_url}/{endpoint}"
-        headers = {
-            "Authorization": self.bot_token
-        }
-        response: httpx.Response
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers=headers,
-                params=url_params
-            )
-            response.raise_for_status()
-        return response.json()
+        return await self._request("GET", endpoint, url_params=url_params)
 
 
 
@@ -81,19 +140,7 @@ class Sender(ABC):
         :param: endpoint: url part after `api_url`
         :param: data: request body in dict format
         """
-        url = f"{self.api_url}/{endpoint}"
-        headers = {
-            "Authorization": self.bot_token
-        }
-        response: httpx.Response
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                url,
-                headers=headers,
-                json=data
-            )
-            response.raise_for_status()
-        return response.json()
+        return await self._request("PATCH", endpoint, data=data)
 
 
 
@@ -109,20 +156,7 @@ class Sender(ABC):
         :param: endpoint: url part after `api_url`
         :param: data: request body in dict format
         """
-        url = f"{self.api_url}/{endpoint}"
-        headers = {
-            "Authorization": self.bot_token
-        }
-        response: httpx.Response
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                headers=headers,
-                params=url_params,
-                json=data
-            )
-            response.raise_for_status()
-        return response.json()
+        return await self._request("POST", endpoint, data=data, url_params=url_params)
 
 
 
@@ -136,19 +170,101 @@ class Sender(ABC):
 
         :param: endpoint: url part after `api_url`
         """
+        return await self._request("DELETE", endpoint, url_params=url_params)
+
+
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str, *,
+        data: dict|None = None,
+        url_params: dict[str, str|int]|None = None
+    ):
+        """
+        Send request to the bot API.
+
+        :param method: HTTP method
+        :param endpoint: url part after `api_url`
+        :param data: request body in dict format
+        :param url_params: ?xxx&yyy params of request
+        :return: response JSON
+        :raises httpx.HTTPStatusError: if response has error status
+        """
         url = f"{self.api_url}/{endpoint}"
-        headers = {
-            "Authorization": self.bot_token
-        }
-        response: httpx.Response
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                url,
-                headers=headers,
-                params=url_params
-            )
-            response.raise_for_status()
-        return response.json()
+        headers = self._auth_headers()
+        if self.client is not None:
+            return await self._send(self.client, method, url, endpoint=endpoint, headers=headers, params=url_params, json=data)
+        async with httpx.AsyncClient(transport=self.transport or Sender.default_transport) as client:
+            return await self._send(client, method, url, endpoint=endpoint, headers=headers, params=url_params, json=data)
+
+
+
+    async def _send(self, client: httpx.AsyncClient, method: str, url: str, *, endpoint: str = "", **kwargs):
+        """Send request with retries of 429 & 5xx responses (traced if tracing is enabled)."""
+        if tracing.tracer is None:
+            return await self._send_retrying(client, method, url, endpoint, None, **kwargs)
+        with tracing.tracer.start_as_current_span(f"{method} {endpoint}", attributes=tracing.api_attributes(method, endpoint, kwargs)) as span:
+            return await self._send_retrying(client, method, url, endpoint, span, **kwargs)
+
+
+
+    async def _send_retrying(self, client: httpx.AsyncClient, method: str, url: str, endpoint: str, span: Any, **kwargs):
+        """Send request with retries (measured if metrics are enabled, status & retries are set to the span)."""
+        measured = metrics.REGISTRY.enabled
+        started = time.perf_counter() if measured else 0.0
+        attempt = 0
+        while True:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                if measured:
+                    metrics.API_REQUESTS.inc((method, endpoint, "error"))
+                raise
+            if measured:
+                metrics.observe_api_response(method, endpoint, response.status_code, len(response.request.content), len(response.content))
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                if measured:
+                    metrics.API_REQUEST_SECONDS.observe(time.perf_counter() - started, (method, endpoint))
+                response.raise_for_status()
+                return response.json()
+            if measured:
+                metrics.API_RETRIES.inc((method, endpoint, str(response.status_code)))
+            delay = self._retry_delay(response, attempt)
+            attempt += 1
+            self.retries += 1
+            if span is not None:
+                span.set_attribute("http.request.resend_count", attempt)
+            await asyncio.sleep(delay)
+            await self._before_retry(endpoint, kwargs)
+
+
+
+    async def _before_retry(self, endpoint: str, request: dict):
+        """
+        Called before the retried request is resent (e.g. to wait for the messenger's rate limits again).
+
+        :param endpoint: url part after `api_url`
+        :param request: `httpx` request kwargs (`params`, `json`, ...)
+        """
+        pass
+
+
+
+    def _auth_headers(self) -> dict[str, str]:
+        """Headers authenticating requests to the API (token in `Authorization` header by default)."""
+        return {"Authorization": self.bot_token}
+
+
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Delay before retry of the response: `Retry-After` header or exponential backoff."""
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return self.retry_backoff * 2 ** attempt
 
 
 ### END OF CLASS `SENDER`` ###
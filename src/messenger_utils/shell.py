@@ -0,0 +1,260 @@
+"""
+Interactive shell of bot administration commands.
+
+All commands of the session use one event loop and one pooled authenticated sender;
+bot info and commands list are cached between commands (updated by the bot's own changes).
+"""
+
+__all__ = ["Shell"]
+
+
+import asyncio
+import shlex
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+import httpx
+from rich.console import Console
+from rich.table import Table
+from messenger_utils.max.max_sender import MaxSender
+
+
+HISTORY_FILE = Path.home() / ".messenger_utils_history"
+
+
+### Class Shell ###
+
+class Shell:
+    """
+    REPL of bot commands.
+
+    Usage:
+    ```
+    Shell(MaxSender(token)).run()
+    ```
+    """
+
+    def __init__(self, sender: MaxSender, console: Console|None = None):
+        """
+        Init shell.
+
+        :param sender: bot sender (pooled client is opened by the shell)
+        :param console: output console
+        """
+        self.sender: MaxSender = sender
+        self.console: Console = console or Console(highlight=False)
+        self._bot_info: dict[str, Any]|None = None
+        # Command => (handler, usage)
+        self.commands: dict[str, tuple[Callable[[list[str]], Awaitable[None]], str]] = {
+            "bot-info": (self.bot_info, "bot-info [--refresh]"),
+            "bot-commands": (self.bot_commands, "bot-commands [--refresh]"),
+            "set-command": (self.set_command, "set-command <name> <description>"),
+            "remove-command": (self.remove_command, "remove-command <name> [<name> ...]"),
+            "send": (self.send, "send <chat_id> <message>"),
+            "webhooks": (self.webhooks, "webhooks [set <url> | remove <url>]"),
+            "refresh": (self.refresh, "refresh  (drop cached bot info)"),
+            "help": (self.help, "help"),
+        }
+
+
+
+    def run(self):
+        """Read and execute commands until `exit` / `quit` / EOF."""
+        interactive = sys.stdin.isatty()
+        if interactive:
+            self._setup_readline()
+        with asyncio.Runner() as runner:
+            self.sender.open()
+            try:
+                self.console.print("Messenger Utils shell. Type `help` for commands, `exit` to quit.", style="cyan")
+                while True:
+                    try:
+                        line = input("max> ")
+                    except EOFError:
+                        break
+                    except KeyboardInterrupt:
+                        self.console.print()
+                        continue
+                    if line.strip() in ("exit", "quit"):
+                        break
+                    try:
+                        runner.run(self.execute(line))
+                    except KeyboardInterrupt:
+                        self.console.print("[!] Interrupted", style="red")
+            finally:
+                runner.run(self.sender.aclose())
+                if interactive:
+                    self._save_history()
+
+
+
+    async def execute(self, line: str):
+        """
+        Execute command line.
+
+        :param line: command with args
+        """
+        try:
+            parts = shlex.split(line)
+        except ValueError as exc:
+            self.console.print(f"[!] {exc}", style="red")
+            return
+        if not parts:
+            return
+        name, *args = parts
+        if name not in self.commands:
+            self.console.print(f"[!] Unknown command `{name}`. Type `help` for commands.", style="red")
+            return
+        try:
+            await self.commands[name][0](args)
+        except (ValueError, IndexError):
+            self.console.print(f"Usage: {self.commands[name][1]}", style="yellow")
+        except httpx.HTTPStatusError as exc:
+            self.console.print(f"[!] API error {exc.response.status_code}: {exc.response.text}", style="red")
+        except httpx.HTTPError as exc:
+            self.console.print(f"[!] Network error: {exc}", style="red")
+
+
+
+    ###  Commands  ###
+
+
+    async def bot_info(self, args: list[str]):
+        """Print bot info."""
+        self.console.print(await self._get_bot_info(refresh="--refresh" in args), style="cyan")
+
+
+    async def bot_commands(self, args: list[str]):
+        """Print bot commands."""
+        commands = (await self._get_bot_info(refresh="--refresh" in args)).get("commands", [])
+        if not commands:
+            self.console.print("No commands found for bot", style="yellow")
+            return
+        table = Table(title="Bot Commands")
+        table.add_column("Name", style="cyan", no_wrap=True)
+        table.add_column("Description", style="cyan")
+        for command in commands:
+            table.add_row(command.get("name", ""), command.get("description", ""))
+        self.console.print(table)
+
+
+    async def set_command(self, args: list[str]):
+        """Register new bot command."""
+        name, description = args[0], " ".join(args[1:])
+        if not description:
+            raise ValueError("Description is required")
+        commands = list((await self._get_bot_info()).get("commands", []))
+        if any(command["name"] == name for command in commands):
+            self.console.print(f"[!] Command `{name}` already exists!", style="red")
+            return
+        commands.append({"name": name, "description": description})
+        await self._update_commands(commands)
+        self.console.print(f"Command `{name}` registered", style="cyan")
+
+
+    async def remove_command(self, args: list[str]):
+        """Remove bot commands."""
+        if not args:
+            raise ValueError("Command name is required")
+        commands = (await self._get_bot_info()).get("commands", [])
+        if missing := [name for name in args if name not in {c["name"] for c in commands}]:
+            self.console.print(f"[!] Command `{missing[0]}` not found!", style="red")
+            return
+        await self._update_commands([c for c in commands if c["name"] not in args])
+        self.console.print(f"Removed: {', '.join(args)}", style="cyan")
+
+
+    async def send(self, args: list[str]):
+        """Send text message to the chat."""
+        chat_id, text = int(args[0]), " ".join(args[1:])
+        if not text:
+            raise ValueError("Message is required")
+        response = await self.sender.send_message(text, target=chat_id)
+        self.console.print(response, style="cyan")
+
+
+    async def webhooks(self, args: list[str]):
+        """Print, set or remove webhooks."""
+        if not args:
+            hooks = await self.sender.get_webhooks()
+            for hook in hooks.get("subscriptions", []):
+                self.console.print(f"[>] {hook['url']}", style="cyan")
+            return
+        action, url = args
+        if action == "set":
+            self.console.print(await self.sender.start_webhooks(url=url), style="cyan")
+        elif action == "remove":
+            self.console.print(await self.sender.remove_webhook(url=url), style="cyan")
+        else:
+            raise ValueError(f"Unknown action `{action}`")
+
+
+    async def refresh(self, args: list[str]):
+        """Drop cached bot info."""
+        self._bot_info = None
+
+
+    async def help(self, args: list[str]):
+        """Print commands usage."""
+        for _, usage in self.commands.values():
+            self.console.print(f"  {usage}")
+        self.console.print("  exit")
+
+
+
+    #  PRIVATE METHODS
+
+
+    async def _get_bot_info(self, *, refresh: bool = False) -> dict[str, Any]:
+        """Get bot info (cached)."""
+        if self._bot_info is None or refresh:
+            self._bot_info = await self.sender.get_bot_info()
+        return self._bot_info
+
+
+    async def _update_commands(self, commands: list[dict[str, str]]):
+        """Rewrite bot commands and update cached bot info by the response."""
+        response = await self.sender.update_all_commands(commands=commands)
+        # PATCH /me answers with updated bot info
+        self._bot_info = response if isinstance(response, dict) and "commands" in response else None
+
+
+    def _complete(self, text: str, state: int) -> str|None:
+        """Readline completer: command names and names of cached bot commands."""
+        import readline
+        line = readline.get_line_buffer()
+        if " " not in line.lstrip():
+            options = [name for name in [*self.commands, "exit"] if name.startswith(text)]
+        elif line.split()[0] == "remove-command" and self._bot_info is not None:
+            options = [c["name"] for c in self._bot_info.get("commands", []) if c["name"].startswith(text)]
+        else:
+            options = []
+        return options[state] if state < len(options) else None
+
+
+    def _setup_readline(self):
+        """Enable tab completion and history (if `readline` is available)."""
+        try:
+            import readline
+        except ImportError:
+            return
+        readline.set_completer(self._complete)
+        readline.set_completer_delims(" ")
+        readline.parse_and_bind("tab: complete")
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+
+
+    @staticmethod
+    def _save_history():
+        try:
+            import readline
+            readline.set_history_length(1000)
+            readline.write_history_file(HISTORY_FILE)
+        except (ImportError, OSError):
+            pass
+
+### End of class Shell ###
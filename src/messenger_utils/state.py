@@ -0,0 +1,375 @@
+"""
+Conversation state (FSM) storage for multi-step dialogs.
+
+Stores:
+- `MemoryStateStore`: in-memory LRU with TTL
+- `SQLiteStateStore`: SQLite database with write-behind batching
+- `CachedStateStore`: read-through cache in front of any other store
+
+The store is set to the receiver class and the receiver passes `FSMContext` of the event's chat & user
+to the handler functions as `state` keyword argument:
+```
+MaxReceiver.state_store = CachedStateStore(SQLiteStateStore("bot.db"))
+
+@MaxReceiver.command("order")
+async def order(event, state: FSMContext, **kwargs):
+    await state.set_state("waiting_address")
+
+@MaxReceiver.state_message("waiting_address")
+async def address(event, state: FSMContext, **kwargs):
+    await state.update_data(address=event.text)
+    await state.set_state(None)
+```
+"""
+
+__all__ = ["StateKey", "StateRecord", "StateStore", "MemoryStateStore", "SQLiteStateStore", "CachedStateStore", "FSMContext"]
+
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from loguru import logger
+
+
+type StateKey = tuple[int, int]         # (chat_id, user_id)
+
+
+@dataclass(slots=True)
+class StateRecord:
+    """
+    State of the dialog with user in chat.
+    """
+    state: str|None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+
+### CLASS `StateStore` ###
+
+class StateStore(ABC):
+    """
+    State store abstract class.
+    Particular storage is implemented in derived classes.
+    """
+
+    @abstractmethod
+    async def get(self, key: StateKey) -> StateRecord|None:
+        """
+        Get stored state.
+
+        :param key: (chat_id, user_id)
+        :return: state record or `None` if not stored
+        """
+        pass
+
+
+    @abstractmethod
+    async def set(self, key: StateKey, record: StateRecord):
+        """
+        Store state.
+
+        :param key: (chat_id, user_id)
+        :param record: state record
+        """
+        pass
+
+
+    @abstractmethod
+    async def delete(self, key: StateKey):
+        """
+        Remove stored state.
+
+        :param key: (chat_id, user_id)
+        """
+        pass
+
+
+    async def close(self):
+        """Flush pending changes and release resources."""
+        pass
+
+### END OF CLASS `StateStore` ###
+
+
+
+### Class MemoryStateStore ###
+
+class MemoryStateStore(StateStore):
+    """
+    In-memory state store: LRU with time-to-live of records.
+    """
+
+    def __init__(self, *, max_size: int = 10_000, ttl: float|None = None):
+        """
+        Init store.
+
+        :param max_size: max count of stored records (least recently used ones are evicted)
+        :param ttl: time-to-live of records in seconds (`None` - no expiration)
+        """
+        self.max_size: int = max_size
+        self.ttl: float|None = ttl
+        self._records: OrderedDict[StateKey, tuple[float, StateRecord]] = OrderedDict()
+
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+    async def get(self, key: StateKey) -> StateRecord|None:
+        item = self._records.get(key)
+        if item is None:
+            return None
+        expires, record = item
+        if expires < time.monotonic():
+            del self._records[key]
+            return None
+        self._records.move_to_end(key)
+        return record
+
+
+    async def set(self, key: StateKey, record: StateRecord):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._records[key] = (expires, record)
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+
+
+    async def delete(self, key: StateKey):
+        self._records.pop(key, None)
+
+### End of class MemoryStateStore ###
+
+
+
+### Class SQLiteStateStore ###
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite state store.
+    Changes are written in batches: when `batch_size` changes are pending or `flush_interval` passed.
+    Pending changes are visible to `get` before they are written.
+    """
+
+    def __init__(self, path: str|Path, *, batch_size: int = 100, flush_interval: float = 0.5):
+        """
+        Open (or create) the database.
+
+        :param path: database file path
+        :param batch_size: count of pending changes to write them immediately
+        :param flush_interval: max delay of writing pending changes (in seconds)
+        """
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self._pending: dict[StateKey, StateRecord|None] = {}    # `None` - record deleted
+        self._writing: dict[StateKey, StateRecord|None] = {}    # Batch being written now
+        self._write_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task|None = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fsm_state ("
+            "chat_id INTEGER NOT NULL, user_id INTEGER NOT NULL, state TEXT, data TEXT NOT NULL, "
+            "PRIMARY KEY (chat_id, user_id))"
+        )
+        self._conn.commit()
+
+
+    async def get(self, key: StateKey) -> StateRecord|None:
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._writing:
+            return self._writing[key]
+        row = await asyncio.to_thread(self._select, key)
+        if row is None:
+            return None
+        return StateRecord(row[0], json.loads(row[1]))
+
+
+    async def set(self, key: StateKey, record: StateRecord):
+        self._pending[key] = record
+        await self._schedule_flush()
+
+
+    async def delete(self, key: StateKey):
+        self._pending[key] = None
+        await self._schedule_flush()
+
+
+    async def flush(self):
+        """
+        Write pending changes to the database.
+        If writing fails, the changes stay pending (to be written by the next flush) and the error is raised.
+        """
+        async with self._write_lock:        # Keep order of batches
+            if not self._pending:
+                return
+            self._writing, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write, self._writing)
+            except BaseException:
+                # Return the batch to pending: changes made meanwhile are newer and win
+                self._pending = {**self._writing, **self._pending}
+                raise
+            finally:
+                self._writing = {}
+
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+    #  PRIVATE METHODS
+
+    async def _schedule_flush(self):
+        """Flush pending changes now if the batch is full, or later."""
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+
+    async def _delayed_flush(self):
+        """Flush after `flush_interval` (failure is logged, the changes are retried by the next flush)."""
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:       # pylint: disable=broad-exception-caught
+            logger.exception("Writing of dialog states failed, {} changes are pending", len(self._pending))
+
+
+    def _select(self, key: StateKey) -> tuple[str|None, str]|None:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT state, data FROM fsm_state WHERE chat_id = ? AND user_id = ?", key
+            ).fetchone()
+
+
+    def _write(self, pending: dict[StateKey, StateRecord|None]):
+        upserts = [
+            (key[0], key[1], record.state, json.dumps(record.data, ensure_ascii=False))
+            for key, record in pending.items() if record is not None
+        ]
+        deletes = [key for key, record in pending.items() if record is None]
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO fsm_state (chat_id, user_id, state, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (chat_id, user_id) DO UPDATE SET state = excluded.state, data = excluded.data",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM fsm_state WHERE chat_id = ? AND user_id = ?", deletes)
+
+### End of class SQLiteStateStore ###
+
+
+
+### Class CachedStateStore ###
+
+_MISSING = StateRecord(state="\0missing")      # Cached absence of the record
+
+
+class CachedStateStore(StateStore):
+    """
+    Read-through cache (`MemoryStateStore`) in front of other store.
+    Writes go to both the cache and the backend.
+    """
+
+    def __init__(self, backend: StateStore, *, max_size: int = 10_000, ttl: float|None = 300.0):
+        """
+        Init cached store.
+
+        :param backend: store to cache
+        :param max_size: max count of cached records
+        :param ttl: time-to-live of cached records in seconds
+        """
+        self.backend: StateStore = backend
+        self.cache: MemoryStateStore = MemoryStateStore(max_size=max_size, ttl=ttl)
+
+
+    async def get(self, key: StateKey) -> StateRecord|None:
+        record = await self.cache.get(key)
+        if record is None:
+            record = await self.backend.get(key)
+            await self.cache.set(key, record if record is not None else _MISSING)
+        return None if record is _MISSING else record
+
+
+    async def set(self, key: StateKey, record: StateRecord):
+        await self.cache.set(key, record)
+        await self.backend.set(key, record)
+
+
+    async def delete(self, key: StateKey):
+        await self.cache.set(key, _MISSING)
+        await self.backend.delete(key)
+
+
+    async def close(self):
+        await self.backend.close()
+
+### End of class CachedStateStore ###
+
+
+
+### Class FSMContext ###
+
+class FSMContext:
+    """
+    State of the dialog with the user, passed to handler functions.
+    """
+
+    def __init__(self, store: StateStore, key: StateKey):
+        """
+        :param store: state store
+        :param key: (chat_id, user_id)
+        """
+        self.store: StateStore = store
+        self.key: StateKey = key
+
+
+    async def get_state(self) -> str|None:
+        """Get current state name."""
+        record = await self.store.get(self.key)
+        return record.state if record is not None else None
+
+
+    async def set_state(self, state: str|None):
+        """Set current state name (data is kept)."""
+        record = await self.store.get(self.key)
+        await self.store.set(self.key, StateRecord(state, record.data if record is not None else {}))
+
+
+    async def get_data(self) -> dict[str, Any]:
+        """Get data stored with the state."""
+        record = await self.store.get(self.key)
+        return dict(record.data) if record is not None else {}
+
+
+    async def update_data(self, **data):
+        """Update data stored with the state."""
+        record = await self.store.get(self.key)
+        if record is None:
+            record = StateRecord()
+        await self.store.set(self.key, StateRecord(record.state, {**record.data, **data}))
+
+
+    async def clear(self):
+        """Remove state and data."""
+        await self.store.delete(self.key)
+
+### End of class FSMContext ###
@@ -0,0 +1,53 @@
+"""
+Latency statistics for CLI load tools (replay, bench, probe).
+"""
+
+__all__ = ["LatencyStats"]
+
+
+import math
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LatencyStats:
+    """
+    Collected latencies (in seconds) with percentiles calculation.
+    """
+    samples: list[float] = field(default_factory=list)
+
+
+    def add(self, latency: float):
+        """Add latency sample (in seconds)."""
+        self.samples.append(latency)
+
+
+    def percentile(self, p: float) -> float:
+        """
+        Get percentile of collected latencies (nearest-rank method).
+
+        :param p: percentile in range 0..100
+        :return: latency in seconds (0.0 if no samples)
+        """
+        if not self.samples:
+            return 0.0
+        return self._nearest_rank(sorted(self.samples), p)
+
+
+    def summary(self, percentiles: tuple[float, ...] = (50, 90, 99, 100)) -> dict[str, float]:
+        """
+        Get percentiles in milliseconds.
+
+        :return: dict in format {"p50": <ms>, "p90": <ms>, ...}
+        """
+        if not self.samples:
+            return {f"p{p:g}": 0.0 for p in percentiles}
+        # Sorted once for all percentiles
+        ordered = sorted(self.samples)
+        return {f"p{p:g}": self._nearest_rank(ordered, p) * 1000 for p in percentiles}
+
+
+    @staticmethod
+    def _nearest_rank(ordered: list[float], p: float) -> float:
+        """Percentile of sorted non-empty samples (nearest-rank method)."""
+        return ordered[max(math.ceil(p / 100 * len(ordered)), 1) - 1]
@@ -0,0 +1,52 @@
+"""
+Telegram messenger inits.
+
+Classes are imported on first access (see `messenger_utils.max`).
+"""
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .telegram_sender import TelegramSender
+    from .telegram_flood import TelegramFloodLimiter
+    from .telegram_receiver import TelegramReceiver
+    from ..models.telegram_update import TelegramEvent, TelegramMessageEvent, TelegramCallbackEvent, TelegramEventType
+
+
+# Name => module to import it from
+_LAZY_IMPORTS: dict[str, str] = {
+    "TelegramSender": "messenger_utils.telegram.telegram_sender",
+    "TelegramFloodLimiter": "messenger_utils.telegram.telegram_flood",
+    "TelegramReceiver": "messenger_utils.telegram.telegram_receiver",
+    "TelegramEvent": "messenger_utils.models.telegram_update",
+    "TelegramMessageEvent": "messenger_utils.models.telegram_update",
+    "TelegramCallbackEvent": "messenger_utils.models.telegram_update",
+    "TelegramEventType": "messenger_utils.models.telegram_update",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
+
+
+__all__ = [
+    "TELEGRAM_API_URL",
+    "TelegramSender",
+    "TelegramFloodLimiter",
+    "TelegramReceiver",
+    "TelegramEvent",
+    "TelegramMessageEvent",
+    "TelegramCallbackEvent",
+    "TelegramEventType"
+]
@@ -0,0 +1,105 @@
+"""
+Scheduler of Telegram Bot API flood limits.
+
+Telegram limits (see https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this):
+- about 30 messages per second overall (bulk notifications);
+- 1 message per second to the same chat;
+- 20 messages per minute to the same group.
+"""
+
+__all__ = ["TelegramFloodLimiter"]
+
+
+from messenger_utils.rate_limit import RateLimiter
+
+
+### Class TelegramFloodLimiter ###
+
+class TelegramFloodLimiter:
+    """
+    Rate limiters of the messages: global one, per chat and per group.
+
+    Usage:
+    ```
+    flood = TelegramFloodLimiter()
+    await flood.acquire(chat_id)        # before `sendMessage` to the chat
+    ```
+    """
+
+    def __init__(
+        self, *,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        group_rate: float = 20.0,
+        group_period: float = 60.0,
+        max_chats: int = 10_000
+    ):
+        """
+        Init limiter.
+
+        :param global_rate: messages per second to all chats
+        :param chat_rate: messages per second to one chat
+        :param group_rate: messages per `group_period` to one group (or channel)
+        :param group_period: period of group limit in seconds
+        :param max_chats: count of chats with own limiters, idle ones are dropped above it
+        """
+        self.global_limiter = RateLimiter(global_rate)
+        self.chat_rate: float = chat_rate
+        self.group_rate: float = group_rate
+        self.group_period: float = group_period
+        self.max_chats: int = max_chats
+        # Chat => limiters of the chat
+        self._chats: dict[int|str, list[RateLimiter]] = {}
+
+
+
+    async def acquire(self, chat_id: int|str):
+        """
+        Wait until the message to the chat is allowed.
+
+        :param chat_id: chat ID (negative for groups & channels) or `@channel` username
+        """
+        for limiter in self._chat_limiters(chat_id):
+            await limiter.acquire()
+        await self.global_limiter.acquire()
+
+
+
+    def pause(self, seconds: float):
+        """
+        Pause all messages (on `retry_after` of 429 response).
+
+        :param seconds: pause in seconds
+        """
+        self.global_limiter.pause(seconds)
+
+
+
+    @staticmethod
+    def is_group(chat_id: int|str) -> bool:
+        """Group, supergroup or channel (private chats have positive IDs)."""
+        return isinstance(chat_id, str) or chat_id < 0
+
+
+
+    #  PRIVATE METHODS
+
+
+    def _chat_limiters(self, chat_id: int|str) -> list[RateLimiter]:
+        limiters = self._chats.get(chat_id)
+        if limiters is None:
+            if len(self._chats) >= self.max_chats:
+                self._drop_idle()
+            limiters = [RateLimiter(self.chat_rate)]
+            if self.is_group(chat_id):
+                limiters.append(RateLimiter(self.group_rate, period=self.group_period, burst=int(self.group_rate)))
+            self._chats[chat_id] = limiters
+        return limiters
+
+
+    def _drop_idle(self):
+        """Drop limiters of idle chats (they would be created the same)."""
+        for chat_id in [c for c, limiters in self._chats.items() if all(limiter.idle for limiter in limiters)]:
+            del self._chats[chat_id]
+
+### End of class TelegramFloodLimiter ###
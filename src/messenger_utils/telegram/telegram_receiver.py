@@ -0,0 +1,235 @@
+"""
+Updates processing for Telegram Bot API: webhooks or `getUpdates` long polling.
+"""
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+import httpx
+from loguru import logger
+from messenger_utils.logs import log_event
+from messenger_utils.receiver import Receiver
+from messenger_utils.state import FSMContext, StateStore
+from messenger_utils.models.telegram_update import *
+from .telegram_sender import TelegramSender
+
+
+
+### Class TelegramReceiver ###
+
+class TelegramReceiver(Receiver[TelegramEventType]):
+    """
+    Updates processing for Telegram Bot API.
+
+    Handlers are registered by the same decorators as `MaxReceiver` ones (`TelegramReceiver.command("start")`, ...)
+    and get Telegram events with the same fields as MAX events.
+    """
+
+    # Own handler tables: Telegram handlers are registered separately from MAX ones
+    commands_table: dict[str, Callable] = {}
+    create_message_func: Callable | None = None
+    callback_messages_table: dict[str, Callable] = {}
+    callback_routes_table: dict[str, Callable] = {}
+    bot_started_func: Callable | None = None
+    bot_stopped_func: Callable | None = None
+    state_commands_table: dict[tuple[str, str], Callable] = {}
+    state_callbacks_table: dict[tuple[str, str], Callable] = {}
+    state_messages_table: dict[str, Callable] = {}
+    state_store: StateStore | None = None
+
+
+    def __init__(
+        self,
+        update: dict[str, Any],
+        bot_token: str|None = None, *,
+        event: TelegramEventType|None = None
+    ):
+        """
+        Init TelegramReceiver object.
+
+        :param update: update object of Bot API
+        :param event: already parsed event (if provided, the update is not parsed again)
+        """
+        super().__init__(update, bot_token)
+        self.webhook_event: TelegramEventType|None = event
+
+
+
+    @classmethod
+    async def poll(
+        cls,
+        sender: TelegramSender, *,
+        concurrency: int = 100,
+        max_buffered: int|None = None,
+        limit: int = 100,
+        timeout: int = 30,
+        offset: int|None = None,
+        stop: asyncio.Event|None = None,
+        **kwargs
+    ) -> int|None:
+        """
+        Receive updates by `getUpdates` long polling and process them concurrently until `stop` is set.
+        Updates of one chat are processed in order of arrival; handler failures are logged.
+
+        :param sender: sender to call `getUpdates` with (passed to handlers as `sender` kwarg; opened if not opened yet)
+        :param concurrency: max updates processed simultaneously
+        :param max_buffered: max updates received but not processed yet, incl. waiting for earlier updates of their chats
+            (`10 * concurrency` by default; polling waits for free slots)
+        :param limit: max updates per `getUpdates` call (1-100)
+        :param timeout: long polling timeout (seconds)
+        :param offset: first update ID to receive (unconfirmed updates by default)
+        :param stop: event to stop polling (active updates are finished)
+        :param kwargs: other args passed to handler functions
+        :return: offset of the next update (to continue from)
+        """
+        stop = stop or asyncio.Event()
+        own_client = sender.client is None
+        if own_client:
+            sender.open(max_connections=concurrency + 1, timeout=timeout + 10)
+        semaphore = asyncio.Semaphore(concurrency)
+        buffered = asyncio.Semaphore(max_buffered or 10 * concurrency)
+        tasks: set[asyncio.Task] = set()
+        chat_tails: dict[int, asyncio.Task] = {}        # chat => last task of the chat
+        errors = 0
+        stopping = asyncio.create_task(stop.wait())
+        try:
+            while not stop.is_set():
+                polling = asyncio.create_task(sender.get_updates(offset=offset, limit=limit, timeout=timeout))
+                await asyncio.wait([polling, stopping], return_when=asyncio.FIRST_COMPLETED)
+                if not polling.done():
+                    polling.cancel()
+                    break
+                try:
+                    updates = polling.result()
+                except (httpx.HTTPError, ValueError, KeyError) as exc:
+                    # Network errors, error statuses and malformed responses
+                    errors += 1
+                    logger.warning(f"getUpdates failed: {exc!r}")
+                    await asyncio.sleep(min(2 ** errors, 60))
+                    continue
+                errors = 0
+                for update in updates:
+                    offset = update["update_id"] + 1
+                    try:
+                        event = parse_update(update)
+                    except ValueError:
+                        logger.debug("Update {} skipped: unsupported kind", update["update_id"])
+                        continue
+                    await buffered.acquire()
+                    task = asyncio.create_task(
+                        cls(update, sender.bot_token, event=event)._process_after(
+                            chat_tails.get(event.chat_id), semaphore, buffered, sender=sender, **kwargs
+                        )
+                    )
+                    chat_tails[event.chat_id] = task
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda t, chat_id=event.chat_id: chat_tails.pop(chat_id) if chat_tails.get(chat_id) is t else None)
+            if offset is not None:
+                # Confirm received updates (they are confirmed by the next call only)
+                try:
+                    await sender.get_updates(offset=offset, limit=1, timeout=0)
+                except (httpx.HTTPError, ValueError, KeyError) as exc:
+                    logger.warning(f"Confirmation of updates failed: {exc!r}")
+        finally:
+            stopping.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            if own_client:
+                await sender.aclose()
+        return offset
+
+
+
+    def parse_webhook(self) -> TelegramEventType:
+        """
+        Parse update stored in self.webhook_data.
+        :return: Parsed event object
+        :raises ValueError if the update is not valid or not supported
+        """
+        self.webhook_event = parse_update(self.webhook_data)
+        return self.webhook_event
+
+
+
+    async def process_webhook(self, **kwargs):
+        """Bind handler functions to the event."""
+        if self.webhook_event is None:
+            self.parse_webhook()
+        assert self.webhook_event is not None
+        event: TelegramEventType = self.webhook_event
+        cls = type(self)
+        # Dialog state
+        current_state: str|None = None
+        if cls.state_store is not None:
+            context = FSMContext(cls.state_store, (event.chat_id, event.user_id))
+            kwargs["state"] = context
+            if cls.state_commands_table or cls.state_callbacks_table or cls.state_messages_table:
+                current_state = await context.get_state()
+        match event:
+            # Button callback
+            case TelegramCallbackEvent():
+                log_event("message_callback", event.chat_id)
+                if (func := cls.state_callbacks_table.get((current_state, event.payload))) is not None:
+                    await func(event, **kwargs)
+                    return
+                if (func := cls.callback_messages_table.get(event.payload)) is None:
+                    if (func := cls.callback_routes_table.get(event.route)) is None:
+                        logger.warning("Callback for button `{}` not found!", event.payload)
+                        return
+                await func(event, **kwargs)
+            # Message
+            case TelegramMessageEvent():
+                if (command := event.command) is not None:
+                    log_event("command", event.chat_id)
+                    if (func := cls.state_commands_table.get((current_state, command))) is not None:
+                        await func(event, **kwargs)
+                        return
+                    if command not in cls.commands_table:
+                        logger.warning("Command `{}` not found!", command)
+                        return
+                    await cls.commands_table[command](event, **kwargs)
+                else:
+                    log_event("create_message", event.chat_id)
+                    if current_state is not None and (func := cls.state_messages_table.get(current_state)) is not None:
+                        await func(event, **kwargs)
+                    elif cls.create_message_func is not None:
+                        await cls.create_message_func(event, **kwargs)
+            # Bind start & stop
+            case TelegramEvent(event_type="bot_started"):
+                log_event("bot_started", event.chat_id)
+                if cls.bot_started_func is not None:
+                    await cls.bot_started_func(event, **kwargs)
+            case TelegramEvent(event_type="bot_stopped"):
+                log_event("bot_stopped", event.chat_id)
+                if cls.bot_stopped_func is not None:
+                    await cls.bot_stopped_func(event, **kwargs)
+
+
+
+    #  PRIVATE METHODS
+
+
+    async def _process_after(
+        self,
+        previous: asyncio.Task|None,
+        semaphore: asyncio.Semaphore,
+        buffered: asyncio.Semaphore,
+        **kwargs
+    ):
+        """
+        Process the update after the previous update of the chat, then free the buffer slot.
+        The processing slot is taken after the previous update only: waiting updates of a busy chat don't block other chats.
+        """
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            async with semaphore:
+                await self.process_webhook(**kwargs)
+        except Exception:       # pylint: disable=broad-exception-caught
+            assert self.webhook_event is not None
+            logger.exception("Processing of update {} failed", self.webhook_event.update_id)
+        finally:
+            buffered.release()
+
+### End of class TelegramReceiver ###
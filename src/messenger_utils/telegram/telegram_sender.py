@@ -0,0 +1,267 @@
+"""
+Sender functionality for Telegram messenger.
+
+Contains class TelegramSender, derived from Sender abstract class.
+"""
+
+from typing import Any
+import httpx
+from messenger_utils.sender import Sender
+from messenger_utils.models.telegram_update import ALLOWED_UPDATES
+from messenger_utils.telegram.telegram_flood import TelegramFloodLimiter
+from . import TELEGRAM_API_URL
+
+
+# Methods scheduled by flood limits (see `send_message`)
+_FLOOD_LIMITED_METHODS = frozenset({"sendMessage", "sendPhoto"})
+
+
+###   Class TelegramSender   ###
+
+class TelegramSender(Sender):
+    """
+    Sender class for Telegram messenger.
+
+    Derived from Sender abstract class. Messages are scheduled by Telegram flood limits
+    (see `TelegramFloodLimiter`), 429 responses are retried after their `retry_after`.
+    Methods return `result` of the Bot API responses.
+    """
+
+    def __init__(
+        self,
+        bot_token: str, *,
+        transport: httpx.AsyncBaseTransport|None = None,
+        client: httpx.AsyncClient|None = None,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        flood_limiter: TelegramFloodLimiter|None = None
+    ):
+        """
+        Constructor.
+
+        :param bot_token: token of the bot from @BotFather
+        :param transport: custom HTTP transport (see `Sender`)
+        :param client: shared HTTP client (see `Sender`)
+        :param max_retries: retries of requests answered with 429 or 5xx status (see `Sender`)
+        :param retry_backoff: delay before the first retry without `retry_after` (see `Sender`)
+        :param flood_limiter: flood limits scheduler (default limits if not provided; share it between senders of one bot)
+        """
+        if bot_token is None:
+            raise ValueError("`bot_token` must be provided in constructor or in environment variable")
+        super().__init__(
+            bot_token, transport=transport, client=client, max_retries=max_retries, retry_backoff=retry_backoff
+        )
+        self.api_url = f"{TELEGRAM_API_URL}/bot{bot_token}"
+        self.flood: TelegramFloodLimiter = flood_limiter or TelegramFloodLimiter()
+
+
+
+    ### Public Interfaces ###
+
+    # Bot info & settings
+
+    async def get_bot_info(self) -> dict:
+        """
+        Get info about the Telegram Bot.
+        """
+        return await self._call("getMe")
+
+
+
+    async def get_webhooks(self) -> dict:
+        """
+        Get webhook info of the Telegram Bot.
+        """
+        return await self._call("getWebhookInfo")
+
+
+
+    async def start_webhooks(self, url: str, *, secret: str|None = None) -> bool:
+        """
+        Set webhook of the Telegram Bot.
+
+        :param url: address of the webhooks processing server
+        :param secret: `X-Telegram-Bot-Api-Secret-Token` header value of webhooks
+        """
+        data: dict[str, Any] = {"url": url}
+        if secret:
+            data["secret_token"] = secret
+        return await self._call("setWebhook", data)
+
+
+
+    async def remove_webhook(self, url: str|None = None) -> bool:
+        """
+        Remove webhook of the Telegram Bot (the bot has only one, so `url` is not used).
+        """
+        return await self._call("deleteWebhook")
+
+
+
+    async def get_bot_commands(self) -> list[dict]:
+        """
+        Get list of bot commands in format: [ {"name": <name>, "description": <description>}, ...]
+        """
+        commands = await self._call("getMyCommands")
+        return [{"name": c["command"], "description": c["description"]} for c in commands]
+
+
+
+    async def register_command(self, *, name: str, description: str) -> bool:
+        """
+        Register new command for the Telegram Bot (/xxx).
+
+        :param name: command name (without /)
+        :param description: Command description
+        :raises ValueError: If command already exists
+        """
+        commands = await self.get_bot_commands()
+        if any(command["name"] == name for command in commands):
+            raise ValueError(f"Command `{name}` already exists")
+        commands.append({"name": name, "description": description})
+        return await self.update_all_commands(commands=commands)
+
+
+
+    async def update_all_commands(self, *, commands: list[dict[str, str]]) -> bool:
+        """
+        Rewrite whole registred commands list for the Telegram Bot.
+
+        :param commands: commands list in format: [ {"name": <name>, "description": <description>}, ...]
+        """
+        data = {
+            "commands": [{"command": c["name"], "description": c["description"]} for c in commands]
+        }
+        return await self._call("setMyCommands", data)
+
+
+
+    async def remove_command(self, *, name: str) -> bool:
+        """
+        Remove command from the Telegram Bot.
+
+        :param name: command name (without /)
+        :raises ValueError: If command not found
+        """
+        commands = await self.get_bot_commands()
+        commands2 = [command for command in commands if command["name"] != name]
+        if commands == commands2:
+            raise ValueError(f"Command `{name}` not found")
+        return await self.update_all_commands(commands=commands2)
+
+
+    # Messages
+
+    # pylint: disable=arguments-differ
+    async def send_message(
+            self,
+            text: str, *,
+            target: int|str,
+            image_url: str|None = None,
+            keyboard: dict|None = None,
+            parse_mode: str|None = None,
+            **kwargs
+    ) -> dict:
+        """
+        Send message to the Telegram user / chat (waits for flood limits).
+
+        :param text: text of the message (caption of the image)
+        :param target: chat_id (or `@channel` username)
+        :param image_url: URL of image to send with the text
+        :param keyboard: `reply_markup` of the message (e.g. `{"inline_keyboard": [[...]]}`)
+        :param parse_mode: `MarkdownV2`, `HTML` or `None` for plain text
+        :param kwargs: other fields of `sendMessage` / `sendPhoto` request
+        """
+        data: dict[str, Any] = {"chat_id": target, **kwargs}
+        if image_url:
+            method = "sendPhoto"
+            data.update(photo=image_url, caption=text)
+        else:
+            method = "sendMessage"
+            data["text"] = text
+        if parse_mode:
+            data["parse_mode"] = parse_mode
+        if keyboard:
+            data["reply_markup"] = keyboard
+        await self.flood.acquire(target)
+        return await self._call(method, data)
+
+
+
+    async def answer_callback(
+            self,
+            callback_id: str, *,
+            text: str|None = None,
+            show_alert: bool = False
+    ) -> bool:
+        """
+        Answer to the button callback (Telegram clients show progress until it's answered).
+
+        :param callback_id: `callback_id` of the callback event
+        :param text: notification text for the user
+        :param show_alert: show alert instead of notification at the top of the chat
+        """
+        data: dict[str, Any] = {"callback_query_id": callback_id}
+        if text:
+            data.update(text=text, show_alert=show_alert)
+        return await self._call("answerCallbackQuery", data)
+
+
+    # Updates
+
+    async def get_updates(
+            self, *,
+            offset: int|None = None,
+            limit: int = 100,
+            timeout: int = 30,
+            allowed_updates: list[str]|None = None
+    ) -> list[dict]:
+        """
+        Receive updates by long polling (the client timeout must be greater than `timeout`).
+
+        :param offset: first update ID to return (confirms all previous updates)
+        :param limit: max updates count (1-100)
+        :param timeout: seconds to wait for updates
+        :param allowed_updates: kinds of updates (`ALLOWED_UPDATES` - the ones parsed by `TelegramReceiver` - by default)
+        """
+        data: dict[str, Any] = {
+            "limit": limit,
+            "timeout": timeout,
+            "allowed_updates": allowed_updates if allowed_updates is not None else ALLOWED_UPDATES
+        }
+        if offset is not None:
+            data["offset"] = offset
+        return await self._call("getUpdates", data)
+
+
+
+    #  PRIVATE METHODS
+
+
+    async def _call(self, method: str, data: dict|None = None) -> Any:
+        """Call Bot API method and return its `result`."""
+        response = await self.post(method, data=data)
+        return response["result"]
+
+
+    async def _before_retry(self, endpoint: str, request: dict):
+        """Retried messages wait for flood limits again (not to burst when the pause after 429 ends)."""
+        if endpoint in _FLOOD_LIMITED_METHODS and (chat_id := (request.get("json") or {}).get("chat_id")) is not None:
+            await self.flood.acquire(chat_id)
+
+
+    def _auth_headers(self) -> dict[str, str]:
+        # The token is a part of URL
+        return {}
+
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """`retry_after` of 429 response pauses all messages of the bot."""
+        try:
+            retry_after = float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return super()._retry_delay(response, attempt)
+        self.flood.pause(retry_after)
+        return retry_after
+
+### End of class TelegramSender ###
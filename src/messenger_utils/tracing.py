@@ -0,0 +1,98 @@
+"""
+Tracing of webhooks processing and API requests, compatible with OpenTelemetry (optional dependency).
+
+Tracing is disabled by default; instrumented code checks `tracing.tracer is None` only, so the overhead is near zero:
+```
+from messenger_utils import tracing
+
+tracing.enable()            # OpenTelemetry tracer (`otel` extra), or any tracer with `start_as_current_span`
+```
+
+Spans:
+- `messenger_utils.webhook`: webhook request of the webhook server (parent of the spans below)
+- `messenger_utils.webhook.parse`: parsing of webhook body
+- `messenger_utils.webhook.dispatch`: handler of the event (the span is passed to the handler as `trace_span` kwarg)
+- `<METHOD> <endpoint>`: request to bot API with retries (child of the dispatch span if sent by the handler)
+"""
+
+__all__ = ["Tracer", "ATTR_CHAT_ID", "ATTR_EVENT_TYPE", "ATTR_ENDPOINT", "ATTR_HANDLER", "enable", "disable", "span", "api_attributes"]
+
+
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Protocol
+
+
+# Span attributes
+ATTR_CHAT_ID = "messenger_utils.chat_id"
+ATTR_EVENT_TYPE = "messenger_utils.event_type"
+ATTR_ENDPOINT = "messenger_utils.endpoint"
+ATTR_HANDLER = "messenger_utils.handler"
+
+
+class Tracer(Protocol):
+    """
+    Tracer creating spans (subset of `opentelemetry.trace.Tracer`).
+    """
+    def start_as_current_span(self, name: str, *, attributes: dict[str, Any]|None = None) -> AbstractContextManager[Any]:
+        ...
+
+
+
+# Current tracer (`None` - tracing is disabled)
+tracer: Tracer|None = None
+
+_NO_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+
+def enable(custom_tracer: Tracer|None = None):
+    """
+    Enable tracing.
+
+    :param custom_tracer: tracer to use (OpenTelemetry tracer of the global tracer provider if not provided)
+    :raises ValueError: if OpenTelemetry is not installed and tracer is not provided
+    """
+    global tracer
+    if custom_tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError as exc:
+            raise ValueError("Tracing requires `opentelemetry-api` package: `pip install messenger-utils[otel]`") from exc
+        custom_tracer = trace.get_tracer("messenger_utils")
+    tracer = custom_tracer
+
+
+def disable():
+    """Disable tracing."""
+    global tracer
+    tracer = None
+
+
+
+def span(name: str, attributes: dict[str, Any]|None = None) -> AbstractContextManager[Any]:
+    """
+    Start the span as current one (the context manager gives `None` if tracing is disabled).
+
+    :param name: span name
+    :param attributes: span attributes
+    """
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+
+def api_attributes(method: str, endpoint: str, request: dict[str, Any]) -> dict[str, Any]:
+    """
+    Attributes of API request span.
+
+    :param method: HTTP method
+    :param endpoint: endpoint of the API
+    :param request: `httpx` request kwargs (chat is taken from `params` or `json`)
+    """
+    attributes: dict[str, Any] = {"http.request.method": method, ATTR_ENDPOINT: endpoint}
+    for part in (request.get("params"), request.get("json")):
+        if isinstance(part, dict) and (chat_id := part.get("chat_id")) is not None:
+            attributes[ATTR_CHAT_ID] = chat_id
+            break
+    return attributes
@@ -0,0 +1,57 @@
+"""
+Tests for HTTP server, sender retries and load testing against fake API.
+"""
+
+import asyncio
+import httpx
+import pytest
+from messenger_utils.bench import FakeMaxApi, run_bench
+from messenger_utils.http_server import HttpRequest, HttpServer, json_response
+from messenger_utils.max import MaxSender
+
+
+def test_http_server_keep_alive():
+    """Test for serving several requests over one connection."""
+    async def handler(request: HttpRequest):
+        return json_response({"path": request.path, "params": request.params, "body": request.json()})
+
+    async def run():
+        async with HttpServer(handler) as server:
+            async with httpx.AsyncClient(base_url=server.url) as client:
+                responses = [await client.post("/hook", params={"a": "1"}, json={"n": n}) for n in range(3)]
+                bad = await client.post("/hook", content=b"{}", headers={"Transfer-Encoding": "chunked"})
+            return responses, bad, server.connections, server.requests
+
+    responses, bad, connections, requests = asyncio.run(run())
+    assert [r.json() for r in responses] == [{"path": "/hook", "params": {"a": "1"}, "body": {"n": n}} for n in range(3)]
+    assert bad.status_code == 411
+    assert connections == 1 and requests == 3
+
+
+def test_sender_retries():
+    """Test for retries of 429 with `Retry-After` and of 5xx responses."""
+    statuses = [429, 503, 200, 500, 500, 500]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        return httpx.Response(status, json={"message": {}}, headers={"Retry-After": "0"} if status == 429 else None)
+
+    async def run():
+        sender = MaxSender("token", transport=httpx.MockTransport(handler), max_retries=2, retry_backoff=0.001)
+        await sender.send_message("Hello", target=1)
+        assert sender.retries == 2
+        with pytest.raises(httpx.HTTPStatusError):
+            await sender.send_message("Hello", target=1)
+        assert sender.retries == 4
+
+    asyncio.run(run())
+
+
+def test_run_bench():
+    """Test for load test stats against fake API with errors."""
+    api = FakeMaxApi(error_rate=0.1, rate_limit_rate=0.1, retry_after=0.001, seed=7)
+    stats = asyncio.run(run_bench(requests=100, concurrency=4, max_retries=5, retry_backoff=0.001, api=api))
+    assert stats.requests == 100 and stats.ok + stats.failed == 100
+    assert stats.retries == stats.statuses[429] + stats.statuses[500] - stats.failed
+    assert stats.connections <= 4 and stats.connection_reuse > 0.9
+    assert len(stats.latency.samples) == 100
@@ -0,0 +1,125 @@
+"""
+Tests for cross-messenger broadcast.
+"""
+
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from typer.testing import CliRunner
+from messenger_utils.cli import app
+from messenger_utils.sender import Sender
+from messenger_utils.max import MaxSender
+from messenger_utils.telegram import TelegramSender, TelegramFloodLimiter
+from messenger_utils.broadcast import BroadcastButton, BroadcastChannel, BroadcastMessage, RENDERERS, broadcast
+
+
+MESSAGE = BroadcastMessage("News", keyboard=[[BroadcastButton("More", payload="news:1"), BroadcastButton("Site", url="https://example.com")]])
+
+
+def api(requests: list[httpx.Request]) -> httpx.MockTransport:
+    """Stubbed MAX & Telegram APIs (chat 13 fails)."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.host == "api.telegram.org":
+            body = json.loads(request.content)
+            if body.get("chat_id") == 13:
+                return httpx.Response(403, json={"ok": False, "description": "Forbidden: bot was blocked by the user"})
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": 1}})
+        return httpx.Response(200, json={"message": {"body": {"mid": "m1"}}})
+    return httpx.MockTransport(handler)
+
+
+def test_render():
+    """
+    Check keyboards rendered for each messenger
+    """
+    assert RENDERERS["max"](MESSAGE)["keyboard"]["buttons"][0] == [
+        {"type": "callback", "text": "More", "payload": "news:1", "intent": "default"},
+        {"type": "link", "text": "Site", "url": "https://example.com"}
+    ]
+    assert RENDERERS["telegram"](MESSAGE)["keyboard"] == {"inline_keyboard": [[
+        {"text": "More", "callback_data": "news:1"}, {"text": "Site", "url": "https://example.com"}
+    ]]}
+    with pytest.raises(ValueError):
+        RENDERERS["telegram"](BroadcastMessage("x", keyboard=[[BroadcastButton("Long", payload="x" * 65)]]))
+
+
+def test_broadcast():
+    """
+    Check one results stream of all messengers, failures and unknown messengers
+    """
+    requests: list[httpx.Request] = []
+    transport = api(requests)
+    channels = {
+        "max": BroadcastChannel(MaxSender("token", transport=transport), concurrency=4),
+        "telegram": BroadcastChannel(
+            TelegramSender("token", transport=transport, flood_limiter=TelegramFloodLimiter(global_rate=10_000)), concurrency=2
+        ),
+    }
+    targets = [("max", i) for i in range(10)] + [("telegram", i) for i in range(10, 15)] + [("viber", 1)]
+
+    async def run_all():
+        return [result async for result in broadcast(MESSAGE, targets, channels)]
+
+    results = asyncio.run(run_all())
+    assert sorted(r.index for r in results) == list(range(16))
+    failed = {(r.messenger, r.target) for r in results if not r.ok}
+    assert failed == {("telegram", 13), ("viber", 1)}
+    assert sum(1 for r in requests if r.url.host == "api.telegram.org") == 5
+    assert all(json.loads(r.content)["attachments"][0]["type"] == "inline_keyboard" for r in requests if r.url.host != "api.telegram.org")
+
+
+def test_broadcast_non_json_response():
+    """Test for targets answered with non-JSON body: reported as failed, broadcast is finished."""
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<html>"))
+        async with MaxSender("token", transport=transport) as sender:
+            channels = {"max": BroadcastChannel(sender, 2)}
+            return [r async for r in broadcast(BroadcastMessage("hi"), [("max", 1), ("max", 2)], channels)]
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert sorted(r.target for r in results) == [1, 2]
+    assert all(not r.ok and "JSONDecodeError" in (r.error or "") for r in results)
+
+
+def test_broadcast_slow_source():
+    """Test for slow targets source (e.g. stdin pipe): the event loop is not blocked by reading."""
+    def targets():
+        for chat_id in range(1, 4):
+            time.sleep(0.1)     # blocking read
+            yield "max", chat_id
+
+    async def run():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.create_task(tick())
+        async with MaxSender("token", transport=api([])) as sender:
+            results = [r async for r in broadcast(BroadcastMessage("hi"), targets(), {"max": BroadcastChannel(sender, 2)})]
+        ticker.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+    assert sorted(r.target for r in results) == [1, 2, 3] and all(r.ok for r in results)
+    assert ticks >= 10
+
+
+def test_cli_broadcast(tmp_path, monkeypatch):
+    """
+    Check CLI broadcast with results file
+    """
+    requests: list[httpx.Request] = []
+    monkeypatch.setattr(Sender, "default_transport", api(requests))
+    (tmp_path / "targets.csv").write_text("messenger,chat_id\nmax,1\ntelegram,2\ntelegram,13\n")
+    result = CliRunner().invoke(app, [
+        "broadcast", "News", "-f", str(tmp_path / "targets.csv"), "-b", "More=news:1;Site=https://example.com",
+        "--max-token", "m", "--tg-token", "t", "--results", str(tmp_path / "results.ndjson")
+    ])
+    assert result.exit_code == 0, result.output
+    assert "Sent: 2, failed: 1" in result.output
+    assert len((tmp_path / "results.ndjson").read_text().splitlines()) == 3
@@ -0,0 +1,104 @@
+"""
+Tests for bulk sending and rate limiting.
+"""
+
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from messenger_utils.bulk import BulkRow, read_done_rows, read_rows, send_bulk
+from messenger_utils.max import MaxSender
+from messenger_utils.rate_limit import RateLimiter
+
+
+def test_rate_limiter():
+    """Test for limiting rate of acquisitions."""
+    async def acquire_all():
+        limiter = RateLimiter(50)
+        started = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.monotonic() - started
+    assert asyncio.run(acquire_all()) >= 0.09      # 5 waits of 20 ms
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_read_rows(tmp_path):
+    """Test for reading CSV and NDJSON rows and results."""
+    (tmp_path / "rows.csv").write_text("chat_id,text\n1,Hello\n2,\n")
+    rows = list(read_rows(tmp_path / "rows.csv", default_text="Hi"))
+    assert rows == [BulkRow(1, 1, "Hello"), BulkRow(2, 2, "Hi")]
+    (tmp_path / "rows.ndjson").write_text('{"chat_id": 3, "text": "A", "image_url": "http://x/a.png"}\n\n{"text": "B"}\n')
+    with pytest.raises(ValueError):
+        list(read_rows(tmp_path / "rows.ndjson"))
+    (tmp_path / "results.ndjson").write_text('{"row": 1, "ok": true}\n{"row": 2, "ok": false}\n')
+    assert read_done_rows(tmp_path / "results.ndjson") == {1}
+    assert read_done_rows(tmp_path / "missing.ndjson") == set()
+
+
+def test_send_bulk():
+    """Test for concurrent sending over one connection pool with failed rows."""
+    chats: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        chat_id = int(request.url.params["chat_id"])
+        chats.append(chat_id)
+        await asyncio.sleep(0.001)
+        if chat_id == 13:
+            return httpx.Response(403, json={"code": "chat.denied"})
+        return httpx.Response(200, json={"message": {"body": json.loads(request.content)}})
+
+    async def run():
+        rows = (BulkRow(n, n, f"Message {n}") for n in range(1, 21))
+        async with MaxSender("token", transport=httpx.MockTransport(handler)) as sender:
+            client = sender.client
+            results = [result async for result in send_bulk(sender, rows, concurrency=4)]
+        assert sender.client is None and client is not None and client.is_closed
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(r.row for r in results) == list(range(1, 21))
+    failed = [r for r in results if not r.ok]
+    assert len(failed) == 1 and failed[0].chat_id == 13 and "403" in (failed[0].error or "")
+    assert sorted(chats) == list(range(1, 21))
+
+
+def test_send_bulk_non_json_response():
+    """Test for rows answered with non-JSON body: reported as failed, sending is finished."""
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<html>"))
+        async with MaxSender("token", transport=transport) as sender:
+            rows = (BulkRow(n, n, "Hi") for n in range(1, 6))
+            return [result async for result in send_bulk(sender, rows, concurrency=2)]
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert sorted(r.row for r in results) == [1, 2, 3, 4, 5]
+    assert all(not r.ok and "JSONDecodeError" in (r.error or "") for r in results)
+
+
+def test_send_bulk_slow_source():
+    """Test for slow rows source (e.g. stdin pipe): the event loop is not blocked by reading."""
+    def rows():
+        for n in range(1, 4):
+            time.sleep(0.1)     # blocking read
+            yield BulkRow(n, n, "Hi")
+
+    async def run():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.create_task(tick())
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        async with MaxSender("token", transport=transport) as sender:
+            results = [result async for result in send_bulk(sender, rows(), concurrency=2)]
+        ticker.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+    assert sorted(r.row for r in results) == [1, 2, 3] and all(r.ok for r in results)
+    assert ticks >= 10
@@ -3,9 +3,12 @@ Tests for CLI scripts.
 """
 
 import re
+import subprocess
+import sys
 import pytest
 from typer.testing import CliRunner
 from messenger_utils.cli import app
+from messenger_utils.max import MaxReceiver
 
 
 
@@ -30,3 +33,115 @@ def test_cli_remove_command(runner):
     """
     result = runner.invoke(app, ["remove-command", "--name", "notexistingcommand"])
     assert "not found" in result.output
+
+
+def test_cli_replay(runner, tmp_path, monkeypatch):
+    """
+    Check replay of NDJSON webhooks through handlers module with stubbed API
+    """
+    (tmp_path / "replay_handlers.py").write_text(
+        "from messenger_utils.max import MaxReceiver, MaxSender\n"
+        "@MaxReceiver.create_message\n"
+        "async def on_message(event, **kwargs):\n"
+        "    await MaxSender('token').send_message(event.text, target=event.chat_id)\n"
+    )
+    body = (
+        '{"timestamp": 1, "update_type": "message_created", "message": {"recipient": {"chat_id": 1, "user_id": 2},'
+        ' "sender": {"user_id": 3, "name": "Maxim", "is_bot": false}, "body": {"text": "Hello"}}}\n'
+    )
+    (tmp_path / "webhooks.ndjson").write_text(body * 5)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(MaxReceiver, "create_message_func", None)     # restore handlers after the test
+    result = runner.invoke(app, ["replay", "webhooks.ndjson", "--handlers", "replay_handlers", "-c", "2"])
+    assert result.exit_code == 0, result.output
+    assert re.search(r"Events\s+│\s+5", result.output)
+    assert re.search(r"POST /messages\s+│\s+5", result.output)
+
+
+def test_cli_send_bulk(runner, tmp_path, monkeypatch):
+    """
+    Check bulk sending from CSV with results file and resume
+    """
+    import httpx
+    from messenger_utils.sender import Sender
+    sent: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.url.params["chat_id"])
+        return httpx.Response(200, json={"message": {}})
+
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+    (tmp_path / "rows.csv").write_text("chat_id,text\n1,Hello\n2,Hi\n3,Hey\n")
+    (tmp_path / "results.ndjson").write_text('{"row": 2, "chat_id": 2, "ok": true, "error": null}\n')
+    result = runner.invoke(app, [
+        "send", "-t", "token", "-f", str(tmp_path / "rows.csv"),
+        "--results", str(tmp_path / "results.ndjson"), "--resume", "--rate", "1000"
+    ])
+    assert result.exit_code == 0, result.output
+    assert sorted(sent) == ["1", "3"]
+    assert "Sent: 2" in result.output
+    assert len((tmp_path / "results.ndjson").read_text().splitlines()) == 3
+
+
+def test_cli_send_invalid_chat(runner, tmp_path, monkeypatch):
+    """
+    Check that non-integer chat ID is reported without API calls
+    """
+    import httpx
+    from messenger_utils.sender import Sender
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(lambda r: pytest.fail("API called")))
+    result = runner.invoke(app, ["send", "Hello", "-t", "token", "--chat", "abc"])
+    assert result.exit_code == 1
+    assert "[!]" in result.output and "abc" in result.output
+    (tmp_path / "profiles.toml").write_text('[profiles.shop]\ntoken = "shop-token"\n')
+    monkeypatch.setenv("MESSENGER_UTILS_PROFILES_FILE", str(tmp_path / "profiles.toml"))
+    result = runner.invoke(app, ["send", "Hello", "--all", "--chat", "@channel"])
+    assert result.exit_code == 1
+    assert "[!]" in result.output and "@channel" in result.output
+
+
+def test_cli_import_budget():
+    """
+    Check that CLI module doesn't import heavy dependencies on start and fits the import time budget
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import messenger_utils.cli"],
+        capture_output=True, text=True, check=True
+    )
+    imported = {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in result.stderr.splitlines() if line.startswith("import time:") and "self [us]" not in line
+    }
+    assert not {"asyncio", "httpx", "loguru", "pydantic", "rich"} & imported.keys()
+    assert imported["messenger_utils.cli"] < 500_000      # us, generous for slow CI machines
+
+
+def test_cli_bench(runner):
+    """
+    Check load test against fake API
+    """
+    result = runner.invoke(app, ["bench", "-n", "50", "-c", "5", "--latency", "0"])
+    assert result.exit_code == 0, result.output
+    assert re.search(r"Messages sent\s+│\s+50", result.output)
+    # Connections are opened on demand: up to one per simultaneous request
+    connections = re.search(r"Connections\s+│\s+(\d+)", result.output)
+    assert connections is not None and 1 <= int(connections.group(1)) <= 5
+
+
+def test_cli_shell(runner, monkeypatch):
+    """
+    Check shell session with one connection pool
+    """
+    import httpx
+    from messenger_utils.sender import Sender
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"user_id": 1, "name": "TestBot", "commands": []})
+
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+    result = runner.invoke(app, ["shell", "-t", "token"], input="bot-info\nbot-info\nbot-commands\nexit\n")
+    assert result.exit_code == 0, result.output
+    assert "TestBot" in result.output and "No commands found" in result.output
+    assert calls == ["/me"]
@@ -0,0 +1,87 @@
+"""
+Tests for declarative bot commands sync.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from typer.testing import CliRunner
+from messenger_utils.cli import app
+from messenger_utils.sender import Sender
+from messenger_utils.max import MaxSender
+from messenger_utils.max.max_commands import load_commands, diff_commands, sync_commands
+
+
+CURRENT = [
+    {"name": "start", "description": "Start"},
+    {"name": "help", "description": "Help"},
+    {"name": "old", "description": "Old command"},
+]
+
+
+@pytest.fixture
+def api(monkeypatch) -> list[httpx.Request]:
+    """Stubbed MAX API with `CURRENT` commands; returns list of requests made."""
+    requests: list[httpx.Request] = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "PATCH":
+            return httpx.Response(200, json={"user_id": 1, **json.loads(request.content)})
+        return httpx.Response(200, json={"user_id": 1, "commands": CURRENT})
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+    return requests
+
+
+def test_load_commands(tmp_path):
+    """
+    Check full and short forms of commands files
+    """
+    (tmp_path / "commands.toml").write_text('[[commands]]\nname = "/start"\ndescription = "Start"\n')
+    (tmp_path / "commands.json").write_text('{"start": "Start", "help": "Help"}')
+    assert load_commands(tmp_path / "commands.toml") == [{"name": "start", "description": "Start"}]
+    assert [c["name"] for c in load_commands(tmp_path / "commands.json")] == ["start", "help"]
+    (tmp_path / "bad.json").write_text('[{"name": "a", "description": "A"}, {"name": "a", "description": "B"}]')
+    with pytest.raises(ValueError, match="Duplicated"):
+        load_commands(tmp_path / "bad.json")
+    with pytest.raises(ValueError, match="format"):
+        load_commands(tmp_path / "commands.txt")
+
+
+def test_diff_commands():
+    """
+    Check added, removed, changed and reordered commands
+    """
+    desired = [{"name": "help", "description": "Get help"}, {"name": "start", "description": "Start"}, {"name": "new", "description": "New"}]
+    diff = diff_commands(CURRENT, desired)
+    assert [c["name"] for c in diff.added] == ["new"]
+    assert [c["name"] for c in diff.removed] == ["old"]
+    assert diff.changed == [(CURRENT[1], desired[0])]
+    assert not diff_commands(CURRENT, list(CURRENT)).has_changes
+    assert diff_commands(CURRENT, CURRENT[::-1]).reordered
+
+
+def test_sync_commands(api):
+    """
+    Check that sync makes one GET and one PATCH (none if nothing changed)
+    """
+    sender = MaxSender("token")
+    diff = asyncio.run(sync_commands(sender, CURRENT[:2]))
+    assert [c["name"] for c in diff.removed] == ["old"]
+    assert [r.method for r in api] == ["GET", "PATCH"]
+    assert json.loads(api[1].content) == {"commands": CURRENT[:2]}
+    api.clear()
+    asyncio.run(sync_commands(sender, CURRENT))
+    asyncio.run(sync_commands(sender, CURRENT[:1], dry_run=True))
+    assert [r.method for r in api] == ["GET", "GET"]
+
+
+def test_cli_bot_commands_sync(api, tmp_path):
+    """
+    Check dry run of CLI sync prints the diff without changes
+    """
+    (tmp_path / "commands.json").write_text('{"start": "Start", "help": "Help", "new": "New command"}')
+    result = CliRunner().invoke(app, ["bot-commands", "sync", "-f", str(tmp_path / "commands.json"), "--dry-run", "-t", "token"])
+    assert result.exit_code == 0, result.output
+    assert "New command" in result.output and "old" in result.output
+    assert [r.method for r in api] == ["GET"]
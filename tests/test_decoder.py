@@ -0,0 +1,95 @@
+"""
+Tests for compiled webhook decoder.
+"""
+
+import json
+import pytest
+from messenger_utils.max import MaxReceiver, MaxWebhookDecoder
+from messenger_utils.models.max_webhook_event import MaxWebhookEvent, MessageCreatedEvent, MessageCallbackEvent
+
+
+BOT_STARTED = {
+    "timestamp": 1767730065426,
+    "chat_id": 94154102,
+    "user": {"user_id": 59483360, "first_name": "Maxim", "is_bot": False, "name": "Maxim"},
+    "user_locale": "ru",
+    "update_type": "bot_started"
+}
+
+MESSAGE_CREATED = {
+    "timestamp": 1764671262844,
+    "message": {
+        "recipient": {"chat_id": 100052860, "chat_type": "dialog", "user_id": 108858268},
+        "body": {
+            "mid": "mid.0000000005f6af7c019ade9a907c08ef",
+            "text": "Hello",
+            "attachments": [
+                {"payload": {"photo_id": 872509408, "token": "t3c9", "url": "https://i.oneme.ru/i?r=BTGB"}, "type": "image"}
+            ]
+        },
+        "sender": {"user_id": 59483360, "first_name": "Maxim", "is_bot": False, "name": "Maxim"}
+    },
+    "update_type": "message_created"
+}
+
+MESSAGE_CALLBACK = {
+    "callback": {
+        "callback_id": "f9LHodD0cOI1Hv4QDc3f",
+        "user": {"user_id": 59483360, "first_name": "Maxim", "is_bot": False, "name": "Maxim"},
+        "payload": "BTN1"
+    },
+    "message": {
+        "recipient": {"chat_id": 100052860, "chat_type": "dialog", "user_id": 59483360},
+        "body": {"mid": "mid.0000000005f6af7c019b416482ea64ea", "text": "Commands"}
+    },
+    "timestamp": 1766329065990,
+    "update_type": "message_callback"
+}
+
+BACKENDS = ["pydantic"]
+try:
+    import msgspec  # noqa: F401
+    BACKENDS.append("msgspec")
+except ImportError:
+    pass
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("body", [BOT_STARTED, MESSAGE_CREATED, MESSAGE_CALLBACK])
+def test_decoder_matches_parse_webhook(backend, body):
+    """Decoded event must be equal to the event parsed by `MaxReceiver.parse_webhook`."""
+    expected = MaxReceiver(webhook_data=body).parse_webhook()
+    event = MaxWebhookDecoder(backend=backend).decode(json.dumps(body).encode())
+    assert event == expected
+    assert MaxWebhookDecoder(backend=backend).decode_dict(body) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decoder_without_full_body(backend):
+    """Decoder skips `full_body` if not required."""
+    event = MaxWebhookDecoder(backend=backend, keep_full_body=False).decode(json.dumps(MESSAGE_CREATED))
+    assert isinstance(event, MessageCreatedEvent)
+    assert event.full_body == {}
+    assert event.attachments[0].attachment_type == "image"
+    assert event.recipient_id == 108858268
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decoder_invalid_body(backend):
+    """Decoder raises ValueError for unknown or incomplete bodies."""
+    decoder = MaxWebhookDecoder(backend=backend)
+    with pytest.raises(ValueError):
+        decoder.decode(b'{"update_type": "unknown"}')
+    with pytest.raises(ValueError):
+        decoder.decode(b'{"update_type": "bot_started", "timestamp": 1767730065426}')
+    with pytest.raises(ValueError):
+        decoder.decode(b'not a json')
+
+
+def test_receiver_from_raw():
+    """Receiver created from raw body has parsed event."""
+    receiver = MaxReceiver.from_raw(json.dumps(MESSAGE_CALLBACK).encode())
+    assert isinstance(receiver.webhook_event, MessageCallbackEvent)
+    assert receiver.webhook_data == MESSAGE_CALLBACK
+    assert receiver.parse_webhook() == receiver.webhook_event
+    assert isinstance(MaxReceiver.from_raw(json.dumps(BOT_STARTED)).webhook_event, MaxWebhookEvent)
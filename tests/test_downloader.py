@@ -0,0 +1,76 @@
+"""
+Tests for attachments downloader.
+"""
+
+import asyncio
+import hashlib
+import httpx
+import pytest
+from messenger_utils.sender import Sender
+from messenger_utils.max import AttachmentDownloader
+from messenger_utils.models.max_webhook_event import Attachment
+
+
+CONTENT = b"\x89PNG" + b"x" * 200_000
+
+
+@pytest.fixture
+def cdn(monkeypatch) -> dict[str, int]:
+    """Stubbed attachments server; returns counters of active & max simultaneous downloads."""
+    counters = {"active": 0, "max_active": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counters["active"] += 1
+        counters["max_active"] = max(counters["max_active"], counters["active"])
+        await asyncio.sleep(0.01)
+        counters["active"] -= 1
+        if request.url.path == "/big":
+            # No Content-Length: the limit is checked while streaming
+            async def stream():
+                for _ in range(10):
+                    yield b"y" * 100_000
+            return httpx.Response(200, content=stream(), headers={"Content-Type": "application/octet-stream"})
+        return httpx.Response(200, content=CONTENT, headers={"Content-Type": "image/png"})
+
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+    return counters
+
+
+def test_download_all(cdn, tmp_path):
+    """
+    Check parallel downloads of message attachments with concurrency bound and checksums
+    """
+    attachments = [Attachment("image", f"https://i.example.com/i?r={n}", "t") for n in range(6)]
+    checksums = {attachments[0].url: hashlib.sha256(CONTENT).hexdigest(), attachments[1].url: "0" * 64}
+
+    async def download():
+        async with AttachmentDownloader(concurrency=2) as downloader:
+            return await downloader.download_all(attachments, tmp_path, checksums=checksums)
+
+    results = asyncio.run(download())
+    assert isinstance(results[1], ValueError)
+    ok = [r for r in results if not isinstance(r, Exception)]
+    assert len(ok) == 5
+    assert all(r.path is not None and r.path.read_bytes() == CONTENT and r.path.suffix == ".png" for r in ok)
+    assert len(list(tmp_path.iterdir())) == 5       # no partial file of failed checksum
+    assert cdn["max_active"] == 2
+
+
+def test_download_limit(cdn, tmp_path):
+    """
+    Check size limit of streamed download and streaming to consumer
+    """
+    chunks: list[bytes] = []
+
+    async def consume(chunk: bytes):
+        chunks.append(chunk)
+
+    async def download():
+        async with AttachmentDownloader(max_size=500_000) as downloader:
+            with pytest.raises(ValueError, match="size limit"):
+                await downloader.download("https://cdn.example.com/big", tmp_path / "big.bin")
+            return await downloader.download("https://cdn.example.com/small", consume)
+
+    result = asyncio.run(download())
+    assert not list(tmp_path.iterdir())
+    assert result.path is None and result.size == len(CONTENT) and b"".join(chunks) == CONTENT
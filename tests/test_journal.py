@@ -0,0 +1,152 @@
+"""
+Tests for webhooks journal.
+"""
+
+import asyncio
+import json
+import pytest
+from messenger_utils.journal import WebhookJournal, read_journal
+from messenger_utils.max import MaxReceiver
+
+
+def make_body(chat_id: int, timestamp: int, text: str = "Hello") -> bytes:
+    """Raw message_created webhook body."""
+    return json.dumps({
+        "timestamp": timestamp,
+        "message": {
+            "recipient": {"chat_id": chat_id, "user_id": 108858268},
+            "body": {"text": text},
+            "sender": {"user_id": 59483360, "is_bot": False, "name": "Maxim"}
+        },
+        "update_type": "message_created"
+    }).encode()
+
+
+def test_journal_history_and_segments(tmp_path):
+    """Test for appending, rotating segments and getting chat history."""
+    with WebhookJournal(tmp_path, segment_size=1024) as journal:
+        for i in range(50):
+            journal.append(make_body(i % 3, 1000 + i), chat_id=i % 3, timestamp=1000 + i)
+        assert len(list(tmp_path.glob("*.log"))) > 1
+        history = journal.chat_history(1)
+        assert [e.timestamp for e in history] == list(range(1001, 1050, 3))
+        assert json.loads(history[0].data)["timestamp"] == 1001
+        assert [e.timestamp for e in journal.chat_history(2, since=1010, until=1020)] == [1011, 1014, 1017, 1020]
+    # Reopen
+    with WebhookJournal(tmp_path, segment_size=1024) as journal:
+        assert len(journal.chat_history(1)) == 17
+        assert journal.append(b"{}") == 51
+
+
+def test_journal_pending_and_recovery(tmp_path):
+    """Test for replaying unprocessed entries and recovering broken tail of the log."""
+    journal = WebhookJournal(tmp_path)
+    seqs = [journal.append(make_body(7, ts), chat_id=7, timestamp=ts) for ts in range(5)]
+    journal.ack(seqs[0])
+    journal.ack(seqs[1])
+    journal.ack(seqs[3])
+    journal.close()
+    # Simulate partially written record
+    log_path = sorted(tmp_path.glob("*.log"))[-1]
+    with open(log_path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00broken")
+    journal = WebhookJournal(tmp_path)
+    assert journal.checkpoint == 2
+    assert [e.seq for e in journal.pending()] == [3, 4, 5]
+    assert journal.append(b"{}") == 6
+    journal.close()
+
+
+def test_journal_replay_dispatch(tmp_path):
+    """Test for journaled processing and replay through MaxReceiver."""
+    received: list[str] = []
+
+    async def on_message(event, **kwargs):
+        if event.text == "fail":
+            raise RuntimeError("Handler failed")
+        received.append(event.text)
+
+    saved_func = MaxReceiver.create_message_func
+    MaxReceiver.create_message_func = on_message
+    try:
+        journal = WebhookJournal(tmp_path)
+        asyncio.run(MaxReceiver.process_journaled(journal, make_body(1, 1, "first")))
+        with pytest.raises(RuntimeError):
+            asyncio.run(MaxReceiver.process_journaled(journal, make_body(1, 2, "fail")))
+        journal.append(make_body(1, 3, "in flight"), chat_id=1, timestamp=3)
+        journal.close()
+        journal = WebhookJournal(tmp_path)
+        assert asyncio.run(MaxReceiver.replay_journal(journal)) == 2
+        assert received == ["first", "in flight"]
+        assert list(journal.pending()) == []
+        journal.close()
+    finally:
+        MaxReceiver.create_message_func = saved_func
+
+
+def test_journal_failed_entry_does_not_stall(tmp_path):
+    """Test for failed handler: checkpoint moves on, segments are reclaimed, failed entry is retried."""
+    attempts: list[str] = []
+
+    async def on_message(event, **kwargs):
+        attempts.append(event.text)
+        if event.text == "fail" and attempts.count("fail") == 1:
+            raise RuntimeError("Handler failed")
+
+    async def run(journal: WebhookJournal):
+        with pytest.raises(RuntimeError):
+            await MaxReceiver.process_journaled(journal, make_body(1, 0, "fail"))
+        for ts in range(1, 40):
+            await MaxReceiver.process_journaled(journal, make_body(1, ts))
+
+    saved_func = MaxReceiver.create_message_func
+    MaxReceiver.create_message_func = on_message
+    try:
+        journal = WebhookJournal(tmp_path, segment_size=1024)
+        asyncio.run(run(journal))
+        assert journal.checkpoint == 40 and journal.failed == {1}
+        segments = len(list(tmp_path.glob("*.log")))
+        assert journal.remove_processed() == segments - 2      # The active one and the one with failed entry are kept
+        journal.close()
+        journal = WebhookJournal(tmp_path, segment_size=1024)
+        assert journal.failed == {1} and list(journal.pending()) == []
+        assert asyncio.run(MaxReceiver.replay_journal(journal)) == 1
+        assert attempts.count("fail") == 2 and journal.failed == set()
+        assert journal.remove_processed() == 1
+        journal.close()
+    finally:
+        MaxReceiver.create_message_func = saved_func
+
+
+def test_journal_chat_index_and_deferred_sync(tmp_path):
+    """Test for chat index over removed segments and sync deferred to the caller."""
+    with WebhookJournal(tmp_path, segment_size=1024, sync_every=5, sync_interval=60) as journal:
+        for i in range(30):
+            seq = journal.append(make_body(i % 2, i), chat_id=i % 2, timestamp=i, sync=False)
+            journal.ack(seq)
+            if journal.sync_due:
+                asyncio.run(asyncio.to_thread(journal.sync))
+        assert not journal.sync_due
+        assert journal.remove_processed() > 0
+        history = journal.chat_history(1)
+        assert history and [e.timestamp for e in history] == list(range(31 - 2 * len(history), 30, 2))
+        assert all(json.loads(e.data)["timestamp"] == e.timestamp for e in history)
+        assert journal.chat_history(5) == []
+
+
+def test_read_journal_read_only(tmp_path):
+    """Test for reading the journal written by other process: broken tail and index are kept as is."""
+    journal = WebhookJournal(tmp_path, segment_size=512)
+    for ts in range(10):
+        journal.append(make_body(7, ts), chat_id=7, timestamp=ts)
+    journal.sync()
+    # Record being written
+    log_path = sorted(tmp_path.glob("*.log"))[-1]
+    with open(log_path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00broken")
+    files = {p.name: p.read_bytes() for p in tmp_path.iterdir()}
+    assert [e.timestamp for e in read_journal(tmp_path)] == list(range(10))
+    assert {p.name: p.read_bytes() for p in tmp_path.iterdir()} == files
+    journal.close()
+    with pytest.raises(ValueError):
+        list(read_journal(tmp_path / "missing"))
@@ -0,0 +1,73 @@
+"""
+Tests for logging of webhooks processing.
+"""
+
+import asyncio
+import sys
+import pytest
+from loguru import logger
+from messenger_utils.logs import configure_logging
+from messenger_utils.max import MaxReceiver
+
+
+def body(text: str) -> str:
+    return (
+        '{"timestamp": 1, "update_type": "message_created", "message": {"recipient": {"chat_id": 7, "user_id": 2},'
+        ' "sender": {"user_id": 3, "name": "Maxim", "is_bot": false}, "body": {"text": "' + text + '"}}}'
+    )
+
+
+@pytest.fixture
+def records():
+    """Records of loguru (logging config is reset after the test)."""
+    records = []
+    handler = logger.add(lambda message: records.append(message.record), level="DEBUG")
+    yield records
+    logger.remove(handler)
+    configure_logging()
+
+
+def process(*texts: str):
+    async def run():
+        for text in texts:
+            await MaxReceiver.from_raw(body(text)).process_webhook()
+    asyncio.run(run())
+
+
+def test_default_output(records):
+    """Test for default records: same messages, structured extra."""
+    process("Hello", "/unknown_{x}")
+    assert [(r["level"].name, r["message"]) for r in records] == [
+        ("INFO", "Event `create_message` recognized"),
+        ("INFO", "Event `command` recognized"),
+        ("WARNING", "Command `unknown_{x}` not found!"),
+    ]
+    assert records[0]["extra"] == {"event_type": "create_message", "chat_id": 7}
+    assert records[0]["function"] == "process_webhook"
+
+
+def test_levels_and_sampling(records):
+    """Test for levels per event type and sampling."""
+    configure_logging(levels={"create_message": "DEBUG", "command": None}, sample=3)
+    process(*["Hello"] * 7, "/unknown")
+    assert [(r["level"].name, r["message"]) for r in records] == [
+        ("DEBUG", "Event `create_message` recognized"),
+        ("DEBUG", "Event `create_message` recognized"),
+        ("DEBUG", "Event `create_message` recognized"),
+        ("WARNING", "Command `unknown` not found!"),
+    ]
+    with pytest.raises(ValueError):
+        configure_logging(sample=0)
+
+
+def test_enqueue():
+    """Test for queued handler replacing the default one."""
+    messages = []
+    try:
+        configure_logging(enqueue=True, sink=messages.append)
+        process("Hello")
+        logger.complete()
+    finally:
+        configure_logging()
+        logger.add(sys.stderr)
+    assert any("Event `create_message` recognized" in m for m in messages)
@@ -0,0 +1,97 @@
+"""
+Tests for metrics of API requests and webhooks processing.
+"""
+
+import asyncio
+import httpx
+import pytest
+from messenger_utils import metrics
+from messenger_utils.metrics import MetricsRegistry
+from messenger_utils.sender import Sender
+from messenger_utils.max import MaxReceiver, MaxSender
+
+
+BODY = (
+    '{"timestamp": 1, "update_type": "message_created", "message": {"recipient": {"chat_id": 1, "user_id": 2},'
+    ' "sender": {"user_id": 3, "name": "Maxim", "is_bot": false}, "body": {"text": "/missing"}}}'
+)
+
+
+@pytest.fixture
+def enabled():
+    """Enabled library metrics, reset after the test."""
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.disable()
+    metrics.REGISTRY.reset()
+
+
+def test_prometheus_text():
+    """Test for exposition of counters and histograms."""
+    registry = MetricsRegistry(enabled=True)
+    counter = registry.counter("requests_total", "Requests", ("status",))
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    counter.inc(("200",))
+    counter.inc(("200",))
+    counter.inc(('a"b',))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    text = registry.prometheus_text()
+    assert '# TYPE requests_total counter\nrequests_total{status="200"} 2\nrequests_total{status="a\\"b"} 1\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\nlatency_seconds_bucket{le="1"} 2\nlatency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_sum 5.55\nlatency_seconds_count 3\n" in text
+    assert registry.counter("requests_total", "Requests", ("status",)) is counter
+    with pytest.raises(ValueError):
+        registry.histogram("requests_total", "Requests", ("status",))
+
+
+def test_sink():
+    """Test for sink getting every update."""
+    records = []
+
+    class Sink:
+        def record(self, kind, name, labels, value):
+            records.append((kind, name, labels, value))
+
+    registry = MetricsRegistry(enabled=True)
+    registry.add_sink(Sink())
+    registry.counter("sent_total", "Sent", ("messenger",)).inc(("max",), 3)
+    assert records == [("counter", "sent_total", {"messenger": "max"}, 3)]
+
+
+def test_sender_metrics(monkeypatch, enabled):
+    """Test for metrics of API requests with retries."""
+    statuses = iter([503, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(next(statuses), json={"success": True}, headers={"Retry-After": "0"})
+
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+    sender = MaxSender("token", max_retries=1)
+    asyncio.run(sender.send_message("Hi", target=1))
+    assert metrics.API_REQUESTS.values == {("POST", "messages", "503"): 1, ("POST", "messages", "200"): 1}
+    assert metrics.API_RETRIES.values == {("POST", "messages", "503"): 1}
+    assert metrics.API_REQUEST_SECONDS.count(("POST", "messages")) == 1
+    assert metrics.API_BYTES.values[("POST", "messages", "sent")] > 0
+
+
+def test_receiver_metrics(monkeypatch, enabled):
+    """Test for metrics of webhook parsing, dispatch and unknown commands."""
+    async def on_start(event, **kwargs):
+        pass
+
+    monkeypatch.setattr(MaxReceiver, "commands_table", {"start": on_start})
+    asyncio.run(MaxReceiver.from_raw(BODY).process_webhook())
+    asyncio.run(MaxReceiver.from_raw(BODY.replace("/missing", "/start")).process_webhook())
+    assert metrics.WEBHOOK_PARSE_SECONDS.count(("message_created",)) == 2
+    assert metrics.WEBHOOK_NOT_FOUND.values == {("command",): 1}
+    assert metrics.WEBHOOK_DISPATCH_SECONDS.count(("message_created", on_start.__qualname__)) == 1
+    assert "messenger_utils_webhook_not_found_total" in metrics.prometheus_text()
+
+
+def test_disabled_metrics(monkeypatch):
+    """Test for disabled metrics: nothing is collected."""
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(lambda r: httpx.Response(200, json={})))
+    asyncio.run(MaxSender("token").send_message("Hi", target=1))
+    assert metrics.prometheus_text() == ""
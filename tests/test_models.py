@@ -63,3 +63,87 @@ def test_create_keyboard():
     assert keyboard1.to_json() == """{"buttons": [[{"type": "callback", "text": "test1", "payload": "buttontoken", "intent": "default"}]]}"""
     assert keyboard2.to_json() == """{"buttons": [[{"type": "callback", "text": "test2", "payload": "buttontoken", "intent": "default"}], [{"type": "link", "text": "test3", "url": "https://example.com"}], [{"type": "request_contact", "text": "test4"}]]}"""
     assert keyboard3.to_json() == """{"buttons": [[{"type": "callback", "text": "test5", "payload": "buttontoken", "intent": "default"}, {"type": "link", "text": "test6", "url": "https://example.com"}], [{"type": "request_contact", "text": "test7"}, {"type": "request_geo_location", "text": "test8", "quick": false}]]}"""
+
+
+def test_event_bytes_roundtrip():
+    """Test for events serialization to bytes and back."""
+    from messenger_utils.models.max_webhook_event import (
+        Attachment, MaxWebhookEvent, MessageCreatedEvent, MessageCallbackEvent
+    )
+    body = {"update_type": "message_created", "message": {"body": {"text": "Привет"}}}
+    events = [
+        MaxWebhookEvent("bot_started", chat_id=94154102, user_id=59483360, user_name="Maxim",
+                        user_is_bot=False, timestamp=1767730065426, full_body={"chat_id": 94154102}),
+        MessageCreatedEvent("message_created", chat_id=-100052860, user_id=59483360, user_name="Максим",
+                            user_is_bot=True, timestamp=1764671262844, full_body=body, text="Привет",
+                            recipient_id=108858268, attachments=[Attachment("image", url="https://x.ru/i", token="t3c9")]),
+        MessageCallbackEvent("message_callback", chat_id=100052860, user_id=59483360, user_name="Maxim",
+                             user_is_bot=False, timestamp=1766329065990, full_body={}, callback_id="f9LH", payload="BTN1")
+    ]
+    for event in events:
+        restored = MaxWebhookEvent.from_bytes(event.to_bytes())
+        assert type(restored) is type(event)
+        assert restored == event
+        light = MaxWebhookEvent.from_bytes(event.to_bytes(with_full_body=False))
+        assert light.full_body == {}
+        assert light.chat_id == event.chat_id and light.user_name == event.user_name
+    with pytest.raises(ValueError):
+        MaxWebhookEvent.from_bytes(b"\x02" + events[0].to_bytes()[1:])
+    with pytest.raises(ValueError):
+        MaxWebhookEvent.from_bytes(events[1].to_bytes()[:30])
+    # Truncated final string (callback payload) and trailing bytes
+    light = events[2].to_bytes(with_full_body=False)
+    for broken in (light[:-1], light + b"\x00"):
+        with pytest.raises(ValueError):
+            MaxWebhookEvent.from_bytes(broken)
+
+
+def test_button_text_not_rewritten():
+    """Test for button text & payload containing `btn_type` are serialized as is."""
+    btn = CallbackButton(text="btn_type", payload="btn_type:1", intent=BtnIntents.POSITIVE)
+    assert btn.to_dict() == {"type": "callback", "text": "btn_type", "payload": "btn_type:1", "intent": "positive"}
+    assert MaxKeyboard(btn).to_json() == '{"buttons": [[{"type": "callback", "text": "btn_type", "payload": "btn_type:1", "intent": "positive"}]]}'
+
+
+def test_keyboard_limits():
+    """Test for MAX API limits checked on keyboard construction."""
+    with pytest.raises(ValueError):
+        MaxKeyboard(CallbackButton(text="test", payload="x" * 1025))
+    with pytest.raises(ValueError):
+        MaxKeyboard(LinkButton(text="test", url="https://example.com/" + "x" * 2048))
+    with pytest.raises(ValueError):
+        MaxKeyboard([[CallbackButton(text=str(i), payload=str(i)) for i in range(8)]])
+    with pytest.raises(ValueError):
+        MaxKeyboard([[LinkButton(text=str(i), url="https://example.com") for i in range(4)]])
+    keyboard = MaxKeyboard([[CallbackButton(text=str(i), payload=str(i)) for i in range(7)] for _ in range(30)])
+    assert len(keyboard.to_dict()["buttons"]) == 30
+    with pytest.raises(ValueError):
+        keyboard.add_button(MessageButton("test"))
+    keyboard = MaxKeyboard([CallbackButton(text="1", payload="1")])
+    for _ in range(6):
+        keyboard.add_button(CallbackButton(text="1", payload="1"), 0)
+    with pytest.raises(ValueError):
+        keyboard.add_button(CallbackButton(text="1", payload="1"), 0)
+
+
+def test_keyboard_template():
+    """Test for rendering keyboard template with placeholders."""
+    template = MaxKeyboardTemplate(MaxKeyboard([
+        [CallbackButton(text="Pay $sum $$", payload="pay:${order_id}"), CallbackButton(text="Help", payload="help")],
+        [LinkButton(text="Details", url="https://example.com/orders/$order_id")],
+        [MessageButton("Static")]
+    ]))
+    rendered1 = template.render(order_id=42, sum=100)
+    rendered2 = template.render(order_id=43, sum=200)
+    assert rendered1["buttons"][0][0] == {"type": "callback", "text": "Pay 100 $", "payload": "pay:42", "intent": "default"}
+    assert rendered1["buttons"][1][0]["url"] == "https://example.com/orders/42"
+    assert rendered2["buttons"][0][0]["payload"] == "pay:43"
+    assert rendered1["buttons"][0][1] is rendered2["buttons"][0][1]     # static buttons are shared
+    assert rendered1["buttons"][2] is rendered2["buttons"][2]
+    # Static JSON payload is not a template
+    rendered = MaxKeyboardTemplate(MaxKeyboard([CallbackButton(text="Hi $name", payload='{"id":1}')])).render(name="x")
+    assert rendered["buttons"][0][0]["text"] == "Hi x" and rendered["buttons"][0][0]["payload"] == '{"id":1}'
+    with pytest.raises(KeyError):
+        template.render(order_id=1)
+    with pytest.raises(ValueError):
+        template.render(order_id="x" * 1024, sum=1)
@@ -0,0 +1,92 @@
+"""
+Tests for paginated keyboards.
+"""
+
+import asyncio
+import json
+import httpx
+from messenger_utils.max import MaxPaginator, MaxReceiver, MaxSender, CallbackButton
+
+
+def callback_body(payload: str) -> dict:
+    """Webhook body of button callback."""
+    return {
+        "timestamp": 1,
+        "update_type": "message_callback",
+        "message": {"recipient": {"chat_id": 1}},
+        "callback": {"payload": payload, "callback_id": "cb1", "user": {"user_id": 2, "name": "Maxim", "is_bot": False}}
+    }
+
+
+def test_paginator_sequence(monkeypatch):
+    """Test for rendering pages of sequence and answering navigation callbacks."""
+    monkeypatch.setattr(MaxReceiver, "callback_routes_table", {})
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"success": True})
+
+    sender = MaxSender("token", transport=httpx.MockTransport(handler))
+    paginator = MaxPaginator(
+        "items", range(1000),
+        item_button=lambda i: CallbackButton(text=f"Item {i}", payload=f"item:{i}"),
+        page_size=5, columns=2, text="Items:", sender=sender
+    )
+    keyboard = asyncio.run(paginator.render(0)).to_dict()["buttons"]
+    assert [len(row) for row in keyboard] == [2, 2, 1, 2]
+    assert [b["payload"] for b in keyboard[-1]] == ["items:0", "items:1"]
+    assert keyboard[-1][0]["text"] == "1/200"
+    last = asyncio.run(paginator.render(199)).to_dict()["buttons"]
+    assert [b["payload"] for b in last[-1]] == ["items:198", "items:199"]
+    # Navigation through receiver
+    asyncio.run(MaxReceiver(callback_body("items:3")).process_webhook())
+    assert requests[0].url.path == "/answers"
+    assert requests[0].url.params["callback_id"] == "cb1"
+    answer = json.loads(requests[0].content)
+    assert answer["message"]["text"] == "Items:"
+    assert answer["message"]["attachments"][0]["payload"]["buttons"][0][0]["payload"] == "item:15"
+    # Stale or forged page is limited to the last one
+    assert asyncio.run(paginator.render(500)).to_dict()["buttons"][-1][-1]["text"] == "200/200"
+    asyncio.run(MaxReceiver(callback_body("items:500")).process_webhook())
+    assert json.loads(requests[1].content)["message"]["attachments"][0]["payload"]["buttons"][0][0]["payload"] == "item:995"
+
+
+def test_paginator_keeps_text(monkeypatch):
+    """Test for page flip without text: the message text is not replaced."""
+    monkeypatch.setattr(MaxReceiver, "callback_routes_table", {})
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"success": True})
+
+    sender = MaxSender("token", transport=httpx.MockTransport(handler))
+    MaxPaginator("plain", range(30), item_button=lambda i: CallbackButton(text=str(i), payload=f"i:{i}"), sender=sender)
+    asyncio.run(MaxReceiver(callback_body("plain:1")).process_webhook())
+    assert "text" not in json.loads(requests[0].content)["message"]
+
+
+def test_paginator_async_source(monkeypatch):
+    """Test for async page source: only the page is loaded."""
+    monkeypatch.setattr(MaxReceiver, "callback_routes_table", {})
+    loads: list[tuple[int, int]] = []
+    pages: list[int] = []
+
+    async def source(offset: int, limit: int) -> list[int]:
+        loads.append((offset, limit))
+        return list(range(offset, min(offset + limit, 23)))
+
+    async def on_page(event, keyboard, page, **kwargs):
+        pages.append(page)
+
+    paginator = MaxPaginator(
+        "orders", source,
+        item_button=lambda i: CallbackButton(text=str(i), payload=f"order:{i}"),
+        page_size=10, on_page=on_page
+    )
+    keyboard = asyncio.run(paginator.render(2)).to_dict()["buttons"]
+    assert loads == [(20, 11)]
+    assert len(keyboard) == 4 and [b["payload"] for b in keyboard[-1]] == ["orders:1"]
+    asyncio.run(MaxReceiver(callback_body("orders:1")).process_webhook())
+    assert pages == [1]
@@ -0,0 +1,70 @@
+"""
+Tests for callback payload codec.
+"""
+
+from enum import Enum
+import pytest
+from messenger_utils import payload
+from messenger_utils.max import MaxReceiver
+from messenger_utils.models.telegram_update import parse_update
+from messenger_utils.payload import PayloadCodec
+
+
+class Status(Enum):
+    PAID = "paid"
+
+
+def test_payload_roundtrip():
+    """Test for encoding and decoding values."""
+    codec = PayloadCodec()
+    values = (123456789, -5, "a:b%c", "", 1.5, True, False, None)
+    encoded = codec.encode("order", *values)
+    assert encoded.startswith("order:i21i3v9:i-5:")
+    assert codec.decode(encoded) == ("order", values)
+    assert codec.decode(codec.encode("menu")) == ("menu", ())
+    assert codec.decode(codec.encode("st", Status.PAID)) == ("st", ("paid",))
+    with pytest.raises(TypeError):
+        codec.encode("x", [1, 2])
+    with pytest.raises(ValueError):
+        codec.decode("x:zzz")
+
+
+def test_payload_overflow():
+    """Test for storing large payloads in the store."""
+    codec = PayloadCodec(max_length=64, cache_size=2)
+    long_text = "x" * 100
+    encoded = [codec.encode("note", long_text, i) for i in range(3)]
+    assert all(len(e) <= 64 and e.startswith("note:~") for e in encoded)
+    assert codec.decode(encoded[2]) == ("note", (long_text, 2))
+    with pytest.raises(ValueError):
+        codec.decode(encoded[0])        # evicted from bounded cache
+    # Limit is in bytes (Telegram `callback_data`)
+    cyrillic = "приветмир" * 5
+    encoded_cyrillic = codec.encode("order", cyrillic)
+    assert len(encoded_cyrillic.encode()) <= 64 and codec.decode(encoded_cyrillic) == ("order", (cyrillic,))
+    with pytest.raises(ValueError):
+        codec.encode("a:b", 1)
+
+
+def test_callback_event_args():
+    """Test for transparent decoding of payload in callback event."""
+    body = {
+        "timestamp": 1,
+        "update_type": "message_callback",
+        "message": {"recipient": {"chat_id": 1}},
+        "callback": {
+            "payload": payload.default_codec.encode("pay", 42, "card" * 300),
+            "callback_id": "cb1",
+            "user": {"user_id": 2, "name": "Maxim", "is_bot": False}
+        }
+    }
+    event = MaxReceiver(body).parse_webhook()
+    assert event.route == "pay"
+    assert event.args == (42, "card" * 300)
+    assert event.args is event.args         # decoded once
+    event.payload = payload.default_codec.encode("pay", 7)
+    assert event.args == (7,)
+    telegram_event = parse_update({"update_id": 1, "callback_query": {
+        "id": "cb1", "from": {"id": 2, "is_bot": False, "first_name": "Maxim"}, "data": event.payload, "message": {"message_id": 9, "date": 1, "chat": {"id": 1}}
+    }})
+    assert telegram_event.args == (7,) and telegram_event.args is telegram_event.args
@@ -0,0 +1,53 @@
+"""
+Tests for synthetic webhooks and webhook endpoint probe.
+"""
+
+import asyncio
+import json
+from typing import get_args
+import pytest
+from messenger_utils.http_server import HttpRequest, HttpResponse, HttpServer
+from messenger_utils.max import EventTypes, MaxReceiver, MaxWebhookDecoder
+from messenger_utils.max.max_synthetic import SyntheticWebhooks
+from messenger_utils.probe import probe_endpoint
+
+
+def test_synthetic_webhooks():
+    """Test for parsing synthetic webhooks of all event types."""
+    synthetic = SyntheticWebhooks(seed=1, users=10)
+    decoder = MaxWebhookDecoder()
+    for event_type in get_args(EventTypes):
+        body = synthetic.body(event_type)
+        assert MaxReceiver(body).parse_webhook().event_type == event_type
+        assert decoder.decode(json.dumps(body).encode()).event_type == event_type
+    types = {json.loads(raw)["update_type"] for raw in synthetic.stream(500)}
+    assert types == set(get_args(EventTypes))
+    with pytest.raises(ValueError):
+        SyntheticWebhooks(mix={"unknown": 1.0})
+
+
+def test_probe_endpoint():
+    """Test for ramp up of concurrency until endpoint fails."""
+    async def handler(request: HttpRequest) -> HttpResponse:
+        MaxReceiver.from_raw(request.body).parse_webhook()
+        return HttpResponse(503 if active[0] > 2 else 200)
+
+    active = [0]
+
+    async def counted(request: HttpRequest) -> HttpResponse:
+        active[0] += 1
+        try:
+            await asyncio.sleep(0.005)
+            return await handler(request)
+        finally:
+            active[0] -= 1
+
+    async def run():
+        async with HttpServer(counted) as server:
+            return await probe_endpoint(server.url + "/", requests=40, max_concurrency=16)
+
+    result = asyncio.run(run())
+    assert [s.concurrency for s in result.steps][:2] == [1, 2]
+    assert not result.steps[-1].passed and result.steps[-1].statuses[503] > 0
+    assert result.best is not None and result.best.concurrency <= 2
+    assert result.sustainable_rate > 0
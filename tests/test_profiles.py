@@ -0,0 +1,91 @@
+"""
+Tests for bot profiles and multi-bot operations.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from typer.testing import CliRunner
+from messenger_utils.cli import app
+from messenger_utils.sender import Sender
+from messenger_utils.profiles import BotProfile, load_profiles, select_profiles, fan_out
+
+
+
+@pytest.fixture
+def profiles_file(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.toml"
+    path.write_text(
+        '[profiles.shop]\ntoken = "shop-token"\nchat_id = 11\n\n'
+        '[profiles.support]\ntoken = "support-token"\n'
+    )
+    monkeypatch.setenv("MESSENGER_UTILS_PROFILES_FILE", str(path))
+    return path
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Stubbed MAX API answering with the bot token as bot name ("bad-token" fails)."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers["Authorization"]
+        if token == "bad-token":
+            return httpx.Response(401, json={"code": "verify.token"})
+        if request.url.path == "/me":
+            return httpx.Response(200, json={"user_id": 1, "name": token, "username": f"{token}_bot", "commands": []})
+        return httpx.Response(200, json={"message": {"recipient": {"chat_id": json.loads(request.url.params["chat_id"])}, "body": {"mid": "m1"}}})
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(handler))
+
+
+def test_load_profiles(profiles_file, monkeypatch):
+    """
+    Check profiles from TOML file overridden by environment
+    """
+    monkeypatch.setenv("MESSENGER_UTILS_PROFILES__SUPPORT__CHAT_ID", "22")
+    profiles = load_profiles()
+    assert profiles["shop"] == BotProfile(token="shop-token", chat_id=11)
+    assert profiles["support"].chat_id == 22
+
+
+def test_select_profiles():
+    """
+    Check selection of profiles by names
+    """
+    profiles = {"a": BotProfile(token="1"), "b": BotProfile(token="2"), "c": BotProfile(token="3")}
+    assert list(select_profiles(profiles, "c, a")) == ["c", "a"]
+    assert list(select_profiles(profiles)) == ["a", "b", "c"]
+    with pytest.raises(ValueError, match="not found: d"):
+        select_profiles(profiles, ["a", "d"])
+    with pytest.raises(ValueError):
+        select_profiles({}, None)
+
+
+def test_fan_out(api):
+    """
+    Check that failure of one bot doesn't break the others
+    """
+    profiles = {"ok": BotProfile(token="ok-token"), "bad": BotProfile(token="bad-token")}
+    results = asyncio.run(fan_out(profiles, lambda sender, _: sender.get_bot_info()))
+    assert results["ok"]["name"] == "ok-token"
+    assert isinstance(results["bad"], httpx.HTTPStatusError)
+
+
+def test_cli_profiles(profiles_file, api):
+    """
+    Check combined output of CLI commands run for all profiles
+    """
+    runner = CliRunner()
+    result = runner.invoke(app, ["bot-info", "--all"])
+    assert result.exit_code == 0, result.output
+    assert "shop-token_bot" in result.output and "support-token_bot" in result.output
+    # `support` profile has no default chat
+    result = runner.invoke(app, ["send", "Hello", "--all"])
+    assert result.exit_code == 1
+    assert "m1" in result.output and "chat_id" in result.output
+    result = runner.invoke(app, ["bot-info", "--profile", "unknown"])
+    assert result.exit_code == 1
+    assert "not found" in result.output
+    # Profiles are MAX bots
+    for command in (["bot-info"], ["bot-commands"], ["send", "Hello"]):
+        result = runner.invoke(app, [*command, "--all", "--messenger", "telegram"])
+        assert result.exit_code == 1 and "MAX only" in result.output
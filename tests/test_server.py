@@ -0,0 +1,142 @@
+"""
+Tests for webhook server.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from messenger_utils.http_server import HttpServer
+from messenger_utils.max import MaxReceiver, MaxSender
+from messenger_utils.max.max_server import webhook_handler
+
+
+BODY = (
+    '{"timestamp": 1, "update_type": "message_created", "message": {"recipient": {"chat_id": 1, "user_id": 2},'
+    ' "sender": {"user_id": 3, "name": "Maxim", "is_bot": false}, "body": {"text": "Hello"}}}'
+)
+
+
+def test_webhook_handler(monkeypatch):
+    """Test for dispatching webhooks with pooled sender, secret check and health endpoint."""
+    received = []
+
+    async def on_message(event, sender, db, **kwargs):
+        received.append((event.text, sender, db))
+
+    monkeypatch.setattr(MaxReceiver, "create_message_func", on_message)
+
+    async def run():
+        sender = MaxSender("token")
+        async with HttpServer(webhook_handler(sender, path="/hook", secret="s3", db="pool")) as server:
+            async with httpx.AsyncClient(base_url=server.url) as client:
+                ok = await client.post("/hook", content=BODY, headers={"X-Max-Bot-Api-Secret": "s3"})
+                forbidden = await client.post("/hook", content=BODY)
+                bad = await client.post("/hook", content=b"{", headers={"X-Max-Bot-Api-Secret": "s3"})
+                missing = await client.post("/other", content=BODY)
+                health = await client.get("/health")
+        return sender, ok, forbidden, bad, missing, health
+
+    sender, ok, forbidden, bad, missing, health = asyncio.run(run())
+    assert ok.status_code == 200 and received == [("Hello", sender, "pool")]
+    assert (forbidden.status_code, bad.status_code, missing.status_code) == (403, 400, 404)
+    assert health.json()["status"] == "ok" and health.json()["webhooks"] == 1
+
+
+def test_stalled_and_invalid_requests():
+    """Test for timeout of stalled request body and negative `Content-Length`."""
+    async def handler(request):
+        raise AssertionError("handler called")
+
+    async def run():
+        server = HttpServer(handler, keep_alive_timeout=0.1)
+        await server.start()
+        stalled_reader, stalled_writer = await asyncio.open_connection(server.host, server.port)
+        stalled_writer.write(b"POST /hook HTTP/1.1\r\nContent-Length: 1000000\r\n\r\nabc")
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(b"POST /hook HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+        invalid = await reader.read()
+        stalled = await asyncio.wait_for(stalled_reader.read(), 1)
+        started = time.monotonic()
+        await server.close(timeout=5)
+        writer.close()
+        stalled_writer.close()
+        return invalid, stalled, time.monotonic() - started
+
+    invalid, stalled, closing = asyncio.run(run())
+    assert invalid.startswith(b"HTTP/1.1 400")
+    assert stalled == b"" and closing < 1
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT is not supported")
+def test_serve_workers(tmp_path):
+    """Test for multi-worker server: health of several workers and graceful shutdown."""
+    (tmp_path / "serve_bot.py").write_text(
+        "from messenger_utils.max import MaxReceiver\n"
+        "@MaxReceiver.create_message\n"
+        "async def on_message(event, **kwargs):\n"
+        "    pass\n"
+    )
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "messenger_utils", "serve", "-a", "serve_bot", "-t", "token",
+         "--host", "127.0.0.1", "-p", str(port), "-w", "2", "--drain-timeout", "1"],
+        cwd=tmp_path, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        pids = set()
+        deadline = time.monotonic() + 30
+        while len(pids) < 2 and time.monotonic() < deadline:
+            try:
+                # New connection per request: the kernel spreads connections over workers
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+                pids.add(response.json()["pid"])
+                assert httpx.post(f"http://127.0.0.1:{port}/", content=BODY).json() == {"ok": True}
+            except httpx.TransportError:
+                time.sleep(0.2)
+        assert len(pids) == 2
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT is not supported")
+def test_failed_worker_restart(monkeypatch):
+    """Test for retry of failed worker restart: other workers keep serving."""
+    from messenger_utils.max import max_server
+
+    class FakeProcess:
+        def __init__(self, alive: bool):
+            self.alive, self.pid, self.exitcode = alive, id(self), None if alive else 1
+
+        def is_alive(self):
+            return self.alive
+
+    healthy, crashed, restarted = FakeProcess(True), FakeProcess(False), FakeProcess(True)
+    server = max_server.MaxWebhookServer("bot", bot_token="token", workers=2)
+    starts = [[healthy, crashed], RuntimeError("Worker failed to start"), [restarted]]
+    stopped: list[list[FakeProcess]] = []
+
+    def start_workers(count):
+        result = starts.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        server._stop = not starts
+        return result
+
+    monkeypatch.setattr(max_server, "RESTART_BACKOFF", 0.01)
+    monkeypatch.setattr(server, "_start_workers", start_workers)
+    monkeypatch.setattr(server, "_stop_workers", stopped.append)
+    monkeypatch.setattr(signal, "signal", lambda *args: None)
+    server.run()
+    assert stopped == [[healthy, restarted]]
@@ -0,0 +1,46 @@
+"""
+Tests for interactive shell.
+"""
+
+import asyncio
+import io
+import json
+import httpx
+from rich.console import Console
+from messenger_utils.max import MaxSender
+from messenger_utils.shell import Shell
+
+
+def make_shell() -> tuple[Shell, list[str], io.StringIO]:
+    """Shell with stubbed API keeping bot commands."""
+    calls: list[str] = []
+    bot = {"user_id": 1, "name": "Bot", "commands": [{"name": "help", "description": "Help"}]}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.path}")
+        if request.method == "PATCH":
+            bot["commands"] = json.loads(request.content)["commands"]
+        if request.url.path == "/messages":
+            return httpx.Response(200, json={"message": {"body": {"text": "Hi"}}})
+        return httpx.Response(200, json=bot)
+
+    output = io.StringIO()
+    sender = MaxSender("token", transport=httpx.MockTransport(handler))
+    return Shell(sender, Console(file=output, width=120)), calls, output
+
+
+def test_shell_cache():
+    """Test for caching bot info between commands and updating it by own changes."""
+    shell, calls, output = make_shell()
+
+    async def run():
+        for line in ["bot-info", "bot-commands", "set-command start Start the bot", "bot-commands",
+                     "remove-command help", "remove-command missing", "send 5 Hello there", "send x", "", "nope"]:
+            await shell.execute(line)
+
+    asyncio.run(run())
+    assert calls == ["GET /me", "PATCH /me", "PATCH /me", "POST /messages"]
+    text = output.getvalue()
+    assert "Start the bot" in text and "Command `missing` not found" in text
+    assert "Usage: send <chat_id> <message>" in text and "Unknown command `nope`" in text
+    assert [c["name"] for c in shell._bot_info["commands"]] == ["start"]
@@ -0,0 +1,149 @@
+"""
+Tests for dialog state stores and state routing.
+"""
+
+import asyncio
+import time
+import sqlite3
+import pytest
+from loguru import logger
+from messenger_utils.max import MaxReceiver
+from messenger_utils.state import *
+
+
+def test_memory_store_lru_ttl():
+    """Test for LRU eviction and records expiration."""
+    async def run():
+        store = MemoryStateStore(max_size=2, ttl=0.05)
+        await store.set((1, 1), StateRecord("a"))
+        await store.set((2, 2), StateRecord("b"))
+        assert (await store.get((1, 1))).state == "a"       # (2, 2) becomes least recently used
+        await store.set((3, 3), StateRecord("c"))
+        assert await store.get((2, 2)) is None
+        assert len(store) == 2
+        time.sleep(0.06)
+        assert await store.get((1, 1)) is None
+    asyncio.run(run())
+
+
+def test_sqlite_store_write_behind(tmp_path):
+    """Test for batched writing of SQLite store."""
+    async def run():
+        store = SQLiteStateStore(tmp_path / "state.db", batch_size=3, flush_interval=60)
+        await store.set((1, 1), StateRecord("a", {"x": 1}))
+        await store.set((2, 2), StateRecord("b"))
+        assert store._select((1, 1)) is None                # not written yet...
+        assert (await store.get((1, 1))).data == {"x": 1}   # ...but visible
+        await store.delete((2, 2))
+        await store.set((3, 3), StateRecord("c"))           # batch is full
+        assert store._select((1, 1)) == ("a", '{"x": 1}')
+        await store.set((4, 4), StateRecord("d"))
+        await store.close()
+        store = SQLiteStateStore(tmp_path / "state.db")
+        assert (await store.get((4, 4))).state == "d"
+        assert await store.get((2, 2)) is None
+        await store.close()
+    asyncio.run(run())
+
+
+def test_sqlite_store_failed_write(tmp_path, monkeypatch):
+    """Test for failed batch: changes stay pending (newer ones win), background failure is logged."""
+    records = []
+    handler = logger.add(lambda message: records.append(message.record), level="ERROR")
+
+    async def run():
+        store = SQLiteStateStore(tmp_path / "state.db", batch_size=100, flush_interval=0.01)
+        write = store._write
+        def broken_write(pending):
+            raise sqlite3.OperationalError("database is locked")
+        monkeypatch.setattr(store, "_write", broken_write)
+        await store.set((1, 1), StateRecord("a"))
+        await store.set((2, 2), StateRecord("b"))
+        await asyncio.sleep(0.05)                           # Background flush fails
+        with pytest.raises(sqlite3.OperationalError):
+            await store.flush()
+        await store.set((2, 2), StateRecord("b2"))
+        monkeypatch.setattr(store, "_write", write)
+        await store.close()
+        store = SQLiteStateStore(tmp_path / "state.db")
+        assert (await store.get((1, 1))).state == "a"
+        assert (await store.get((2, 2))).state == "b2"
+        await store.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        logger.remove(handler)
+    assert any("Writing of dialog states failed" in r["message"] for r in records)
+
+
+def test_cached_store_read_through():
+    """Test for read-through cache."""
+    class CountingStore(MemoryStateStore):
+        reads = 0
+        async def get(self, key):
+            CountingStore.reads += 1
+            return await super().get(key)
+
+    async def run():
+        backend = CountingStore()
+        await backend.set((1, 1), StateRecord("a"))
+        store = CachedStateStore(backend)
+        for _ in range(3):
+            assert (await store.get((1, 1))).state == "a"
+            assert await store.get((2, 2)) is None
+        assert CountingStore.reads == 2
+        context = FSMContext(store, (2, 2))
+        await context.update_data(name="Maxim")
+        await context.set_state("waiting")
+        assert await context.get_state() == "waiting"
+        assert await context.get_data() == {"name": "Maxim"}
+        assert (await backend.get((2, 2))).state == "waiting"
+        await context.clear()
+        assert await context.get_state() is None
+    asyncio.run(run())
+
+
+def test_state_routing(monkeypatch):
+    """Test for dispatching messages and commands by dialog state."""
+    calls: list[str] = []
+    monkeypatch.setattr(MaxReceiver, "state_store", MemoryStateStore())
+    monkeypatch.setattr(MaxReceiver, "commands_table", {})
+    monkeypatch.setattr(MaxReceiver, "state_commands_table", {})
+    monkeypatch.setattr(MaxReceiver, "state_messages_table", {})
+    monkeypatch.setattr(MaxReceiver, "create_message_func", None)
+
+    @MaxReceiver.command("order")
+    async def order(event, state, **kwargs):
+        calls.append("order")
+        await state.set_state("address")
+
+    @MaxReceiver.command("order", state="address")
+    async def order_again(event, state, **kwargs):
+        calls.append("order_again")
+
+    @MaxReceiver.state_message("address")
+    async def address(event, state, **kwargs):
+        calls.append(f"address:{event.text}")
+        await state.set_state(None)
+
+    @MaxReceiver.create_message
+    async def message(event, **kwargs):
+        calls.append(f"message:{event.text}")
+
+    def body(text: str) -> dict:
+        return {
+            "timestamp": 1,
+            "update_type": "message_created",
+            "message": {
+                "recipient": {"chat_id": 1, "user_id": 2},
+                "sender": {"user_id": 3, "name": "Maxim", "is_bot": False},
+                "body": {"text": text}
+            }
+        }
+
+    async def run():
+        for text in ["hi", "/order", "/order", "Moscow", "bye"]:
+            await MaxReceiver(body(text)).process_webhook()
+    asyncio.run(run())
+    assert calls == ["message:hi", "order", "order_again", "address:Moscow", "message:bye"]
@@ -0,0 +1,123 @@
+"""
+Tests for Telegram sender and flood limits.
+"""
+
+import asyncio
+import json
+import time
+import httpx
+from typer.testing import CliRunner
+from messenger_utils.cli import app
+from messenger_utils.sender import Sender
+from messenger_utils.rate_limit import RateLimiter
+from messenger_utils.telegram import TelegramSender, TelegramFloodLimiter
+
+
+
+def api_handler(requests: list[httpx.Request], statuses: list[int] | None = None):
+    """Stubbed Bot API: answers with `statuses` first (429 with `retry_after`), then OK."""
+    statuses = list(statuses or [])
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if statuses:
+            status = statuses.pop(0)
+            return httpx.Response(status, json={"ok": False, "error_code": status, "parameters": {"retry_after": 0.05}})
+        if request.url.path.endswith("/getMe"):
+            return httpx.Response(200, json={"ok": True, "result": {"id": 1, "is_bot": True, "username": "tg_bot"}})
+        if request.url.path.endswith("/getMyCommands"):
+            return httpx.Response(200, json={"ok": True, "result": [{"command": "start", "description": "Start"}]})
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": 1, "chat": {"id": json.loads(request.content).get("chat_id")}}})
+    return handler
+
+
+def test_rate_limiter_pause():
+    """
+    Check that pause delays the next acquisition
+    """
+    async def acquire_paused() -> float:
+        limiter = RateLimiter(1000)
+        limiter.pause(0.05)
+        started = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_paused()) >= 0.04
+
+
+def test_flood_limits():
+    """
+    Check per chat and per group limits, and that other chats are not blocked by them
+    """
+    async def send(flood: TelegramFloodLimiter, chats: list[int]) -> float:
+        started = time.monotonic()
+        await asyncio.gather(*(flood.acquire(chat_id) for chat_id in chats))
+        return time.monotonic() - started
+
+    flood = TelegramFloodLimiter(global_rate=100_000, chat_rate=20, group_rate=2, group_period=0.1)
+    assert asyncio.run(send(flood, [1, 1, 1])) >= 0.09                  # 2 waits of 50 ms
+    assert asyncio.run(send(flood, list(range(2, 50)))) < 0.05          # distinct chats
+    assert asyncio.run(send(flood, [-100, -100, -100])) >= 0.09         # 1 chat wait, then 20/s group rate
+    assert TelegramFloodLimiter.is_group("@channel") and not TelegramFloodLimiter.is_group(5)
+
+
+def test_telegram_sender():
+    """
+    Check Bot API calls: token in URL, unwrapped results, commands format
+    """
+    requests: list[httpx.Request] = []
+    sender = TelegramSender("123:ABC", transport=httpx.MockTransport(api_handler(requests)))
+    assert asyncio.run(sender.get_bot_info())["username"] == "tg_bot"
+    assert asyncio.run(sender.get_bot_commands()) == [{"name": "start", "description": "Start"}]
+    asyncio.run(sender.register_command(name="help", description="Help"))
+    assert requests[0].url.path == "/bot123:ABC/getMe"
+    assert "Authorization" not in requests[0].headers
+    assert json.loads(requests[-1].content)["commands"][-1] == {"command": "help", "description": "Help"}
+    asyncio.run(sender.send_message("Hi", target=5, image_url="https://example.com/a.png"))
+    assert requests[-1].url.path.endswith("/sendPhoto")
+    assert json.loads(requests[-1].content) == {"chat_id": 5, "photo": "https://example.com/a.png", "caption": "Hi"}
+
+
+def test_telegram_retry_after():
+    """
+    Check that 429 is retried after `retry_after`, which also pauses the flood limiter
+    """
+    requests: list[httpx.Request] = []
+    sender = TelegramSender("token", transport=httpx.MockTransport(api_handler(requests, [429])))
+    started = time.monotonic()
+    response = asyncio.run(sender.send_message("Hi", target=1))
+    assert time.monotonic() - started >= 0.04
+    assert response["message_id"] == 1
+    assert sender.retries == 1 and len(requests) == 2
+    assert sender.flood.global_limiter.delay() > 0
+
+
+def test_telegram_retry_flood_limits(monkeypatch):
+    """
+    Check that the retried message waits for flood limits of the chat again
+    """
+    acquired: list[int|str] = []
+    acquire = TelegramFloodLimiter.acquire
+    async def acquire_recorded(self, chat_id):
+        acquired.append(chat_id)
+        await acquire(self, chat_id)
+
+    monkeypatch.setattr(TelegramFloodLimiter, "acquire", acquire_recorded)
+    requests: list[httpx.Request] = []
+    sender = TelegramSender("token", transport=httpx.MockTransport(api_handler(requests, [429])))
+    asyncio.run(sender.send_message("Hi", target=7))
+    assert acquired == [7, 7] and len(requests) == 2
+    asyncio.run(sender.get_bot_info())
+    assert acquired == [7, 7]
+
+
+def test_cli_telegram(monkeypatch):
+    """
+    Check Telegram branch of CLI takes token from Telegram env var
+    """
+    requests: list[httpx.Request] = []
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(api_handler(requests)))
+    monkeypatch.setenv("MESSENGER_UTILS_TG_BOT_TOKEN", "tg-token")
+    result = CliRunner().invoke(app, ["bot-info", "-m", "telegram"])
+    assert result.exit_code == 0, result.output
+    assert "tg_bot" in result.output
+    assert requests[0].url.path == "/bottg-token/getMe"
@@ -0,0 +1,119 @@
+"""
+Tests for Telegram updates parsing and long polling.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from messenger_utils.telegram import TelegramReceiver, TelegramSender
+from messenger_utils.models.telegram_update import TelegramEvent, TelegramMessageEvent, TelegramCallbackEvent, parse_update
+
+
+USER = {"id": 7, "is_bot": False, "first_name": "Maxim", "last_name": "H"}
+
+
+def message(update_id: int, chat_id: int, text: str) -> dict:
+    return {"update_id": update_id, "message": {"message_id": update_id, "date": 1767730065, "chat": {"id": chat_id, "type": "private"}, "from": USER, "text": text}}
+
+
+def test_parse_updates():
+    """
+    Check mapping of updates to events
+    """
+    event = parse_update(message(1, 5, "/start@my_bot deep_link"))
+    assert isinstance(event, TelegramMessageEvent)
+    assert (event.event_type, event.chat_id, event.user_name, event.timestamp) == ("message_created", 5, "Maxim H", 1767730065000)
+    assert event.command == "start"
+    assert parse_update(message(2, 5, "hello")).command is None
+    callback = parse_update({"update_id": 3, "callback_query": {"id": "cb1", "from": USER, "data": "page:2", "message": {"message_id": 9, "date": 1, "chat": {"id": 5}}}})
+    assert isinstance(callback, TelegramCallbackEvent)
+    assert (callback.chat_id, callback.payload, callback.route, callback.message_id) == (5, "page:2", "page", 9)
+    stopped = parse_update({"update_id": 4, "my_chat_member": {"chat": {"id": 7, "type": "private"}, "from": USER, "date": 1, "new_chat_member": {"status": "kicked"}}})
+    assert isinstance(stopped, TelegramEvent) and stopped.event_type == "bot_stopped"
+    with pytest.raises(ValueError):
+        parse_update({"update_id": 5, "poll": {}})
+
+
+def test_poll(monkeypatch):
+    """
+    Check long polling: offsets, concurrent dispatch, order of updates within a chat
+    """
+    batches = [
+        [message(1, 100, "1"), message(2, 200, "/help"), message(3, 100, "2"), message(4, 100, "3")],
+        [{"update_id": 5, "poll": {}}, message(6, 200, "after")],
+    ]
+    requests: list[dict] = []
+    stop = asyncio.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if batches:
+            result = batches.pop(0)
+        else:
+            stop.set()
+            result = []
+        return httpx.Response(200, json={"ok": True, "result": result})
+
+    processed: list[tuple[int, str]] = []
+
+    async def on_message(event, **kwargs):
+        # Earlier messages are slower: the order is kept by per chat queue only
+        await asyncio.sleep(0.03 / int(event.text) if event.text.isdigit() else 0)
+        assert kwargs["sender"] is sender and kwargs["extra"] == 1
+        processed.append((event.chat_id, event.text))
+
+    async def on_help(event, **kwargs):
+        processed.append((event.chat_id, "help"))
+
+    monkeypatch.setattr(TelegramReceiver, "create_message_func", on_message)
+    monkeypatch.setattr(TelegramReceiver, "commands_table", {"help": on_help})
+    sender = TelegramSender("token", transport=httpx.MockTransport(handler))
+    offset = asyncio.run(TelegramReceiver.poll(sender, concurrency=4, timeout=1, stop=stop, extra=1))
+    assert offset == 7
+    assert [r.get("offset") for r in requests[:3]] == [None, 5, 7]
+    assert requests[0]["limit"] == 100
+    assert [text for chat_id, text in processed if chat_id == 100] == ["1", "2", "3"]
+    assert processed.index((200, "help")) < processed.index((100, "1"))
+    assert (200, "after") in processed
+
+
+def test_poll_busy_chat(monkeypatch):
+    """
+    Check that updates waiting for a busy chat don't take processing slots of other chats,
+    and that malformed `getUpdates` responses are retried
+    """
+    batches = [[message(1, 100, "1"), message(2, 100, "2"), message(3, 200, "other")]]
+    stop = asyncio.Event()
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return httpx.Response(200, content=b"not json")
+        if batches:
+            return httpx.Response(200, json={"ok": True, "result": batches.pop(0)})
+        stop.set()
+        return httpx.Response(200, json={"ok": True, "result": []})
+
+    other_done = asyncio.Event()
+    processed: list[str] = []
+
+    async def on_message(event, **kwargs):
+        if event.text == "other":
+            other_done.set()
+        elif event.text == "1":
+            # Other chat is processed while the 2nd update of this chat waits (it used to hold the 2nd slot)
+            await asyncio.wait_for(other_done.wait(), 1)
+        processed.append(event.text)
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(TelegramReceiver, "create_message_func", on_message)
+    monkeypatch.setattr("messenger_utils.telegram.telegram_receiver.asyncio.sleep", no_sleep)
+    sender = TelegramSender("token", transport=httpx.MockTransport(handler))
+    assert asyncio.run(TelegramReceiver.poll(sender, concurrency=2, timeout=1, stop=stop)) == 4
+    assert processed == ["other", "1", "2"]
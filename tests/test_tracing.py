@@ -0,0 +1,112 @@
+"""
+Tests for tracing of webhooks processing and API requests.
+"""
+
+import asyncio
+from contextlib import contextmanager
+import httpx
+import pytest
+from messenger_utils import tracing
+from messenger_utils.http_server import HttpServer
+from messenger_utils.max import MaxReceiver, MaxSender
+from messenger_utils.max.max_server import webhook_handler
+from messenger_utils.sender import Sender
+
+
+BODY = (
+    '{"timestamp": 1, "update_type": "message_created", "message": {"recipient": {"chat_id": 7, "user_id": 2},'
+    ' "sender": {"user_id": 3, "name": "Maxim", "is_bot": false}, "body": {"text": "/start"}}}'
+)
+
+
+class RecordingSpan:
+    def __init__(self, name, attributes, parent):
+        self.name, self.attributes, self.parent = name, dict(attributes or {}), parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class RecordingTracer:
+    """Tracer recording finished spans with their parents."""
+    def __init__(self):
+        self.spans: list[RecordingSpan] = []
+        self.current: RecordingSpan|None = None
+
+    @contextmanager
+    def start_as_current_span(self, name, *, attributes=None):
+        span, parent = RecordingSpan(name, attributes, self.current), self.current
+        self.current = span
+        try:
+            yield span
+        finally:
+            self.current = parent
+            self.spans.append(span)
+
+
+@pytest.fixture
+def tracer():
+    """Enabled tracing with recording tracer."""
+    tracer = RecordingTracer()
+    tracing.enable(tracer)
+    yield tracer
+    tracing.disable()
+
+
+def test_webhook_to_reply(monkeypatch, tracer):
+    """Test for spans from webhook request to the reply sent by the handler."""
+    spans_of_handler = []
+
+    async def on_start(event, sender, trace_span, **kwargs):
+        spans_of_handler.append(trace_span)
+        await sender.send_message("Hi", target=event.chat_id)
+
+    monkeypatch.setattr(MaxReceiver, "commands_table", {"start": on_start})
+    monkeypatch.setattr(Sender, "default_transport", httpx.MockTransport(lambda r: httpx.Response(200, json={})))
+
+    async def run():
+        sender = MaxSender("token")
+        async with HttpServer(webhook_handler(sender, path="/hook")) as server:
+            async with httpx.AsyncClient(base_url=server.url) as client:
+                assert (await client.post("/hook", content=BODY)).status_code == 200
+
+    asyncio.run(run())
+    spans = {span.name: span for span in tracer.spans}
+    root, parse, dispatch, send = (
+        spans["messenger_utils.webhook"], spans["messenger_utils.webhook.parse"],
+        spans["messenger_utils.webhook.dispatch"], spans["POST messages"]
+    )
+    assert parse.parent is root and dispatch.parent is root and send.parent is dispatch
+    assert spans_of_handler == [dispatch]
+    assert parse.attributes[tracing.ATTR_EVENT_TYPE] == "message_created"
+    assert dispatch.attributes[tracing.ATTR_CHAT_ID] == 7
+    assert dispatch.attributes[tracing.ATTR_HANDLER].endswith("on_start")
+    assert send.attributes == {
+        "http.request.method": "POST", tracing.ATTR_ENDPOINT: "messages", tracing.ATTR_CHAT_ID: 7,
+        "http.response.status_code": 200
+    }
+
+
+def test_disabled_tracing(monkeypatch):
+    """Test for disabled tracing: no span kwarg, no-op span helper."""
+    received = []
+
+    async def on_message(event, **kwargs):
+        received.append(kwargs)
+
+    monkeypatch.setattr(MaxReceiver, "create_message_func", on_message)
+    asyncio.run(MaxReceiver.from_raw(BODY.replace("/start", "Hello")).process_webhook())
+    assert received == [{}]
+    with tracing.span("name") as span:
+        assert span is None
+
+
+def test_opentelemetry_tracer():
+    """Test for default tracer of OpenTelemetry."""
+    pytest.importorskip("opentelemetry")
+    try:
+        tracing.enable()
+        with tracing.span("name", {tracing.ATTR_CHAT_ID: 1}) as span:
+            span.set_attribute(tracing.ATTR_EVENT_TYPE, "bot_started")
+    finally:
+        tracing.disable()
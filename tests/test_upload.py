@@ -0,0 +1,97 @@
+"""
+Tests for MAX media uploads.
+"""
+
+import asyncio
+import hashlib
+import json
+import httpx
+import pytest
+from messenger_utils.max import MaxSender
+from messenger_utils.max.max_upload import upload_type_of
+
+
+@pytest.fixture
+def api():
+    """Stubbed MAX API & upload server; returns transport and log of requests with their bodies."""
+    log: list[tuple[httpx.Request, bytes]] = []
+    not_ready = [1]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = b"".join([chunk async for chunk in request.stream])
+        log.append((request, body))
+        if request.url.path == "/uploads":
+            upload_type = request.url.params["type"]
+            slot = {"url": f"https://upload.example.com/{upload_type}"}
+            if upload_type in ("video", "audio"):
+                slot["token"] = "v-token"
+            return httpx.Response(200, json=slot)
+        if request.url.host == "upload.example.com":
+            return httpx.Response(200, json={"token": f"f-{hashlib.sha256(body).hexdigest()[:8]}"})
+        if request.url.path == "/messages" and not_ready:
+            not_ready.pop()
+            return httpx.Response(400, json={"code": "attachment.not.ready", "message": "Key: errors.process.attachment.file.not.processed"})
+        return httpx.Response(200, json={"message": {"body": {"mid": "m1"}}})
+
+    return httpx.MockTransport(handler), log
+
+
+def test_upload_file(api, tmp_path):
+    """
+    Check streaming multipart upload of file and the cache of concurrent uploads of the same content
+    """
+    transport, log = api
+    path = tmp_path / "banner.bin"
+    path.write_bytes(b"x" * 600_000)        # several chunks
+    sender = MaxSender("token", transport=transport)
+
+    async def upload_many():
+        return await asyncio.gather(*(sender.upload(path) for _ in range(20)))
+
+    attachments = asyncio.run(upload_many())
+    assert all(a == attachments[0] for a in attachments)
+    assert attachments[0]["type"] == "file" and attachments[0]["payload"]["token"].startswith("f-")
+    uploads = [(r, body) for r, body in log if r.url.host == "upload.example.com"]
+    assert len(uploads) == 1
+    request, body = uploads[0]
+    assert int(request.headers["Content-Length"]) == len(body)
+    assert request.headers["Content-Type"].startswith("multipart/form-data; boundary=")
+    assert b'filename="banner.bin"' in body and b"x" * 600_000 in body
+    assert (sender.upload_cache.misses, sender.upload_cache.hits) == (1, 19)
+    assert [upload_type_of(name) for name in ("a.PNG", "b.mp4", "c.mp3", "d.pdf")] == ["image", "video", "audio", "file"]
+
+
+def test_upload_iterator(api, tmp_path):
+    """
+    Check upload of async iterator: chunked, video token from upload URL, cached by hash for next uploads
+    """
+    transport, log = api
+    sender = MaxSender("token", transport=transport)
+
+    async def chunks():
+        for _ in range(3):
+            yield b"video"
+
+    attachment = asyncio.run(sender.upload(chunks(), "video", filename="clip.mp4"))
+    assert attachment == {"type": "video", "payload": {"token": "v-token"}}
+    assert "Content-Length" not in log[-1][0].headers
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"video" * 3)
+    count = len(log)
+    assert asyncio.run(sender.upload(path, "video")) == attachment
+    assert len(log) == count
+    with pytest.raises(ValueError):
+        asyncio.run(sender.upload(chunks(), "video"))
+
+
+def test_send_attachments(api):
+    """
+    Check message with uploaded attachment is retried while it's not processed
+    """
+    transport, log = api
+    sender = MaxSender("token", transport=transport, retry_backoff=0.01)
+    attachment = {"type": "image", "payload": {"token": "t"}}
+    asyncio.run(sender.send_message("Hi", target=1, attachments=[attachment]))
+    messages = [json.loads(body) for r, body in log if r.url.path == "/messages"]
+    assert len(messages) == 2
+    assert messages[-1]["attachments"] == [attachment]